@@ -0,0 +1,130 @@
+"""
+File: aircraft_layouts.py
+Purpose: Process-wide cache of aircraft cabin configurations (classes, capacity, row -> class).
+"""
+import threading
+from datetime import datetime, timedelta
+from app.models.daos.cache_invalidations import CacheInvalidations
+
+class AircraftLayout:
+    """Precomputed cabin layout of one aircraft (read-only, shared between requests)."""
+    __slots__ = ('aircraft_id', 'configs', 'capacity', 'class_capacity', 'row_configs')
+
+    def __init__(self, aircraft_id, configs):
+        self.aircraft_id = aircraft_id
+        self.configs = configs  # aircraft_classes rows ordered by row_start
+        self.class_capacity = {}
+        for cfg in configs:
+            seats = (cfg['row_end'] - cfg['row_start'] + 1) * len(cfg['columns'])
+            self.class_capacity[cfg['class_name']] = self.class_capacity.get(cfg['class_name'], 0) + seats
+        self.capacity = sum(self.class_capacity.values())
+
+        # row_configs[row] -> the aircraft_classes row covering it (None for rows outside every range)
+        last_row = max((cfg['row_end'] for cfg in configs), default=0)
+        self.row_configs = [None] * (last_row + 1)
+        for cfg in configs:
+            for row in range(cfg['row_start'], cfg['row_end'] + 1):
+                self.row_configs[row] = cfg
+
+    def seat_class(self, row, column):
+        """Returns the cabin class of a seat, or None if the aircraft has no such seat."""
+        cfg = self.row_configs[row] if 0 < row < len(self.row_configs) else None
+        if cfg is None or len(column) != 1 or column not in cfg['columns']:
+            return None
+        return cfg['class_name']
+
+class AircraftLayouts:
+    """
+    Loads the whole aircraft_classes table once and serves layouts from memory.
+    Configurations only change through SeatService, which calls invalidate(); other processes
+    drop their copy on their next CacheInvalidations.poll(). An aircraft
+    missing from the cache (configured after the load, possibly by another process) is
+    looked up on its own before it is reported as unconfigured.
+    """
+    REFRESH_INTERVAL = timedelta(minutes=10)
+
+    # Shared across instances (same idea as the DBManager singleton state)
+    _layouts = None  # {aircraft_id: AircraftLayout}
+    _built_at = None
+    _lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the cache so the next lookup reloads it (call after configuration changes, in every process)."""
+        CacheInvalidations.publish('aircraft_layouts')
+
+    @classmethod
+    def _invalidate_local(cls, key=None):
+        """CacheInvalidations handler: drops this process's copy."""
+        with cls._lock:
+            cls._layouts = None
+            cls._built_at = None
+
+    def _ensure_loaded(self):
+        """Reloads all layouts if invalidated or older than REFRESH_INTERVAL."""
+        CacheInvalidations.poll()
+        cls = type(self)
+        layouts = cls._layouts
+        if layouts is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+            return layouts
+
+        with cls._lock:
+            if cls._layouts is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+                return cls._layouts
+
+            rows = self.db.fetch_all("""
+                SELECT aircraft_id, class_name, row_start, row_end, columns
+                FROM aircraft_classes
+                ORDER BY aircraft_id, row_start
+            """)
+            if not rows:
+                # Unconfigured fleet or failed query (fetch_all returns []): retry next time
+                return {}
+
+            grouped = {}
+            for row in rows:
+                grouped.setdefault(row['aircraft_id'], []).append(row)
+
+            cls._layouts = {aircraft_id: AircraftLayout(aircraft_id, configs) for aircraft_id, configs in grouped.items()}
+            cls._built_at = datetime.now()
+            return cls._layouts
+
+    def get(self, aircraft_id):
+        """Returns the AircraftLayout of an aircraft, or None if it has no configuration."""
+        if aircraft_id is None:
+            return None
+        layout = self._ensure_loaded().get(aircraft_id)
+        return layout if layout is not None else self._load_one(aircraft_id)
+
+    def _load_one(self, aircraft_id):
+        """Reads one aircraft's configuration and adds it to the cache; None if it has none."""
+        configs = self.db.fetch_all("""
+            SELECT aircraft_id, class_name, row_start, row_end, columns
+            FROM aircraft_classes
+            WHERE aircraft_id = %s
+            ORDER BY row_start
+        """, (aircraft_id,))
+        if not configs:
+            return None
+
+        layout = AircraftLayout(aircraft_id, configs)
+        cls = type(self)
+        with cls._lock:
+            if cls._layouts is not None:
+                # Copy on write: readers iterate the current dict without the lock
+                cls._layouts = {**cls._layouts, aircraft_id: layout}
+        return layout
+
+    def capacity(self, aircraft_id):
+        """Total seats of an aircraft (0 if unconfigured)."""
+        layout = self.get(aircraft_id)
+        return layout.capacity if layout else 0
+
+    def capacities(self):
+        """{aircraft_id: total seats} for the whole fleet."""
+        return {aircraft_id: layout.capacity for aircraft_id, layout in self._ensure_loaded().items()}
+
+CacheInvalidations.register('aircraft_layouts', AircraftLayouts._invalidate_local)
@@ -96,4 +96,80 @@ class AircraftDAO:
             WHERE f.aircraft_id = %s AND f.departure_time > %s
             ORDER BY f.departure_time ASC LIMIT 1
         """
-        return self.db.fetch_one(query, (aircraft_id, after_time))
\ No newline at end of file
+        return self.db.fetch_one(query, (aircraft_id, after_time))
+
+    # --- Batch Assignment ---
+
+    def fetch_fleet(self):
+        """Returns every aircraft (id order, as fetch_candidates_by_window lists them)."""
+        query = "SELECT aircraft_id, manufacturer, size, current_location FROM aircraft ORDER BY aircraft_id"
+        return self.db.fetch_all(query)
+
+    def fetch_schedules(self, start_time, end_time):
+        """
+        Returns the assigned flights needed to plan [start_time, end_time): every flight departing
+        in the window, plus each aircraft's last flight before it and first flight after it.
+        """
+        query = """
+            SELECT aircraft_id, departure_time, flight_duration, origin_airport, destination_airport
+            FROM (
+                SELECT f.aircraft_id, f.departure_time, r.flight_duration, r.origin_airport, r.destination_airport,
+                       ROW_NUMBER() OVER (PARTITION BY f.aircraft_id ORDER BY f.departure_time DESC) AS n
+                FROM flights f
+                JOIN routes r ON f.route_id = r.route_id
+                WHERE f.aircraft_id IS NOT NULL AND f.departure_time < %s
+            ) before_window
+            WHERE n = 1
+            UNION ALL
+            SELECT f.aircraft_id, f.departure_time, r.flight_duration, r.origin_airport, r.destination_airport
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            WHERE f.aircraft_id IS NOT NULL AND f.departure_time >= %s AND f.departure_time < %s
+            UNION ALL
+            SELECT aircraft_id, departure_time, flight_duration, origin_airport, destination_airport
+            FROM (
+                SELECT f.aircraft_id, f.departure_time, r.flight_duration, r.origin_airport, r.destination_airport,
+                       ROW_NUMBER() OVER (PARTITION BY f.aircraft_id ORDER BY f.departure_time) AS n
+                FROM flights f
+                JOIN routes r ON f.route_id = r.route_id
+                WHERE f.aircraft_id IS NOT NULL AND f.departure_time >= %s
+            ) after_window
+            WHERE n = 1
+        """
+        return self.db.fetch_all(query, (start_time, start_time, end_time, end_time))
+
+    def bulk_assign_aircraft(self, assignments, chunk_size=500):
+        """
+        Writes (flight_id, aircraft_id) pairs with one UPDATE ... CASE per chunk, each chunk in its
+        own transaction. Flights that got an aircraft meanwhile are left alone (not counted).
+        """
+        if not assignments:
+            return {"status": "success", "assigned": 0}
+
+        conn = self.db.get_connection()
+        if not conn:
+            return {"status": "error", "assigned": 0, "message": "DB connection failed"}
+
+        cursor = conn.cursor()
+        assigned = 0
+        try:
+            for i in range(0, len(assignments), chunk_size):
+                chunk = assignments[i:i + chunk_size]
+                cases = ' '.join(["WHEN %s THEN %s"] * len(chunk))
+                placeholders = ','.join(['%s'] * len(chunk))
+                query = f"""
+                    UPDATE flights
+                    SET aircraft_id = CASE flight_id {cases} END
+                    WHERE flight_id IN ({placeholders}) AND aircraft_id IS NULL
+                """
+                params = [value for pair in chunk for value in pair] + [flight_id for flight_id, _ in chunk]
+                cursor.execute(query, tuple(params))
+                conn.commit()
+                assigned += cursor.rowcount
+            return {"status": "success", "assigned": assigned}
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "assigned": assigned, "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
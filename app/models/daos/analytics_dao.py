@@ -0,0 +1,57 @@
+"""
+File: analytics_dao.py
+Purpose: Data Access Object for the in-memory Analytics Engine (Streaming bulk extracts).
+"""
+
+class AnalyticsDAO:
+    """
+    Streams the flight and order-line extracts the analytics snapshot is built from.
+    Rows are read through an unbuffered cursor in fetchmany batches, so memory stays
+    bounded by the batch size on the client side regardless of table size.
+    """
+    BATCH_SIZE = 50000
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def _stream(self, query, params=None, batch_size=None):
+        """Yields lists of tuples from an unbuffered cursor (see DBManager.stream)."""
+        return self.db.stream(query, params, batch_size or self.BATCH_SIZE)
+
+    def stream_flights(self, batch_size=None):
+        """
+        Yields batches of (flight_id, departure_time, flight_status, economy_price, business_price,
+        aircraft_id, route, flight_hours, aircraft_size, manufacturer, economy_seats, business_seats),
+        ordered by flight_id.
+        """
+        query = """
+            SELECT
+                f.flight_id,
+                f.departure_time,
+                f.flight_status,
+                f.economy_price,
+                f.business_price,
+                f.aircraft_id,
+                CONCAT(r.origin_airport, '-', r.destination_airport) AS route,
+                TIME_TO_SEC(r.flight_duration) / 3600 AS flight_hours,
+                a.size,
+                a.manufacturer,
+                COALESCE(cap.economy_seats, 0),
+                COALESCE(cap.business_seats, 0)
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            LEFT JOIN aircraft a ON f.aircraft_id = a.aircraft_id
+            LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            ORDER BY f.flight_id
+        """
+        return self._stream(query, batch_size=batch_size)
+
+    def stream_sold_lines(self, batch_size=None):
+        """Yields batches of (flight_id, is_business) for every seat of an active or completed order."""
+        query = """
+            SELECT ol.flight_id, COALESCE(ol.class = 'Business', 0)
+            FROM order_lines ol
+            JOIN orders o ON ol.unique_order_code = o.unique_order_code
+            WHERE o.order_status IN ('active', 'completed')
+        """
+        return self._stream(query, batch_size=batch_size)
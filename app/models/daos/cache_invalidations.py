@@ -0,0 +1,83 @@
+"""
+File: cache_invalidations.py
+Purpose: Cross-process invalidation of the process-wide caches (order views, reports, layouts, positioning).
+"""
+import threading
+import time
+from database.db_manager import DBManager
+
+class CacheInvalidations:
+    """
+    Every worker process has its own copy of each cache, so an invalidation is also written to
+    cache_invalidations. The other processes replay new rows from their read paths (poll(), at most
+    once per POLL_INTERVAL), so a change made through any worker, job process or CLI reaches every
+    cache within about POLL_INTERVAL seconds instead of waiting for the cache's TTL.
+    """
+    POLL_INTERVAL = 1.0
+    RETENTION_SECONDS = 3600  # Rows older than this are pruned
+    PRUNE_EVERY = 100         # Prune on every Nth published row
+
+    # Shared across instances (same idea as the DBManager singleton state)
+    _handlers = {}     # cache name -> callable(key or None) clearing it in this process
+    _last_id = None    # Last row replayed by this process
+    _polled_at = None  # time.monotonic() of the last poll
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, name, handler):
+        """Registers the function that clears cache `name` locally (called with a key, or None for everything)."""
+        cls._handlers[name] = handler
+
+    @classmethod
+    def publish(cls, name, key=None):
+        """Clears cache `name` (one key or everything) here and in every other process."""
+        cls._handlers[name](key)
+        res = DBManager().execute_query(
+            "INSERT INTO cache_invalidations (cache_name, cache_key) VALUES (%s, %s)",
+            (name, None if key is None else str(key))
+        )
+        if isinstance(res, dict) and res.get('lastrowid') and res['lastrowid'] % cls.PRUNE_EVERY == 0:
+            DBManager().execute_query(
+                "DELETE FROM cache_invalidations WHERE created_at < NOW() - INTERVAL %s SECOND",
+                (cls.RETENTION_SECONDS,)
+            )
+
+    @classmethod
+    def poll(cls):
+        """Replays invalidations published by other processes since the last poll (cheap between polls)."""
+        polled_at = cls._polled_at
+        if polled_at is not None and time.monotonic() - polled_at < cls.POLL_INTERVAL:
+            return
+        # One thread polls; the others keep serving their cached values meanwhile
+        if not cls._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            if cls._polled_at is not None and now - cls._polled_at < cls.POLL_INTERVAL:
+                return
+
+            db = DBManager()
+            if cls._last_id is None or now - cls._polled_at > cls.RETENTION_SECONDS / 2:
+                # First poll, or idle long enough that rows may have been pruned: start from the newest row
+                if cls._last_id is not None:
+                    for handler in cls._handlers.values():
+                        handler(None)
+                row = db.fetch_one("SELECT COALESCE(MAX(id), 0) AS last_id FROM cache_invalidations")
+                if row is None:
+                    return
+                cls._last_id = row['last_id']
+            else:
+                rows = db.fetch_all(
+                    "SELECT id, cache_name, cache_key FROM cache_invalidations WHERE id > %s ORDER BY id",
+                    (cls._last_id,)
+                )
+                for row in rows:
+                    handler = cls._handlers.get(row['cache_name'])
+                    if handler:
+                        handler(row['cache_key'])
+                    cls._last_id = row['id']
+            cls._polled_at = now
+        except Exception as e:
+            print(f"Error polling cache invalidations: {e}")
+        finally:
+            cls._lock.release()
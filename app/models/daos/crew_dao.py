@@ -2,11 +2,58 @@
 File: crew_dao.py
 Purpose: Data Access Object for Crew operations (Candidates, Assignments).
 """
+from datetime import timedelta
 
 class CrewDAO:
     """
     Handles database operations for crew management.
     """
+    # No route is longer than this, so a duty overlapping a window must start within it
+    MAX_DUTY_DURATION = timedelta(hours=24)
+    ROSTER_LOCK = 'flytau_roster'
+
+    # Duty timeline rows for the assignments matching {flight_filter} (a predicate on ca / f).
+    # Every timeline writer uses it, so all agree that cancelled flights never occupy crew.
+    TIMELINE_INSERT_SQL = """
+        INSERT INTO crew_duty_timeline
+            (employee_id, flight_id, busy_start, busy_end, start_location, end_location)
+        SELECT
+            ca.employee_id,
+            f.flight_id,
+            f.departure_time,
+            ADDTIME(f.departure_time, r.flight_duration),
+            r.origin_airport,
+            r.destination_airport
+        FROM crew_assignments ca
+        JOIN flights f ON ca.flight_id = f.flight_id
+        JOIN routes r ON f.route_id = r.route_id
+        WHERE {flight_filter}
+        AND f.flight_status NOT IN ('Cancelled', 'System Cancelled')
+    """
+
+    # Last known airport of crew member `cm` as of a time parameter: one backward probe on
+    # (employee_id, busy_end). Before their first duty ended, crew are where that duty starts
+    # (probe on the primary key); cm.current_location is moved forward on landing, so it is only
+    # the answer for crew without any duty
+    LOCATION_AS_OF_SQL = """COALESCE(
+                        (
+                            SELECT t_loc.end_location
+                            FROM crew_duty_timeline t_loc
+                            WHERE t_loc.employee_id = cm.employee_id
+                            AND t_loc.busy_end <= %s
+                            ORDER BY t_loc.busy_end DESC
+                            LIMIT 1
+                        ),
+                        (
+                            SELECT t_first.start_location
+                            FROM crew_duty_timeline t_first
+                            WHERE t_first.employee_id = cm.employee_id
+                            ORDER BY t_first.busy_start
+                            LIMIT 1
+                        ),
+                        cm.current_location
+                    )"""
+
     def __init__(self, db_manager):
         self.db = db_manager
 
@@ -28,95 +75,158 @@ class CrewDAO:
         """
         return self.db.fetch_one(query, (flight_id,))
 
-    def fetch_candidates(self, params):
-        """Core SQL query to find, score, and sort crew members based on location and compatibility."""
-        query = """
-        SELECT 
-            s.employee_id as id_number,
-            s.first_name,
-            s.last_name,
-            cm.current_location,
-            cm.long_haul_certified,
-            
-            CASE 
-                WHEN cm.current_location = %s THEN 0 
-                ELSE 1 
-            END AS needs_transfer,
-
-            CASE
-                WHEN %s = 'Short' AND cm.long_haul_certified = 1 THEN 'Overqualified (Reserve for Long)'
-                WHEN %s = 'Long' AND cm.long_haul_certified = 1 THEN 'Perfect Match'
-                ELSE 'Standard Match' 
-            END AS match_quality,
-
-            (
-                SELECT f_in.flight_id
-                FROM flights f_in
-                JOIN routes rt_in ON f_in.route_id = rt_in.route_id
+    def fetch_candidates(self, origin, departure_time, end_time, route_type, role_name, limit, transfer_origins=()):
+        """Single-role wrapper around fetch_candidates_by_roles."""
+        return self.fetch_candidates_by_roles(
+            origin, departure_time, end_time, route_type, {role_name: limit}, transfer_origins
+        )[role_name]
+
+    def fetch_candidates_by_roles(self, origin, departure_time, end_time, route_type, role_limits, transfer_origins=()):
+        """
+        Core SQL query to find, score, and sort crew members based on location and compatibility.
+        Ranks every requested role in one pass (ROW_NUMBER per role) and returns {role: [candidates]}.
+        role_limits: {role_name: max candidates}, e.g. {'Pilot': 7, 'Flight Attendant': 11}.
+        transfer_origins: airports with a usable positioning flight into the origin (see PositioningIndex).
+        """
+        roles = list(role_limits)
+        role_placeholders = ','.join(['%s'] * len(roles))
+        limit_filter = ' OR '.join(['(ranked.role = %s AND ranked.role_rank <= %s)'] * len(roles))
+
+        # NULL keeps the IN () list valid when no transfers are possible
+        transfer_origins = list(transfer_origins) or [None]
+        transfer_placeholders = ','.join(['%s'] * len(transfer_origins))
+        query = f"""
+        SELECT * FROM (
+            SELECT 
+                c.id_number,
+                c.first_name,
+                c.last_name,
+                c.role,
+                c.current_location,
+                c.long_haul_certified,
+                
+                CASE 
+                    WHEN c.current_location = %s THEN 0 
+                    ELSE 1 
+                END AS needs_transfer,
+
+                CASE
+                    WHEN %s = 'Short' AND c.long_haul_certified = 1 THEN 'Overqualified (Reserve for Long)'
+                    WHEN %s = 'Long' AND c.long_haul_certified = 1 THEN 'Perfect Match'
+                    ELSE 'Standard Match' 
+                END AS match_quality,
+
+                ROW_NUMBER() OVER (
+                    PARTITION BY c.role
+                    ORDER BY 
+                        CASE WHEN c.current_location = %s THEN 0 ELSE 1 END ASC, -- needs_transfer
+                        CASE 
+                            WHEN %s = 'Short' AND c.long_haul_certified = 1 THEN 1 
+                            ELSE 0 
+                        END ASC,
+                        c.last_name ASC
+                ) AS role_rank
+
+            FROM (
+                SELECT 
+                    s.employee_id as id_number,
+                    s.first_name,
+                    s.last_name,
+                    s.role,
+                    cm.long_haul_certified,
+                    -- Location as of departure: where their last duty before it lands (see LOCATION_AS_OF_SQL)
+                    {self.LOCATION_AS_OF_SQL} as current_location
+                FROM staff s
+                JOIN crew_members cm ON s.employee_id = cm.employee_id
+                
                 WHERE 
-                    rt_in.origin_airport = cm.current_location 
-                    AND rt_in.destination_airport = %s
-                    -- Flight arrives at least 2 hours before departure (Buffer)
-                    AND ADDTIME(f_in.departure_time, rt_in.flight_duration) <= %s - INTERVAL 2 HOUR
-                ORDER BY f_in.departure_time DESC
-                LIMIT 1
-            ) as transfer_flight_id
-
-        FROM staff s
-        JOIN crew_members cm ON s.employee_id = cm.employee_id
-        
-        WHERE 
-          -- 1. Role Filter
-          s.role = %s 
-          
-          -- 2. Location Filter (Local or valid transfer available)
-          AND (
-              cm.current_location = %s
-              OR 
-              EXISTS (
-                  SELECT 1
-                  FROM flights f_in
-                  JOIN routes rt_in ON f_in.route_id = rt_in.route_id
-                  WHERE 
-                      rt_in.origin_airport = cm.current_location 
-                      AND rt_in.destination_airport = %s
-                      AND ADDTIME(f_in.departure_time, rt_in.flight_duration) <= %s - INTERVAL 2 HOUR
-              )
-          )
-
-          -- 3. Certification Filter
-          AND (
-              (%s = 'Short') -- Everyone passes short haul requirements
-              OR 
-              (cm.long_haul_certified = 1) -- Only certified crew for long haul
-          )
-
-          -- 4. Availability Filter (No overlapping flights)
-          AND NOT EXISTS (
-              SELECT 1
-              FROM crew_assignments ca_busy
-              JOIN flights f_busy ON ca_busy.flight_id = f_busy.flight_id
-              JOIN routes r_busy ON f_busy.route_id = r_busy.route_id
-              WHERE ca_busy.employee_id = s.employee_id
-              AND f_busy.flight_status != 'Cancelled'
-              AND (
-                  f_busy.departure_time < ADDTIME(%s, %s) -- Existing Start < New End
-                  AND 
-                  ADDTIME(f_busy.departure_time, r_busy.flight_duration) > %s -- Existing End > New Start
-              )
-          )
-
-        ORDER BY 
-            needs_transfer ASC, 
-            CASE 
-                WHEN %s = 'Short' AND cm.long_haul_certified = 1 THEN 1 
-                ELSE 0 
-            END ASC,
-            s.last_name ASC
-            
-        LIMIT %s;
+                  -- 1. Role Filter
+                  s.role IN ({role_placeholders})
+
+                  -- 2. Certification Filter
+                  AND (
+                      (%s = 'Short') -- Everyone passes short haul requirements
+                      OR 
+                      (cm.long_haul_certified = 1) -- Only certified crew for long haul
+                  )
+
+                  -- 3. Availability Filter (No overlapping duty in the timeline)
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM crew_duty_timeline t
+                      WHERE t.employee_id = s.employee_id
+                      AND t.busy_start >= %s -- Bounded by the longest duty, keeps the probe a tight range
+                      AND t.busy_start < %s  -- Existing Start < New End
+                      AND t.busy_end > %s    -- Existing End > New Start
+                  )
+            ) c
+
+            -- 4. Location Filter (Local or a positioning flight is available from their location)
+            WHERE c.current_location = %s
+            OR c.current_location IN ({transfer_placeholders})
+        ) ranked
+        WHERE {limit_filter}
+        ORDER BY ranked.role, ranked.role_rank
+        """
+        params = [
+            origin,
+            route_type, route_type,
+            origin, route_type,
+            departure_time,
+            *roles,
+            route_type,
+            departure_time - self.MAX_DUTY_DURATION, end_time, departure_time,
+            origin,
+            *transfer_origins,
+        ]
+        for role_name, limit in role_limits.items():
+            params.extend([role_name, int(limit)])
+
+        results = {role_name: [] for role_name in roles}
+        for row in self.db.fetch_all(query, tuple(params)):
+            results[row['role']].append(row)
+        return results
+
+    def fetch_locations_as_of(self, as_of, employee_ids=None):
+        """Returns {employee_id: last known airport as of `as_of`} for all (or the given) crew members."""
+        query = f"""
+            SELECT cm.employee_id, {self.LOCATION_AS_OF_SQL} as location
+            FROM crew_members cm
+        """
+        params = [as_of]
+        if employee_ids:
+            format_strings = ','.join(['%s'] * len(employee_ids))
+            query += f" WHERE cm.employee_id IN ({format_strings})"
+            params.extend(employee_ids)
+
+        return {row['employee_id']: row['location'] for row in self.db.fetch_all(query, tuple(params))}
+
+    def fetch_positioning_flights(self):
+        """Fetches upcoming bookable flights with arrival time and remaining seats (for crew transfers)."""
+        query = """
+            SELECT 
+                f.flight_id,
+                r.origin_airport,
+                r.destination_airport,
+                f.departure_time,
+                ADDTIME(f.departure_time, r.flight_duration) as arrival_time,
+                cap.total_seats - COALESCE(sold.sold_seats, 0) as seats_available
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            LEFT JOIN (
+                SELECT ol.flight_id, COUNT(*) as sold_seats
+                FROM order_lines ol
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                JOIN flights f_sold ON ol.flight_id = f_sold.flight_id
+                WHERE o.order_status IN ('active', 'completed')
+                AND f_sold.departure_time >= NOW()
+                GROUP BY ol.flight_id
+            ) sold ON sold.flight_id = f.flight_id
+            WHERE f.flight_status NOT IN ('Cancelled', 'System Cancelled')
+            AND f.departure_time >= NOW() -- Crew can only board flights that have not left yet
         """
-        return self.db.fetch_all(query, params)
+        return self.db.fetch_all(query)
 
     def check_assignment_conflict(self, employee_ids_list, flight_id, flight_start, flight_end):
         """Checks if any of the employees have overlapping flights."""
@@ -126,29 +236,21 @@ class CrewDAO:
         format_strings = ','.join(['%s'] * len(employee_ids_list))
         check_query = f"""
             SELECT s.first_name, s.last_name 
-            FROM crew_assignments ca
-            JOIN flights f ON ca.flight_id = f.flight_id
-            JOIN routes r ON f.route_id = r.route_id
-            JOIN staff s ON ca.employee_id = s.employee_id
-            WHERE ca.employee_id IN ({format_strings})
-            AND f.flight_id != %s -- Exclude self if re-assigning
-            AND f.flight_status != 'Cancelled'
-            AND (
-                f.departure_time < %s
-                AND ADDTIME(f.departure_time, r.flight_duration) > %s
-            )
+            FROM crew_duty_timeline t
+            JOIN staff s ON t.employee_id = s.employee_id
+            WHERE t.employee_id IN ({format_strings})
+            AND t.flight_id != %s -- Exclude self if re-assigning
+            AND t.busy_start >= %s
+            AND t.busy_start < %s
+            AND t.busy_end > %s
             LIMIT 1
         """
-        # Note: Caller is responsible for prepping params correctly
-        # But to be safe, we can construct them here if we passed individual args
-        # For now, assuming caller handles param construction or we adhere to DAO pattern
-        # Let's adjust slightly for cleaner usage
-        
-        params = list(employee_ids_list) + [flight_id, flight_end, flight_start]
+        params = list(employee_ids_list) + [flight_id, flight_start - self.MAX_DUTY_DURATION, flight_end, flight_start]
         return self.db.fetch_one(check_query, tuple(params))
 
     def clear_assignments(self, flight_id):
         """Removes existing assignments for a flight."""
+        self.db.execute_query("DELETE FROM crew_duty_timeline WHERE flight_id = %s", (flight_id,))
         delete_query = "DELETE FROM crew_assignments WHERE flight_id = %s"
         return self.db.execute_query(delete_query, (flight_id,))
 
@@ -159,3 +261,157 @@ class CrewDAO:
             VALUES (%s, %s)
         """
         return self.db.execute_query(insert_query, (flight_id, employee_id))
+
+    def replace_assignments(self, flight_id, employee_ids):
+        """Replaces a flight's crew and its duty timeline rows in one transaction."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise Exception("DB connection failed")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DELETE FROM crew_duty_timeline WHERE flight_id = %s", (flight_id,))
+            cursor.execute("DELETE FROM crew_assignments WHERE flight_id = %s", (flight_id,))
+            if employee_ids:
+                cursor.executemany(
+                    "INSERT INTO crew_assignments (flight_id, employee_id) VALUES (%s, %s)",
+                    [(flight_id, employee_id) for employee_id in employee_ids]
+                )
+                cursor.execute(self.TIMELINE_INSERT_SQL.format(flight_filter="ca.flight_id = %s"), (flight_id,))
+
+            conn.commit()
+            return len(employee_ids)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    # --- Duty Timeline (Derived from crew_assignments) ---
+
+    def rebuild_timeline(self):
+        """Full resync of the duty timeline (recovery / backfill)."""
+        self.db.execute_query("DELETE FROM crew_duty_timeline")
+        return self.db.execute_query(self.TIMELINE_INSERT_SQL.format(flight_filter="TRUE"))
+
+    # --- Rostering (Bulk reads / writes over a planning horizon) ---
+
+    def acquire_roster_lock(self):
+        """
+        Takes the roster lock (one bulk roster at a time across workers and job processes) on a
+        dedicated connection. Returns that connection, to pass to release_roster_lock, or None if busy.
+        """
+        conn = self.db.get_connection()
+        if not conn:
+            raise Exception("DB connection failed")
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (self.ROSTER_LOCK,))
+            acquired = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+        if not acquired:
+            conn.close()
+            return None
+        return conn
+
+    def release_roster_lock(self, conn):
+        """Releases the roster lock and returns its connection to the pool."""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (self.ROSTER_LOCK,))
+            cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def fetch_unstaffed_flights(self, date_from, date_to):
+        """Fetches non-cancelled flights in [date_from, date_to) that have no crew assigned yet."""
+        query = """
+            SELECT 
+                f.flight_id,
+                f.departure_time,
+                ADDTIME(f.departure_time, rt.flight_duration) as calculated_end_time,
+                rt.flight_duration,
+                rt.origin_airport,
+                rt.destination_airport,
+                rt.route_type,
+                COALESCE(a.size, 'Small') as aircraft_size
+            FROM flights f
+            JOIN routes rt ON f.route_id = rt.route_id
+            LEFT JOIN aircraft a ON f.aircraft_id = a.aircraft_id
+            WHERE f.departure_time >= %s AND f.departure_time < %s
+            AND f.flight_status NOT IN ('Cancelled', 'System Cancelled')
+            AND NOT EXISTS (SELECT 1 FROM crew_assignments ca WHERE ca.flight_id = f.flight_id)
+            ORDER BY f.departure_time
+        """
+        return self.db.fetch_all(query, (date_from, date_to))
+
+    def fetch_crew_pool(self):
+        """Fetches every crew member with role, certification and home location."""
+        query = """
+            SELECT s.employee_id, s.role, cm.long_haul_certified, cm.current_location
+            FROM staff s
+            JOIN crew_members cm ON s.employee_id = cm.employee_id
+            WHERE s.role IN ('Pilot', 'Flight Attendant')
+        """
+        return self.db.fetch_all(query)
+
+    def fetch_timeline_window(self, window_start, window_end):
+        """Fetches duty timeline rows that touch [window_start, window_end]."""
+        query = """
+            SELECT employee_id, flight_id, busy_start, busy_end, start_location, end_location
+            FROM crew_duty_timeline
+            WHERE busy_start < %s AND busy_start >= %s
+            ORDER BY busy_start
+        """
+        return self.db.fetch_all(query, (window_end, window_start - self.MAX_DUTY_DURATION))
+
+    def insert_assignments_bulk(self, assignments):
+        """
+        Inserts (flight_id, employee_id) pairs and their timeline rows in one transaction.
+        Flights that got crew since they were read (e.g. through the wizard) are skipped.
+        Returns the number of assignments inserted.
+        """
+        if not assignments:
+            return 0
+
+        conn = self.db.get_connection()
+        if not conn:
+            raise Exception("DB connection failed")
+
+        cursor = conn.cursor()
+        try:
+            # Locking read: no crew can be added to these flights until this transaction ends
+            flight_ids = sorted({flight_id for flight_id, _ in assignments})
+            format_strings = ','.join(['%s'] * len(flight_ids))
+            cursor.execute(f"""
+                SELECT DISTINCT flight_id FROM crew_assignments
+                WHERE flight_id IN ({format_strings})
+                FOR UPDATE
+            """, tuple(flight_ids))
+            staffed = {row[0] for row in cursor.fetchall()}
+            if staffed:
+                assignments = [pair for pair in assignments if pair[0] not in staffed]
+                flight_ids = [flight_id for flight_id in flight_ids if flight_id not in staffed]
+                if not assignments:
+                    conn.commit()
+                    return 0
+                format_strings = ','.join(['%s'] * len(flight_ids))
+
+            cursor.executemany("INSERT INTO crew_assignments (flight_id, employee_id) VALUES (%s, %s)", assignments)
+
+            cursor.execute(
+                self.TIMELINE_INSERT_SQL.format(flight_filter=f"ca.flight_id IN ({format_strings})"),
+                tuple(flight_ids)
+            )
+
+            conn.commit()
+            return len(assignments)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
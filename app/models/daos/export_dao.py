@@ -0,0 +1,61 @@
+"""
+File: export_dao.py
+Purpose: Data Access Object for CSV Exports (Streaming raw booking extracts).
+"""
+
+class ExportDAO:
+    """
+    Streams raw rows for finance exports. Date ranges are applied in SQL as half-open
+    ranges on indexed columns, and rows come back in unbuffered batches (DBManager.stream).
+    """
+    BATCH_SIZE = 10000
+
+    ORDER_LINE_COLUMNS = (
+        'order_code', 'order_date', 'order_status', 'customer_email', 'guest_email',
+        'flight_id', 'departure_time', 'origin_airport', 'destination_airport', 'flight_status',
+        'aircraft_id', 'seat_row', 'seat_column', 'class', 'seat_price', 'order_total'
+    )
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def stream_order_lines(self, date_from=None, date_to=None, batch_size=None):
+        """
+        Yields batches of order-line tuples (ORDER_LINE_COLUMNS) with flight and price context,
+        for orders placed in [date_from, date_to). Rows follow the order_date index, so no sort is needed.
+        """
+        conditions, params = [], []
+        if date_from:
+            conditions.append("o.order_date >= %s")
+            params.append(date_from)
+        if date_to:
+            conditions.append("o.order_date < %s")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+            SELECT
+                o.unique_order_code,
+                o.order_date,
+                o.order_status,
+                o.customer_email,
+                o.guest_email,
+                f.flight_id,
+                f.departure_time,
+                r.origin_airport,
+                r.destination_airport,
+                f.flight_status,
+                f.aircraft_id,
+                ol.`row_number`,
+                ol.`column_number`,
+                ol.class,
+                CASE WHEN ol.class = 'Business' THEN f.business_price ELSE f.economy_price END,
+                o.total_price
+            FROM orders o
+            JOIN order_lines ol ON ol.unique_order_code = o.unique_order_code
+            JOIN flights f ON ol.flight_id = f.flight_id
+            JOIN routes r ON f.route_id = r.route_id
+            {where}
+            ORDER BY o.order_date
+        """
+        return self.db.stream(query, tuple(params), batch_size or self.BATCH_SIZE)
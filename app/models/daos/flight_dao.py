@@ -3,6 +3,8 @@ File: flight_dao.py
 Purpose: Data Access Object for Flight Operations (Creation, Retrieval, Status Updates).
 """
 from datetime import datetime, timedelta
+from app.models.daos.aircraft_layouts import AircraftLayouts
+from app.models.daos.route_catalog import RouteCatalog
 
 class FlightDAO:
     """
@@ -11,33 +13,16 @@ class FlightDAO:
 
     def __init__(self, db_manager):
         self.db = db_manager
+        self.layouts = AircraftLayouts(db_manager)
+        self.routes = RouteCatalog(db_manager)
 
     def get_all_locations(self):
         """Retrieves a list of all unique cities/airports available in the system."""
-        query = """
-            SELECT DISTINCT origin_airport as location FROM routes
-            UNION
-            SELECT DISTINCT destination_airport as location FROM routes
-        """
-        results = self.db.fetch_all(query)
-        return [row['location'] for row in results]
+        return self.routes.locations()
 
     def get_route_details_by_airports(self, origin, destination):
         """Fetches route ID and duration for a given origin-destination pair."""
-        query = """
-            SELECT route_id, flight_duration, route_type 
-            FROM routes 
-            WHERE origin_airport = %s AND destination_airport = %s
-        """
-        result = self.db.fetch_one(query, (origin, destination))
-        
-        if result:
-            duration = result['flight_duration']
-            if isinstance(duration, str):
-                t = datetime.strptime(duration, "%H:%M:%S")
-                result['flight_duration'] = timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
-        
-        return result
+        return self.routes.get(origin, destination)
 
     def create_flight(self, origin, destination, departure_time, economy_price, business_price):
         """Creates a new flight record in the database with status 'Scheduled'."""
@@ -68,6 +53,174 @@ class FlightDAO:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    # --- Bulk Scheduling ---
+
+    def get_route_map(self):
+        """Returns the whole route graph as {(origin, destination): route}."""
+        return self.routes.route_map()
+
+    def get_existing_departures(self, start_time, end_time):
+        """Returns {(route_id, departure_time)} of non-cancelled flights in a window (duplicate detection)."""
+        query = """
+            SELECT route_id, departure_time 
+            FROM flights 
+            WHERE departure_time >= %s AND departure_time <= %s
+            AND flight_status NOT IN ('Cancelled', 'System Cancelled')
+        """
+        return {(row['route_id'], row['departure_time']) for row in self.db.fetch_all(query, (start_time, end_time))}
+
+    def bulk_insert_flights(self, rows, chunk_size=500):
+        """
+        Inserts (route_id, departure_time, economy_price, business_price) rows as 'Scheduled' flights
+        using one multi-row INSERT per chunk, each chunk in its own transaction.
+        A failing chunk is rolled back; chunks committed before it are kept and counted.
+        """
+        if not rows:
+            return {"status": "success", "inserted": 0}
+
+        conn = self.db.get_connection()
+        if not conn:
+            return {"status": "error", "inserted": 0, "message": "DB connection failed"}
+
+        cursor = conn.cursor()
+        inserted = 0
+        try:
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i:i + chunk_size]
+                values = ','.join(["(%s, NULL, %s, %s, %s, 'Scheduled')"] * len(chunk))
+                query = f"""
+                    INSERT INTO flights 
+                    (route_id, aircraft_id, departure_time, economy_price, business_price, flight_status)
+                    VALUES {values}
+                """
+                params = [value for row in chunk for value in row]
+                cursor.execute(query, tuple(params))
+                conn.commit()
+                inserted += len(chunk)
+            return {"status": "success", "inserted": inserted}
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "inserted": inserted, "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_flights_without_aircraft(self, start_time, end_time):
+        """Lists scheduled flights in a window that still have no aircraft, with their route (for auto-assignment)."""
+        query = """
+            SELECT f.flight_id, f.departure_time, r.origin_airport, r.destination_airport, r.flight_duration
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            WHERE f.departure_time >= %s AND f.departure_time < %s
+            AND f.aircraft_id IS NULL
+            AND f.flight_status NOT IN ('Cancelled', 'System Cancelled')
+            ORDER BY f.departure_time, f.flight_id
+        """
+        return self.db.fetch_all(query, (start_time, end_time))
+
+    # --- Bulk Repricing ---
+
+    def get_reprice_targets(self, date_from, date_to, origin=None, destination=None, aircraft_size=None,
+                            min_load_factor=None, max_load_factor=None):
+        """
+        Selects bookable flights matching the repricing filters with per-class capacity and seats sold.
+        Capacity and sales are pre-aggregated once per aircraft / per flight instead of per row.
+        """
+        query = """
+            SELECT
+                f.flight_id, f.departure_time, f.economy_price, f.business_price,
+                r.origin_airport, r.destination_airport, a.size AS aircraft_size,
+                COALESCE(cap.economy_seats, 0) AS economy_seats,
+                COALESCE(cap.business_seats, 0) AS business_seats,
+                COALESCE(sold.economy_sold, 0) AS economy_sold,
+                COALESCE(sold.business_sold, 0) AS business_sold,
+                (COALESCE(sold.economy_sold, 0) + COALESCE(sold.business_sold, 0))
+                    / NULLIF(COALESCE(cap.economy_seats, 0) + COALESCE(cap.business_seats, 0), 0) AS load_factor
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            LEFT JOIN aircraft a ON f.aircraft_id = a.aircraft_id
+            LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            LEFT JOIN (
+                SELECT ol.flight_id,
+                       SUM(ol.class <> 'Business') AS economy_sold,
+                       SUM(ol.class = 'Business') AS business_sold
+                FROM order_lines ol
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                JOIN flights fs ON ol.flight_id = fs.flight_id
+                WHERE o.order_status IN ('active', 'completed')
+                AND fs.departure_time >= %s AND fs.departure_time < %s
+                GROUP BY ol.flight_id
+            ) sold ON sold.flight_id = f.flight_id
+            WHERE f.departure_time >= %s AND f.departure_time < %s
+            AND f.flight_status IN ('Scheduled', 'Fully Booked')
+        """
+        params = [date_from, date_to, date_from, date_to]
+
+        if origin:
+            query += " AND r.origin_airport = %s"
+            params.append(origin)
+        if destination:
+            query += " AND r.destination_airport = %s"
+            params.append(destination)
+        if aircraft_size:
+            query += " AND a.size = %s"
+            params.append(aircraft_size)
+
+        having = []
+        if min_load_factor is not None:
+            having.append("load_factor >= %s")
+            params.append(min_load_factor)
+        if max_load_factor is not None:
+            having.append("load_factor <= %s")
+            params.append(max_load_factor)
+        if having:
+            query += " HAVING " + " AND ".join(having)
+
+        query += " ORDER BY f.departure_time"
+        return self.db.fetch_all(query, tuple(params))
+
+    def bulk_update_prices(self, flight_ids, economy_change, business_change, batch_size=500):
+        """
+        Applies (factor, offset) price changes as one set-based UPDATE per batch of flight ids,
+        each batch in its own short transaction. New price = GREATEST(0, ROUND(price * factor + offset, 2)).
+        Business fares of 0 (no Business cabin) are left at 0.
+        """
+        if not flight_ids:
+            return {"status": "success", "updated": 0}
+
+        conn = self.db.get_connection()
+        if not conn:
+            return {"status": "error", "updated": 0, "message": "DB connection failed"}
+
+        eco_factor, eco_offset = economy_change
+        bus_factor, bus_offset = business_change
+        cursor = conn.cursor()
+        updated = 0
+        try:
+            for i in range(0, len(flight_ids), batch_size):
+                batch = flight_ids[i:i + batch_size]
+                placeholders = ','.join(['%s'] * len(batch))
+                query = f"""
+                    UPDATE flights
+                    SET economy_price = GREATEST(0, ROUND(economy_price * %s + %s, 2)),
+                        business_price = CASE
+                            WHEN business_price > 0 THEN GREATEST(0, ROUND(business_price * %s + %s, 2))
+                            ELSE business_price
+                        END
+                    WHERE flight_id IN ({placeholders})
+                    AND flight_status IN ('Scheduled', 'Fully Booked')
+                """
+                cursor.execute(query, (eco_factor, eco_offset, bus_factor, bus_offset, *batch))
+                conn.commit()
+                updated += cursor.rowcount
+            return {"status": "success", "updated": updated}
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "updated": updated, "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
     def get_all_active_flights(self, flight_id=None, status_filter=None):
         """Retrieves flights and dynamically updates their status based on current time."""
         # 1. Fetch Flights with Joins for Readability
@@ -146,7 +299,7 @@ class FlightDAO:
                     
                     # --- Capacity Check ---
                     if flight['flight_status'] in ['Scheduled', 'Fully Booked']:
-                        is_full = self._is_flight_full(flight['flight_id'])
+                        is_full = self._is_flight_full(flight['flight_id'], flight['aircraft_id'])
                         
                         final_status = 'Fully Booked' if is_full else 'Scheduled'
                         
@@ -168,17 +321,10 @@ class FlightDAO:
 
         return filtered_flights
 
-    def _is_flight_full(self, flight_id):
+    def _is_flight_full(self, flight_id, aircraft_id):
         """Internal Helper: Returns True if occupied seats >= total capacity."""
-        # 1. Get Total Capacity (Dynamic Calculation)
-        query_capacity = """
-            SELECT SUM((row_end - row_start + 1) * CHAR_LENGTH(columns)) as total
-            FROM aircraft_classes ac
-            JOIN flights f ON ac.aircraft_id = f.aircraft_id
-            WHERE f.flight_id = %s
-        """
-        res_cap = self.db.fetch_one(query_capacity, (flight_id,))
-        total = res_cap['total'] if res_cap and res_cap['total'] else 0
+        # 1. Get Total Capacity (cached aircraft layout)
+        total = self.layouts.capacity(aircraft_id)
         
         if total == 0: return False 
 
@@ -212,10 +358,27 @@ class FlightDAO:
         try:
             query = "UPDATE flights SET flight_status = %s WHERE flight_id = %s"
             self.db.execute_query(query, (new_status, flight_id))
+            if new_status == 'Landed':
+                self._record_crew_landing(flight_id)
             return {"status": "success"}
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
+    def _record_crew_landing(self, flight_id):
+        """Moves the crew's stored location to the landing airport (skipped if a later landing is already known)."""
+        query = """
+            UPDATE crew_members cm
+            JOIN crew_duty_timeline t ON t.employee_id = cm.employee_id AND t.flight_id = %s
+            SET cm.current_location = t.end_location
+            WHERE NOT EXISTS (
+                SELECT 1 FROM crew_duty_timeline later
+                WHERE later.employee_id = t.employee_id
+                AND later.busy_end > t.busy_end
+                AND later.busy_end <= NOW()
+            )
+        """
+        self.db.execute_query(query, (flight_id,))
+
     def cancel_flight_transaction(self, flight_id):
         """Cancels a flight, refunds all active orders, and updates statuses (Transactional)."""
         conn = self.db.get_connection()
@@ -253,6 +416,8 @@ class FlightDAO:
 
             # 3. Cancel Flight
             cursor.execute("UPDATE flights SET flight_status = 'Cancelled' WHERE flight_id = %s", (flight_id,))
+            # Release the crew (cancelled flights never occupy the duty timeline)
+            cursor.execute("DELETE FROM crew_duty_timeline WHERE flight_id = %s", (flight_id,))
             
             # 4. Process Refunds
             cursor.execute("SELECT unique_order_code FROM orders WHERE flight_id = %s AND order_status != 'Cancelled'", (flight_id,))
@@ -264,6 +429,7 @@ class FlightDAO:
                     SET order_status = 'system_cancelled', total_price = 0 
                     WHERE flight_id = %s AND order_status = 'active'
                 """, (flight_id,))
+                cursor.execute("UPDATE order_lines SET is_active = NULL WHERE flight_id = %s", (flight_id,))
             
             conn.commit()
             return {"status": status_code, "message": f"{msg_prefix}Flight cancelled. {len(active_orders)} orders refunded."}
@@ -274,7 +440,93 @@ class FlightDAO:
         finally:
             cursor.close()
             conn.close()
-            
+
+    # --- Mass Cancellation ---
+
+    def get_flights_to_cancel(self, date_from, date_to, aircraft_id=None, airport=None):
+        """Lists upcoming, not yet cancelled flights of an aircraft and/or touching an airport in a window."""
+        query = """
+            SELECT f.flight_id, f.departure_time, r.origin_airport, r.destination_airport, f.aircraft_id,
+                   (SELECT COUNT(*) FROM orders o WHERE o.flight_id = f.flight_id AND o.order_status = 'active') AS active_orders
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            WHERE f.departure_time >= %s AND f.departure_time < %s
+            AND f.flight_status IN ('Scheduled', 'Fully Booked')
+        """
+        params = [date_from, date_to]
+
+        if aircraft_id:
+            query += " AND f.aircraft_id = %s"
+            params.append(aircraft_id)
+        if airport:
+            query += " AND (r.origin_airport = %s OR r.destination_airport = %s)"
+            params.extend([airport, airport])
+
+        query += " ORDER BY f.departure_time"
+        return self.db.fetch_all(query, tuple(params))
+
+    def bulk_cancel_flights(self, flight_ids, chunk_size=100):
+        """
+        Cancels flights and refunds their active orders ('system_cancelled', total_price = 0)
+        with set-based statements, one short transaction per chunk.
+        Each chunk locks only its own flight rows (by primary key), so the lock window stays small.
+        """
+        summary = {"status": "success", "flights_cancelled": 0, "orders_refunded": 0, "flights_skipped": 0}
+        if not flight_ids:
+            return summary
+
+        conn = self.db.get_connection()
+        if not conn:
+            return {**summary, "status": "error", "message": "DB connection failed"}
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for i in range(0, len(flight_ids), chunk_size):
+                chunk = flight_ids[i:i + chunk_size]
+                placeholders = ','.join(['%s'] * len(chunk))
+
+                # 1. Lock the chunk; flights that departed or were cancelled meanwhile are skipped
+                cursor.execute(f"""
+                    SELECT flight_id FROM flights
+                    WHERE flight_id IN ({placeholders})
+                    AND flight_status IN ('Scheduled', 'Fully Booked')
+                    AND departure_time > NOW()
+                    FOR UPDATE
+                """, tuple(chunk))
+                locked = [row['flight_id'] for row in cursor.fetchall()]
+                summary["flights_skipped"] += len(chunk) - len(locked)
+                if not locked:
+                    conn.rollback()
+                    continue
+
+                placeholders = ','.join(['%s'] * len(locked))
+                params = tuple(locked)
+
+                # 2. Cancel flights and release their crew
+                cursor.execute(f"UPDATE flights SET flight_status = 'Cancelled' WHERE flight_id IN ({placeholders})", params)
+                cursor.execute(f"DELETE FROM crew_duty_timeline WHERE flight_id IN ({placeholders})", params)
+
+                # 3. Refund (same semantics as cancel_flight_transaction)
+                cursor.execute(f"""
+                    UPDATE orders
+                    SET order_status = 'system_cancelled', total_price = 0
+                    WHERE flight_id IN ({placeholders}) AND order_status = 'active'
+                """, params)
+                refunded = cursor.rowcount
+                cursor.execute(f"UPDATE order_lines SET is_active = NULL WHERE flight_id IN ({placeholders})", params)
+
+                conn.commit()
+                summary["flights_cancelled"] += len(locked)
+                summary["orders_refunded"] += refunded
+
+            return summary
+        except Exception as e:
+            conn.rollback()
+            return {**summary, "status": "error", "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
     def update_prices(self, flight_id, eco_price, bus_price):
         """Updates ticket prices for an existing flight."""
         try:
@@ -284,8 +536,8 @@ class FlightDAO:
         except Exception as e:
             return {"status": "error", "message": str(e)}
 
-    def get_flight_seats(self, flight_id):
-        """Generates a dynamic 'Seat Map' from Aircraft Configuration."""
+    def get_flight_seats(self, flight_id, hold_token=None):
+        """Generates a dynamic 'Seat Map' from Aircraft Configuration (sold and held seats are occupied)."""
         # 1. Fetch Flight Context
         flight = self.get_flight_by_id(flight_id)
         if not flight: return None
@@ -296,27 +548,34 @@ class FlightDAO:
 
         if not aircraft_id: return []
 
-        # 2. Fetch Configuration
-        query_config = "SELECT * FROM aircraft_classes WHERE aircraft_id = %s ORDER BY row_start"
-        configs = self.db.fetch_all(query_config, (aircraft_id,))
+        # 2. Fetch Configuration (cached aircraft layout)
+        layout = self.layouts.get(aircraft_id)
         
-        if not configs:
+        if not layout:
             return []
 
         # 3. Fetch Occupied Seats
         query_occupied = """
-            SELECT ol.row_number, ol.column_number
-            FROM order_lines ol
-            JOIN orders o ON ol.unique_order_code = o.unique_order_code
-            WHERE ol.flight_id = %s AND o.order_status != 'Cancelled'
+            SELECT `row_number`, `column_number`
+            FROM order_lines
+            WHERE flight_id = %s AND is_active = 1
         """
         occupied_results = self.db.fetch_all(query_occupied, (flight_id,))
         occupied_set = {f"{row['row_number']}-{row['column_number']}" for row in occupied_results}
 
+        # Live holds of other drafts (the viewer's own hold stays selectable)
+        query_held = """
+            SELECT `row_number`, `column_number`
+            FROM seat_holds
+            WHERE flight_id = %s AND expires_at >= NOW() AND hold_token <> %s
+        """
+        held_results = self.db.fetch_all(query_held, (flight_id, hold_token or ''))
+        occupied_set.update(f"{row['row_number']}-{row['column_number']}" for row in held_results)
+
         # 4. Generate Seat Map
         final_seats = []
         
-        for cfg in configs:
+        for cfg in layout.configs:
             cls_name = cfg['class_name']
             columns = list(cfg['columns'])
             price = business_price if cls_name == 'Business' else economy_price
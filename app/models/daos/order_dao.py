@@ -2,37 +2,147 @@
 File: order_dao.py
 Purpose: Data Access Object for Booking Lifecycle (Creation, Cancellation, Retrieval).
 """
-import random
+import os
+import threading
 from datetime import datetime
+from app.models.daos.aircraft_layouts import AircraftLayouts
 
 class OrderDAO:
     """
     Manages order data, including transaction creation, cancellation logic, and ticket retrieval.
     """
 
+    # Order codes: a bijective scramble of a DB-backed sequence, so they are unique by
+    # construction and do not reveal order volume. Legacy codes are 6 digits, new ones 10.
+    CODE_BLOCK_SIZE = 100            # Sequence values reserved per DB round-trip
+    CODE_BASE = 1000000000           # Smallest 10-digit code
+    CODE_SPACE = 9000000000          # 1e9 .. 1e10 - 1
+    CODE_MULTIPLIER = 4294967291     # Coprime with CODE_SPACE (2^9 * 3^2 * 5^9)
+    CODE_OFFSET = 2718281828
+
+    # Current block, shared by all instances in a process: [next, end, pid]
+    _code_block = None
+    _code_lock = threading.Lock()
+
     def __init__(self, db_manager):
         self.db = db_manager
+        self.layouts = AircraftLayouts(db_manager)
 
-    def _get_seat_class_map(self, flight_id):
-        """Resolves row ranges to class names (Economy/Business) for a given flight."""
-        query = """
-            SELECT ac.row_start, ac.row_end, ac.class_name
-            FROM flights f
-            JOIN aircraft_classes ac ON f.aircraft_id = ac.aircraft_id
-            WHERE f.flight_id = %s
-            ORDER BY ac.row_start
-        """
-        return [(r['row_start'], r['row_end'], r['class_name']) for r in self.db.fetch_all(query, (flight_id,))]
+    # --- Order Code Allocation ---
+
+    @classmethod
+    def encode_order_code(cls, n):
+        """Maps sequence value n to a 10-digit code (a permutation of the code space)."""
+        return cls.CODE_BASE + (n * cls.CODE_MULTIPLIER + cls.CODE_OFFSET) % cls.CODE_SPACE
+
+    def allocate_order_code(self):
+        """Returns a new unique order code; hits the database only once per CODE_BLOCK_SIZE codes."""
+        cls = type(self)
+        with cls._code_lock:
+            block = cls._code_block
+            # A forked worker must not reuse its parent's block
+            if block is None or block[0] >= block[1] or block[2] != os.getpid():
+                start, end = self._reserve_code_block(cls.CODE_BLOCK_SIZE)
+                block = cls._code_block = [start, end, os.getpid()]
+            n = block[0]
+            block[0] += 1
+
+        if n >= cls.CODE_SPACE:
+            raise RuntimeError("Order code space exhausted")
+        return cls.encode_order_code(n)
+
+    def _reserve_code_block(self, size):
+        """Atomically advances the 'orders' sequence by size and returns the reserved [start, end)."""
+        conn = self.db.get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                "UPDATE code_sequences SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = 'orders'",
+                (size,)
+            )
+            if cursor.rowcount != 1:
+                raise RuntimeError("Order code sequence is missing (apply migrations)")
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            end = cursor.fetchone()[0]
+            conn.commit()
+            return end - size, end
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _get_seat_layout(self, flight_id):
+        """Returns the cached cabin layout (row -> class) of the flight's aircraft, or None."""
+        flight = self.db.fetch_one("SELECT aircraft_id FROM flights WHERE flight_id = %s", (flight_id,))
+        return self.layouts.get(flight['aircraft_id']) if flight else None
 
     # =================================================================
     # Part A: Order Creation
     # =================================================================
 
-    def create_order(self, flight_id, customer_email, guest_email, total_price, seat_ids):
-        """Generates a new order and inserts ticket lines transactionally."""
-        # 1. Generate Unique Order Code (Numeric, 6 digits)
-        order_code = random.randint(100000, 999999)
-        
+    def get_order_code_by_idempotency_key(self, idempotency_key):
+        """Returns the order code already created for an idempotency key, or None."""
+        row = self.db.fetch_one(
+            "SELECT unique_order_code FROM orders WHERE idempotency_key = %s", (idempotency_key,)
+        )
+        return row['unique_order_code'] if row else None
+
+    def create_order(self, flight_id, customer_email, guest_email, total_price, seat_ids, hold_token=None,
+                     idempotency_key=None):
+        """
+        Generates a new order and inserts ticket lines transactionally.
+        Seats are claimed through the unique (flight, row, column, is_active) index, so only the
+        requested seat rows are locked; if any seat was sold concurrently (or is held by another
+        draft) the whole order is rolled back and the lost seats are reported in 'lost_seats'.
+        The caller's own seat holds (hold_token) are converted, i.e. removed, on success.
+        A repeated idempotency_key returns the original order ('replayed': True) without a new transaction.
+        """
+        # 0. Replay: the key's order already exists
+        if idempotency_key:
+            existing = self.get_order_code_by_idempotency_key(idempotency_key)
+            if existing:
+                return {"status": "success", "order_code": existing, "order_id": existing, "replayed": True}
+
+        # 1. Allocate Unique Order Code (Numeric, 10 digits)
+        try:
+            order_code = self.allocate_order_code()
+        except Exception as e:
+            print(f"Error allocating order code: {e}")
+            return {"status": "error", "message": str(e)}
+
+        # Resolve classes for lines (outside the transaction - configuration is static)
+        layout = self._get_seat_layout(flight_id)
+        if layout is None:
+            return {"status": "error", "message": "Seat configuration not found for this flight"}
+
+        lines_data = []
+        for seat_str in dict.fromkeys(seat_ids): # Drop repeated seats, keep order
+            try:
+                r_str, c_str = seat_str.split('-')
+                row = int(r_str)
+                col = c_str
+            except ValueError:
+                print(f"Invalid seat format: {seat_str}")
+                continue
+
+            # A seat outside the cabin layout is rejected, never stored with a guessed class
+            seat_class = layout.seat_class(row, col)
+            if seat_class is None:
+                return {"status": "error", "message": f"Seat {seat_str} does not exist on this aircraft"}
+
+            lines_data.append((order_code, flight_id, row, col, seat_class))
+
+        if not lines_data:
+            return {"status": "error", "message": "No valid seats selected"}
+
+        # Claim seats in a fixed order so overlapping orders queue instead of deadlocking
+        lines_data.sort(key=lambda line: (line[2], line[3]))
+
         conn = self.db.get_connection()
         if not conn:
             return {"status": "error", "message": "Database connection failed"}
@@ -41,44 +151,76 @@ class OrderDAO:
         try:
             query_order = """
                 INSERT INTO orders 
-                (unique_order_code, order_date, order_status, flight_id, total_price, customer_email, guest_email)
-                VALUES (%s, NOW(), 'active', %s, %s, %s, %s)
+                (unique_order_code, order_date, order_status, flight_id, total_price, customer_email, guest_email,
+                 idempotency_key)
+                VALUES (%s, NOW(), 'active', %s, %s, %s, %s, %s)
             """
             
             c_email = customer_email if customer_email else None
             g_email = guest_email if guest_email else None
             
-            cursor.execute(query_order, (order_code, flight_id, total_price, c_email, g_email))
-            
-            # Resolve classes for lines
-            class_map = self._get_seat_class_map(flight_id)
-            
-            query_line = """
+            try:
+                cursor.execute(query_order, (order_code, flight_id, total_price, c_email, g_email, idempotency_key))
+            except Exception as e:
+                # A concurrent request with the same key committed first (duplicate key on the unique index)
+                if idempotency_key and getattr(e, 'errno', None) == 1062:
+                    conn.rollback()
+                    existing = self.get_order_code_by_idempotency_key(idempotency_key)
+                    if existing:
+                        return {"status": "success", "order_code": existing, "order_id": existing, "replayed": True}
+                raise
+
+            # 2. Seats under someone else's live hold are not for sale
+            seat_filter = ' OR '.join(["(`row_number` = %s AND `column_number` = %s)"] * len(lines_data))
+            cursor.execute(f"""
+                SELECT `row_number`, `column_number` FROM seat_holds
+                WHERE flight_id = %s AND expires_at >= NOW() AND hold_token <> %s AND ({seat_filter})
+                FOR UPDATE
+            """, (flight_id, hold_token or '', *(v for line in lines_data for v in (line[2], line[3]))))
+            held_elsewhere = cursor.fetchall()
+            if held_elsewhere:
+                conn.rollback()
+                lost_seats = [f"{row}-{col}" for row, col in held_elsewhere]
+                return {
+                    "status": "error",
+                    "message": f"Seats {', '.join(s.replace('-', '') for s in lost_seats)} are being booked by another passenger.",
+                    "lost_seats": lost_seats
+                }
+
+            # 3. Claim seats. The unique active-seat index rejects a seat sold concurrently with a
+            # duplicate-key error (1062); any other failure (truncation, foreign key, bad class) is raised as is
+            values = ','.join(["(%s, %s, %s, %s, %s, 1)"] * len(lines_data))
+            query_lines = f"""
                 INSERT INTO order_lines 
-                (unique_order_code, flight_id, `row_number`, `column_number`, `class`) 
-                VALUES (%s, %s, %s, %s, %s)
+                (unique_order_code, flight_id, `row_number`, `column_number`, `class`, is_active) 
+                VALUES {values}
             """
-            
-            lines_data = []
-            for seat_str in seat_ids:
-                try:
-                    r_str, c_str = seat_str.split('-')
-                    row = int(r_str)
-                    col = c_str
-                    
-                    seat_class = 'Economy' 
-                    for (r_start, r_end, c_name) in class_map:
-                        if r_start <= row <= r_end:
-                            seat_class = c_name
-                            break
-                    
-                    lines_data.append((order_code, flight_id, row, col, seat_class))
-                except ValueError:
-                    print(f"Invalid seat format: {seat_str}")
-                    continue
-
-            cursor.executemany(query_line, lines_data)
-            
+            try:
+                cursor.execute(query_lines, tuple(v for line in lines_data for v in line))
+            except Exception as e:
+                if getattr(e, 'errno', None) != 1062:
+                    raise
+                # 4. Lost the race for at least one seat: report exactly which (locking read sees the committed sale)
+                cursor.execute(f"""
+                    SELECT `row_number`, `column_number` FROM order_lines
+                    WHERE flight_id = %s AND is_active = 1 AND ({seat_filter})
+                    LOCK IN SHARE MODE
+                """, (flight_id, *(v for line in lines_data for v in (line[2], line[3]))))
+                taken = {f"{row}-{col}" for row, col in cursor.fetchall()}
+                lost_seats = [f"{line[2]}-{line[3]}" for line in lines_data if f"{line[2]}-{line[3]}" in taken]
+                if not lost_seats:
+                    raise
+                conn.rollback()
+                return {
+                    "status": "error",
+                    "message": f"Seats {', '.join(s.replace('-', '') for s in lost_seats)} were just booked by another passenger.",
+                    "lost_seats": lost_seats
+                }
+
+            # 5. Convert the draft's holds into the sale
+            if hold_token:
+                cursor.execute("DELETE FROM seat_holds WHERE hold_token = %s", (hold_token,))
+
             conn.commit()
             return {"status": "success", "order_code": order_code, "order_id": order_code}
 
@@ -95,34 +237,39 @@ class OrderDAO:
     # =================================================================
 
     def get_order_details(self, order_code):
-        """Fetches full order context including flight details and specific tickets."""
-        # 1. Fetch Order & Flight Info
+        """Fetches full order context (flight details and tickets) in a single query."""
         query = """
             SELECT 
                 o.*, 
                 f.departure_time, r.origin_airport, r.destination_airport,
-                a.manufacturer
+                a.manufacturer,
+                ol.`row_number` AS ticket_row, ol.`column_number` AS ticket_column, ol.`class` AS ticket_class
             FROM orders o
             JOIN flights f ON o.flight_id = f.flight_id
             JOIN routes r ON f.route_id = r.route_id
             LEFT JOIN aircraft a ON f.aircraft_id = a.aircraft_id
+            LEFT JOIN order_lines ol ON ol.unique_order_code = o.unique_order_code
             WHERE o.unique_order_code = %s
+            ORDER BY ol.`row_number`, ol.`column_number`
         """
-        order = self.db.fetch_one(query, (order_code,))
-        
-        if order:
-            q_tickets = """
-                SELECT `row_number`, `column_number`, `class`
-                FROM order_lines
-                WHERE unique_order_code = %s
-                ORDER BY `row_number`, `column_number`
-            """
-            order['tickets'] = self.db.fetch_all(q_tickets, (order_code,))
-            
+        rows = self.db.fetch_all(query, (order_code,))
+        if not rows:
+            return None
+
+        order = {k: v for k, v in rows[0].items() if not k.startswith('ticket_')}
+        order['tickets'] = [
+            {'row_number': r['ticket_row'], 'column_number': r['ticket_column'], 'class': r['ticket_class']}
+            for r in rows if r['ticket_row'] is not None
+        ]
         return order
 
-    def get_customer_orders(self, email, status_filter=None):
-        """Retrieves and filters the complete order history for a registered customer."""
+    def get_customer_orders(self, email, status_filter=None, before=None, per_page=20):
+        """
+        Retrieves one page of a registered customer's order history, newest first.
+        Keyset pagination: 'before' is the (order_date, unique_order_code) of the last order shown.
+        Exactly two queries per page: the orders, then all their tickets in one IN (...) fetch.
+        Returns (orders, next_cursor) where next_cursor is None on the last page.
+        """
         query = """
             SELECT 
                 o.unique_order_code as order_id, o.unique_order_code, o.order_date, o.order_status, o.total_price,
@@ -139,25 +286,44 @@ class OrderDAO:
         if status_filter:
             query += " AND o.order_status = %s"
             params.append(status_filter)
+
+        if before:
+            before_date, before_code = before
+            query += " AND (o.order_date < %s OR (o.order_date = %s AND o.unique_order_code < %s))"
+            params.extend([before_date, before_date, before_code])
             
-        query += " ORDER BY o.order_date DESC"
+        # One extra row tells whether another page exists
+        query += " ORDER BY o.order_date DESC, o.unique_order_code DESC LIMIT %s"
+        params.append(per_page + 1)
         
         orders = self.db.fetch_all(query, tuple(params))
         
         if not orders:
-            return []
-            
+            return [], None
+
+        next_cursor = None
+        if len(orders) > per_page:
+            orders = orders[:per_page]
+            next_cursor = (orders[-1]['order_date'], orders[-1]['unique_order_code'])
+
+        # Bulk ticket fetch for the whole page, grouped in Python
+        codes = [order['unique_order_code'] for order in orders]
+        placeholders = ','.join(['%s'] * len(codes))
+        q_tickets = f"""
+            SELECT unique_order_code, `row_number`, `column_number`, `class`
+            FROM order_lines
+            WHERE unique_order_code IN ({placeholders})
+            ORDER BY unique_order_code, `row_number`, `column_number`
+        """
+        tickets_by_order = {}
+        for ticket in self.db.fetch_all(q_tickets, tuple(codes)):
+            code = ticket.pop('unique_order_code')
+            tickets_by_order.setdefault(code, []).append(ticket)
+
         for order in orders:
-            q_tickets = """
-                SELECT row_number, column_number, class
-                FROM order_lines
-                WHERE unique_order_code = %s
-                ORDER BY row_number, column_number
-            """
-            tickets = self.db.fetch_all(q_tickets, (order['unique_order_code'],))
-            order['tickets'] = tickets
+            order['tickets'] = tickets_by_order.get(order['unique_order_code'], [])
             
-        return orders
+        return orders, next_cursor
 
     # =================================================================
     # Part C: Cancellation Logic
@@ -203,7 +369,13 @@ class OrderDAO:
         refund_amount = total_price - fine
 
         # 5. Update Database
-        query_update = "UPDATE orders SET order_status = 'customer_cancelled', total_price = %s WHERE unique_order_code = %s"
+        # Cancels the order and releases its seats for resale in one statement
+        query_update = """
+            UPDATE orders o
+            LEFT JOIN order_lines ol ON ol.unique_order_code = o.unique_order_code
+            SET o.order_status = 'customer_cancelled', o.total_price = %s, ol.is_active = NULL
+            WHERE o.unique_order_code = %s
+        """
         try:
             rounded_fine = round(fine, 2)
             res = self.db.execute_query(query_update, (rounded_fine, order_id_str))
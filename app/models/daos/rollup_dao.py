@@ -0,0 +1,345 @@
+"""
+File: rollup_dao.py
+Purpose: Data Access Object for Report Rollups (Incremental refresh from a watermark).
+"""
+from datetime import timedelta
+
+class RollupDAO:
+    """
+    Maintains the rollup_* tables read by StatisticsDAO.
+    Partitions are flight days (flights, aircraft, employees, series) and order months. Only days
+    before live_date (the day of the last refresh) are rolled up: from live_date on, including
+    future flights and days since a missed refresh, the reports query the source tables.
+    A refresh recomputes the closed days touched since the stored watermark (updates via updated_at,
+    deletes via rollup_tombstones), each chunk replaced in one transaction so readers never see
+    a partition half rebuilt.
+    """
+    WATERMARK = 'reports'
+    LOCK_NAME = 'flytau_report_rollups'
+
+    # Day-partitioned rollup table -> its date column
+    DAY_TABLES = {
+        'rollup_flights': 'flight_date',
+        'rollup_aircraft_daily': 'stat_date',
+        'rollup_employee_daily': 'stat_date',
+        'rollup_series_daily': 'stat_date'
+    }
+
+    # Same predicate as the live reports (kept identical so both sides add up)
+    ORDER_FILTER = "o.order_status != 'Cancelled'"
+
+    # Daily series buckets for the flights matching {flight_filter} (a predicate on flights f).
+    # Shared by the rollup insert and the live-day query, so both produce identical buckets.
+    SERIES_SELECT = """
+        WITH fl AS (
+            SELECT f.flight_id, f.departure_time, f.route_id, f.aircraft_id, f.economy_price, f.business_price
+            FROM flights f
+            WHERE {flight_filter}
+            AND f.flight_status NOT IN ('Cancelled', 'System Cancelled')
+        )
+        SELECT
+            DATE(fl.departure_time) AS stat_date,
+            fl.route_id,
+            COALESCE(fl.aircraft_id, 0) AS aircraft_id,
+            cls.class,
+            COUNT(*) AS flights,
+            COALESCE(SUM(sold.bookings), 0) AS bookings,
+            COALESCE(SUM(sold.seats), 0) AS seats_sold,
+            SUM(CASE WHEN cls.class = 'Economy' THEN COALESCE(cap.economy_seats, 0)
+                     ELSE COALESCE(cap.business_seats, 0) END) AS capacity,
+            COALESCE(SUM(sold.seats * CASE WHEN cls.class = 'Economy' THEN fl.economy_price
+                                           ELSE fl.business_price END), 0) AS revenue
+        FROM fl
+        CROSS JOIN (SELECT 'Economy' AS class UNION ALL SELECT 'Business') cls
+        LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = fl.aircraft_id
+        LEFT JOIN (
+            SELECT ol.flight_id, ol.class, COUNT(*) AS seats, COUNT(DISTINCT ol.unique_order_code) AS bookings
+            FROM fl
+            JOIN order_lines ol ON ol.flight_id = fl.flight_id
+            JOIN orders o ON ol.unique_order_code = o.unique_order_code
+            WHERE {order_filter}
+            GROUP BY ol.flight_id, ol.class
+        ) sold ON sold.flight_id = fl.flight_id AND sold.class = cls.class
+        GROUP BY DATE(fl.departure_time), fl.route_id, COALESCE(fl.aircraft_id, 0), cls.class
+        HAVING SUM(CASE WHEN cls.class = 'Economy' THEN COALESCE(cap.economy_seats, 0)
+                        ELSE COALESCE(cap.business_seats, 0) END) > 0
+            OR COALESCE(SUM(sold.seats), 0) > 0
+    """
+
+    @classmethod
+    def series_select(cls, flight_filter):
+        """SERIES_SELECT for a flight predicate (its placeholders are the query's only parameters)."""
+        return cls.SERIES_SELECT.format(flight_filter=flight_filter, order_filter=cls.ORDER_FILTER)
+
+    @staticmethod
+    def day_ranges(column, days):
+        """
+        (predicate, params) matching a DATETIME column on the given days as half-open ranges, one per
+        run of consecutive days. Unlike DATE(column) IN (...) this is a range scan on the column's index.
+        """
+        runs = []
+        for day in sorted(days):
+            if runs and runs[-1][1] == day:
+                runs[-1][1] = day + timedelta(days=1)
+            else:
+                runs.append([day, day + timedelta(days=1)])
+        predicate = ' OR '.join(f"({column} >= %s AND {column} < %s)" for _ in runs)
+        return f"({predicate})", tuple(bound for run in runs for bound in run)
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def refresh(self, full=False, chunk_days=31):
+        """
+        Brings the rollups up to date. full=True (or a first run) recomputes every closed day and month,
+        chunk by chunk without emptying the tables first; partitions that no longer exist are removed last.
+        The watermark only moves at the end, so an interrupted run is simply redone. Returns a summary dict.
+        """
+        conn = self.db.get_connection()
+        if not conn:
+            return {"status": "error", "message": "Database connection failed"}
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            # One refresher at a time (cron overlap, several app servers)
+            cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (self.LOCK_NAME,))
+            if not cursor.fetchone()['acquired']:
+                return {"status": "error", "message": "Another rollup refresh is running."}
+
+            try:
+                cursor.execute("SELECT NOW() AS now, CURDATE() AS today")
+                clock = cursor.fetchone()
+                new_watermark, live_date = clock['now'], clock['today']
+                live_month = live_date.strftime('%Y-%m')
+
+                cursor.execute("SELECT watermark, live_date FROM rollup_watermarks WHERE name = %s", (self.WATERMARK,))
+                state = cursor.fetchone()
+                if not state:
+                    raise RuntimeError("rollup_watermarks is missing its row (apply migrations)")
+                full = full or state['watermark'] is None
+
+                if full:
+                    days, months = self._all_partitions(cursor)
+                else:
+                    days, months = self._touched_partitions(cursor, state['watermark'])
+                    # Every day closed since the last refresh (several if runs were missed)
+                    day = state['live_date'] or live_date
+                    while day < live_date:
+                        days.add(day)
+                        months.add(day.strftime('%Y-%m'))
+                        day += timedelta(days=1)
+
+                days = {day for day in days if day < live_date}
+                months = {month for month in months if month <= live_month}
+                months.add(live_month)  # Its orders before today may have changed
+
+                # Rows from live_date on are never read; drop any left from earlier refreshes
+                for table, column in self.DAY_TABLES.items():
+                    cursor.execute(f"DELETE FROM {table} WHERE {column} >= %s", (live_date,))
+                cursor.execute("DELETE FROM rollup_order_months WHERE month > %s", (live_month,))
+                conn.commit()
+
+                ordered_days = sorted(days)
+                for i in range(0, len(ordered_days), chunk_days):
+                    chunk = ordered_days[i:i + chunk_days]
+                    self._delete_days(cursor, chunk)
+                    self._insert_days(cursor, chunk)
+                    conn.commit()
+
+                for month in sorted(months):
+                    self._replace_month(cursor, month, live_date)
+                    conn.commit()
+
+                if full:
+                    self._delete_stale_partitions(cursor, days, months, live_date)
+                    conn.commit()
+
+                # Tombstones before the previous watermark have been processed by this run or an earlier one
+                cursor.execute("DELETE FROM rollup_tombstones WHERE deleted_at < %s",
+                               (state['watermark'] or new_watermark,))
+                cursor.execute("""
+                    UPDATE rollup_watermarks
+                    SET watermark = %s, live_date = %s, refreshed_at = NOW()
+                    WHERE name = %s
+                """, (new_watermark, live_date, self.WATERMARK))
+                conn.commit()
+
+                return {
+                    "status": "success",
+                    "full": full,
+                    "days_refreshed": len(ordered_days),
+                    "months_refreshed": len(months),
+                    "watermark": new_watermark,
+                    "live_date": live_date
+                }
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s) AS released", (self.LOCK_NAME,))
+                cursor.fetchone()
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _all_partitions(self, cursor):
+        """Every flight day and order month (full rebuild)."""
+        cursor.execute("SELECT DISTINCT DATE(departure_time) AS day FROM flights")
+        days = {row['day'] for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT DISTINCT DATE_FORMAT(order_date, '%Y-%m') AS month
+            FROM orders WHERE order_date IS NOT NULL
+        """)
+        months = {row['month'] for row in cursor.fetchall()}
+        return days, months
+
+    def _touched_partitions(self, cursor, watermark):
+        """
+        Flight days and order months changed at or after the watermark: rows updated since (updated_at
+        indexes), the previous day of rescheduled flights (still in rollup_flights) and deleted rows
+        (rollup_tombstones, filled by triggers).
+        """
+        cursor.execute("""
+            SELECT DATE(departure_time) AS day FROM flights WHERE updated_at >= %s
+            UNION
+            SELECT rf.flight_date FROM flights f
+            JOIN rollup_flights rf ON rf.flight_id = f.flight_id
+            WHERE f.updated_at >= %s
+            UNION
+            SELECT DATE(f.departure_time) FROM orders o
+            JOIN flights f ON o.flight_id = f.flight_id
+            WHERE o.updated_at >= %s
+            UNION
+            SELECT DATE(f.departure_time) FROM crew_assignments ca
+            JOIN flights f ON ca.flight_id = f.flight_id
+            WHERE ca.updated_at >= %s
+            UNION
+            SELECT stat_date FROM rollup_tombstones
+            WHERE deleted_at >= %s AND stat_date IS NOT NULL
+        """, (watermark,) * 5)
+        days = {row['day'] for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT DATE_FORMAT(order_date, '%%Y-%%m') AS month
+            FROM orders WHERE updated_at >= %s AND order_date IS NOT NULL
+            UNION
+            SELECT order_month FROM rollup_tombstones
+            WHERE deleted_at >= %s AND order_month IS NOT NULL
+        """, (watermark, watermark))
+        months = {row['month'] for row in cursor.fetchall()}
+        return days, months
+
+    def _delete_stale_partitions(self, cursor, days, months, live_date, batch=500):
+        """Removes closed days and months that no longer have flights/orders (full rebuild)."""
+        for table, column in self.DAY_TABLES.items():
+            cursor.execute(f"SELECT DISTINCT {column} AS day FROM {table} WHERE {column} < %s", (live_date,))
+            stale = [row['day'] for row in cursor.fetchall() if row['day'] not in days]
+            for i in range(0, len(stale), batch):
+                chunk = stale[i:i + batch]
+                cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({','.join(['%s'] * len(chunk))})", tuple(chunk))
+
+        cursor.execute("SELECT month FROM rollup_order_months")
+        for row in cursor.fetchall():
+            if row['month'] not in months:
+                cursor.execute("DELETE FROM rollup_order_months WHERE month = %s", (row['month'],))
+
+    def _delete_days(self, cursor, days):
+        """Removes the day partitions from every day-partitioned rollup (caller commits with the insert)."""
+        placeholders = ','.join(['%s'] * len(days))
+        for table, column in self.DAY_TABLES.items():
+            cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", tuple(days))
+
+        # A flight rescheduled onto these days may still have its row under its previous day
+        departures, params = self.day_ranges('f.departure_time', days)
+        cursor.execute(f"""
+            DELETE rf FROM rollup_flights rf
+            JOIN flights f ON f.flight_id = rf.flight_id
+            WHERE {departures}
+        """, params)
+
+    def _insert_days(self, cursor, days):
+        """
+        Recomputes the day partitions: flights from the source tables, then aircraft/employee days
+        from rollup_flights, then the series buckets.
+        """
+        placeholders = ','.join(['%s'] * len(days))
+        params = tuple(days)
+        departures, departure_params = self.day_ranges('f.departure_time', days)
+        sold_departures, _ = self.day_ranges('fs.departure_time', days)
+
+        # Order lines are aggregated per flight before joining (no join-then-group over flights)
+        cursor.execute(f"""
+            INSERT INTO rollup_flights
+                (flight_id, flight_date, departure_time, aircraft_id, route_id, flight_status, flight_hours,
+                 capacity, seats_sold, economy_sold, business_sold, economy_revenue, business_revenue)
+            SELECT
+                f.flight_id, DATE(f.departure_time), f.departure_time, f.aircraft_id, f.route_id, f.flight_status,
+                TIME_TO_SEC(r.flight_duration) / 3600,
+                cap.total_seats,
+                COALESCE(sold.seats_sold, 0),
+                COALESCE(sold.economy_sold, 0),
+                COALESCE(sold.business_sold, 0),
+                COALESCE(sold.economy_revenue, 0),
+                COALESCE(sold.business_revenue, 0)
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            LEFT JOIN (
+                SELECT
+                    ol.flight_id,
+                    COUNT(*) AS seats_sold,
+                    SUM(ol.class = 'Economy') AS economy_sold,
+                    SUM(ol.class = 'Business') AS business_sold,
+                    SUM(CASE WHEN ol.class = 'Economy' THEN fs.economy_price ELSE 0 END) AS economy_revenue,
+                    SUM(CASE WHEN ol.class = 'Business' THEN fs.business_price ELSE 0 END) AS business_revenue
+                FROM order_lines ol
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                JOIN flights fs ON ol.flight_id = fs.flight_id
+                WHERE {self.ORDER_FILTER}
+                AND {sold_departures}
+                GROUP BY ol.flight_id
+            ) sold ON sold.flight_id = f.flight_id
+            WHERE {departures}
+        """, departure_params * 2)
+
+        cursor.execute(f"""
+            INSERT INTO rollup_aircraft_daily (stat_date, aircraft_id, route_id, landed_flights, flight_hours)
+            SELECT flight_date, aircraft_id, route_id, COUNT(*), SUM(flight_hours)
+            FROM rollup_flights
+            WHERE flight_status = 'Landed' AND aircraft_id IS NOT NULL
+            AND flight_date IN ({placeholders})
+            GROUP BY flight_date, aircraft_id, route_id
+        """, params)
+
+        cursor.execute(f"""
+            INSERT INTO rollup_employee_daily (stat_date, employee_id, short_hours, long_hours)
+            SELECT
+                rf.flight_date, ca.employee_id,
+                SUM(CASE WHEN rf.flight_hours <= 6 THEN rf.flight_hours ELSE 0 END),
+                SUM(CASE WHEN rf.flight_hours > 6 THEN rf.flight_hours ELSE 0 END)
+            FROM crew_assignments ca
+            JOIN rollup_flights rf ON ca.flight_id = rf.flight_id
+            WHERE rf.flight_status = 'Landed'
+            AND rf.flight_date IN ({placeholders})
+            GROUP BY rf.flight_date, ca.employee_id
+        """, params)
+
+        cursor.execute(f"""
+            INSERT INTO rollup_series_daily
+                (stat_date, route_id, aircraft_id, class, flights, bookings, seats_sold, capacity, revenue)
+            {self.series_select(departures)}
+        """, departure_params)
+
+    def _replace_month(self, cursor, month, live_date):
+        """Recomputes one order month, leaving out orders placed from the live day on."""
+        year, mon = (int(part) for part in month.split('-'))
+        month_start = live_date.replace(year=year, month=mon, day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1)
+
+        cursor.execute("DELETE FROM rollup_order_months WHERE month = %s", (month,))
+        cursor.execute("""
+            INSERT INTO rollup_order_months (month, orders_count, cancelled_count)
+            SELECT %s, COUNT(*), COALESCE(SUM(LOWER(order_status) = 'customer_cancelled'), 0)
+            FROM orders
+            WHERE order_date >= %s AND order_date < %s
+            HAVING COUNT(*) > 0
+        """, (month, month_start, min(month_end, live_date)))
@@ -0,0 +1,68 @@
+"""
+File: roster_job_dao.py
+Purpose: Data Access Object for Roster Jobs (State shared between app workers and the job process).
+"""
+import json
+
+class RosterJobDAO:
+    """
+    Persists background roster jobs in roster_jobs. The result summary is stored as JSON.
+    """
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def create_job(self, job_id, date_from, date_to):
+        """Inserts a queued job; returns True on success."""
+        query = """
+            INSERT INTO roster_jobs (job_id, status, date_from, date_to, started_at, heartbeat_at)
+            VALUES (%s, 'queued', %s, %s, NOW(), NOW())
+        """
+        return self.db.execute_query(query, (job_id, date_from, date_to)) is not None
+
+    def get_active_job(self, stall_after):
+        """Returns the latest queued or running job with a heartbeat in the last stall_after seconds, or None."""
+        return self.db.fetch_one("""
+            SELECT job_id, status, date_from, date_to
+            FROM roster_jobs
+            WHERE status IN ('queued', 'running')
+            AND heartbeat_at >= NOW() - INTERVAL %s SECOND
+            ORDER BY started_at DESC
+            LIMIT 1
+        """, (stall_after,))
+
+    def get_job(self, job_id):
+        """Returns the job row (result decoded, plus heartbeat age in seconds), or None."""
+        job = self.db.fetch_one("""
+            SELECT job_id, status, date_from, date_to, processed, total, result, error,
+                   started_at, finished_at, TIMESTAMPDIFF(SECOND, heartbeat_at, NOW()) AS heartbeat_age
+            FROM roster_jobs
+            WHERE job_id = %s
+        """, (job_id,))
+        if job and job['result']:
+            job['result'] = json.loads(job['result'])
+        return job
+
+    def mark_running(self, job_id):
+        """Moves a queued job to running; returns False if it was not queued (already picked up)."""
+        query = """
+            UPDATE roster_jobs SET status = 'running', heartbeat_at = NOW()
+            WHERE job_id = %s AND status = 'queued'
+        """
+        return bool(self.db.execute_query(query, (job_id,)))
+
+    def update_progress(self, job_id, processed, total):
+        """Records progress (and refreshes the heartbeat)."""
+        query = """
+            UPDATE roster_jobs SET processed = %s, total = %s, heartbeat_at = NOW()
+            WHERE job_id = %s
+        """
+        return self.db.execute_query(query, (processed, total, job_id))
+
+    def finish_job(self, job_id, status, result=None, error=None):
+        """Stores the final status with the result summary or error message."""
+        query = """
+            UPDATE roster_jobs
+            SET status = %s, result = %s, error = %s, finished_at = NOW(), heartbeat_at = NOW()
+            WHERE job_id = %s
+        """
+        return self.db.execute_query(query, (status, json.dumps(result) if result is not None else None, error, job_id))
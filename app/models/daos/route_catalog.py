@@ -0,0 +1,79 @@
+"""
+File: route_catalog.py
+Purpose: Process-wide cache of the route network (route lookup by airport pair, location list).
+"""
+import threading
+from datetime import datetime, timedelta
+
+class RouteCatalog:
+    """
+    Loads the routes table once and serves lookups from memory. Routes are reference data
+    without a write path in the application, so the refresh interval alone bounds staleness.
+    """
+    REFRESH_INTERVAL = timedelta(minutes=10)
+
+    # Shared across instances (same idea as AircraftLayouts)
+    _routes = None  # {(origin, destination): route}
+    _locations = None
+    _built_at = None
+    _lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the cache so the next lookup reloads it."""
+        with cls._lock:
+            cls._routes = None
+            cls._locations = None
+            cls._built_at = None
+
+    def _ensure_loaded(self):
+        """Reloads the route map if invalidated or older than REFRESH_INTERVAL."""
+        cls = type(self)
+        routes = cls._routes
+        if routes is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+            return routes
+
+        with cls._lock:
+            if cls._routes is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+                return cls._routes
+
+            rows = self.db.fetch_all(
+                "SELECT route_id, origin_airport, destination_airport, flight_duration, route_type FROM routes"
+            )
+            if not rows:
+                # Empty network or failed query (fetch_all returns []): retry next time
+                return {}
+
+            routes = {}
+            for route in rows:
+                duration = route['flight_duration']
+                if isinstance(duration, str):
+                    t = datetime.strptime(duration, "%H:%M:%S")
+                    route['flight_duration'] = timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+                routes[(route['origin_airport'], route['destination_airport'])] = route
+
+            cls._locations = sorted({airport for pair in routes for airport in pair})
+            cls._routes = routes
+            cls._built_at = datetime.now()
+            return routes
+
+    def get(self, origin, destination):
+        """Returns a copy of the route between two airports, or None."""
+        route = self._ensure_loaded().get((origin, destination))
+        return dict(route) if route else None
+
+    def route_map(self):
+        """{(origin, destination): route} for the whole network (copies, safe to modify)."""
+        return {pair: dict(route) for pair, route in self._ensure_loaded().items()}
+
+    def route_ids(self):
+        """Set of every route_id in the network."""
+        return {route['route_id'] for route in self._ensure_loaded().values()}
+
+    def locations(self):
+        """Sorted list of every airport that has a route."""
+        self._ensure_loaded()
+        return list(type(self)._locations or [])
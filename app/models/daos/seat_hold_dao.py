@@ -0,0 +1,110 @@
+"""
+File: seat_hold_dao.py
+Purpose: Data Access Object for Seat Holds (Placement, Release, Expiry sweep).
+"""
+import threading
+from datetime import datetime, timedelta
+
+class SeatHoldDAO:
+    """
+    Short-TTL seat reservations keyed by a per-draft hold token.
+    Expired holds are ignored by every read, so sweeping is only housekeeping.
+    """
+    SWEEP_BATCH = 500
+    SWEEP_INTERVAL = timedelta(seconds=30)
+
+    # Process-wide sweep throttle
+    _last_sweep = None
+    _sweep_lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.db = db_manager
+
+    def place_holds(self, flight_id, seats, hold_token, ttl):
+        """
+        Holds (row, column) seats for a token until now + ttl, replacing the token's previous holds.
+        The expiry is taken from the database clock, the one every expiry check compares with (NOW()).
+        All-or-nothing: if any seat is sold or held by someone else, nothing is held and
+        the unavailable seats are returned in 'lost_seats'.
+        """
+        self.sweep_expired()
+
+        conn = self.db.get_connection()
+        if not conn:
+            return {"status": "error", "message": "Database connection failed"}
+
+        seats = sorted(set(seats))
+        seat_filter = ' OR '.join(["(`row_number` = %s AND `column_number` = %s)"] * len(seats))
+        seat_params = tuple(v for seat in seats for v in seat)
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT NOW() + INTERVAL %s SECOND", (int(ttl.total_seconds()),))
+            expires_at = cursor.fetchone()[0]
+
+            # 1. Drop this token's old holds and any expired hold on the requested seats
+            cursor.execute("DELETE FROM seat_holds WHERE hold_token = %s", (hold_token,))
+            cursor.execute(f"""
+                DELETE FROM seat_holds
+                WHERE flight_id = %s AND expires_at < NOW() AND ({seat_filter})
+            """, (flight_id, *seat_params))
+
+            # 2. Claim; a seat held by another live token is skipped
+            values = ','.join(["(%s, %s, %s, %s, %s)"] * len(seats))
+            cursor.execute(f"""
+                INSERT IGNORE INTO seat_holds (flight_id, `row_number`, `column_number`, hold_token, expires_at)
+                VALUES {values}
+            """, tuple(v for row, col in seats for v in (flight_id, row, col, hold_token, expires_at)))
+            held = cursor.rowcount
+
+            # 3. Seats sold since the seat map was rendered
+            cursor.execute(f"""
+                SELECT `row_number`, `column_number` FROM order_lines
+                WHERE flight_id = %s AND is_active = 1 AND ({seat_filter})
+            """, (flight_id, *seat_params))
+            sold = set(cursor.fetchall())
+
+            if held < len(seats) or sold:
+                cursor.execute("SELECT `row_number`, `column_number` FROM seat_holds WHERE hold_token = %s", (hold_token,))
+                mine = set(cursor.fetchall())
+                conn.rollback()
+                lost = [f"{row}-{col}" for row, col in seats if (row, col) not in mine or (row, col) in sold]
+                return {"status": "error", "message": "Some seats are no longer available.", "lost_seats": lost}
+
+            conn.commit()
+            return {"status": "success", "hold_token": hold_token, "expires_at": expires_at}
+        except Exception as e:
+            conn.rollback()
+            return {"status": "error", "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def release_holds(self, hold_token):
+        """Releases every seat held by a token (abandoned or replaced draft)."""
+        return self.db.execute_query("DELETE FROM seat_holds WHERE hold_token = %s", (hold_token,))
+
+    def sweep_expired(self, force=False):
+        """
+        Deletes expired holds oldest-first in bounded batches via the expires_at index.
+        Throttled to once per SWEEP_INTERVAL per process unless forced. Returns rows removed.
+        """
+        cls = type(self)
+        with cls._sweep_lock:
+            now = datetime.now()
+            if not force and cls._last_sweep and now - cls._last_sweep < cls.SWEEP_INTERVAL:
+                return 0
+            cls._last_sweep = now
+
+        removed = 0
+        while True:
+            res = self.db.execute_query(
+                "DELETE FROM seat_holds WHERE expires_at < NOW() ORDER BY expires_at LIMIT %s",
+                (self.SWEEP_BATCH,)
+            )
+            if not res:
+                break
+            removed += res
+            if res < self.SWEEP_BATCH:
+                break
+        return removed
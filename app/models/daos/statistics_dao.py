@@ -2,149 +2,500 @@
 File: statistics_dao.py
 Purpose: Data Access Object for Admin Dashboard Analytics (Occupancy, Revenue, Staff Hours).
 """
+from datetime import date, datetime, timedelta
+from app.models.daos.rollup_dao import RollupDAO
 
 class StatisticsDAO:
     """
     Aggregates database metrics to power charts and KPIs for the admin dashboard.
+    Days before the last refresh's live_date are read from the rollup_* tables (see RollupDAO);
+    everything from live_date on (today, future flights, days since a missed refresh) is
+    aggregated from the source tables. Closed days are as current as the last refresh.
     """
+    # Before the first refresh everything is live
+    ALL_TIME = (date(1000, 1, 1), date(9999, 12, 31))
+
+    # Report granularity -> DATE_FORMAT pattern (%% because queries are parameterized)
+    GRANULARITIES = {'day': '%%Y-%%m-%%d', 'week': '%%x-W%%v', 'month': '%%Y-%%m'}
+    ACTIVITY_DAYS = 30
+
+    # Time-series resolution -> first day of the bucket a DATE falls in ({d})
+    RESOLUTIONS = {
+        'day': "{d}",
+        'week': "{d} - INTERVAL WEEKDAY({d}) DAY",
+        'month': "{d} - INTERVAL DAYOFMONTH({d}) - 1 DAY",
+        'quarter': "MAKEDATE(YEAR({d}), 1) + INTERVAL QUARTER({d}) - 1 QUARTER",
+        'year': "MAKEDATE(YEAR({d}), 1)"
+    }
+    # Series split -> label expression over the buckets (b) and routes (r)
+    SERIES_SPLITS = {
+        'route': "CONCAT(r.origin_airport, '-', r.destination_airport)",
+        'aircraft': "IF(b.aircraft_id = 0, 'Unassigned', CONCAT('Plane ', b.aircraft_id))",
+        'class': "b.class"
+    }
 
     def __init__(self, db_manager):
         self.db = db_manager
 
-    def get_avg_fleet_occupancy(self):
-        """Calculates the average seat occupancy percentage for all landed flights."""
-        query = """
-            SELECT AVG(occupancy_rate) as avg_occupancy FROM (
-                SELECT 
-                    f.flight_id, 
-                    (COUNT(ol.unique_order_code) * 100.0 / (
-                        SELECT SUM((ac.row_end - ac.row_start + 1) * CHAR_LENGTH(ac.columns))
-                        FROM aircraft_classes ac
-                        WHERE ac.aircraft_id = f.aircraft_id
-                    )) as occupancy_rate
-                FROM flights f 
-                LEFT JOIN order_lines ol ON f.flight_id = ol.flight_id
-                LEFT JOIN orders o ON ol.unique_order_code = o.unique_order_code
-                WHERE f.flight_status = 'Landed' 
-                AND (o.order_status != 'Cancelled' OR o.order_status IS NULL)
-                GROUP BY f.flight_id
-            ) subquery
-        """
-        result = self.db.fetch_one(query)
-        val = result['avg_occupancy'] if result else 0
-        return round(float(val), 1) if val else 0
-
-    def get_recent_flights_occupancy(self, limit=5):
-        """Retrieves occupancy rates for the last N landed flights."""
+    def _live_window(self):
+        """Returns (live_from, live_to): the days the rollups leave to live queries, read from the watermark row."""
+        row = self.db.fetch_one(
+            "SELECT live_date FROM rollup_watermarks WHERE name = %s", (RollupDAO.WATERMARK,)
+        )
+        if row and row['live_date']:
+            return row['live_date'], self.ALL_TIME[1]
+        return self.ALL_TIME
+
+    def _windows(self, date_from=None, date_to=None):
+        """
+        Splits the requested [date_from, date_to) (open ends: ALL_TIME) into
+        (range_from, range_to, live_from, live_to), where the live part is the live window clipped to the range.
+        Rollup rows are read for range days outside [live_from, live_to), which stays correct when the clip is empty.
+        """
+        range_from, range_to = date_from or self.ALL_TIME[0], date_to or self.ALL_TIME[1]
+        live_from, live_to = self._live_window()
+        return range_from, range_to, max(range_from, live_from), min(range_to, live_to)
+
+    def _period(self, column, granularity):
+        """SQL label of the day/week/month a date column falls in (ISO weeks, e.g. 2026-W07)."""
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        return f"DATE_FORMAT({column}, '{self.GRANULARITIES[granularity]}')"
+
+    def _period_label(self, value, granularity):
+        """Python twin of _period, for rows bucketed after the query."""
+        if granularity == 'day':
+            return value.strftime('%Y-%m-%d')
+        if granularity == 'week':
+            year, week, _ = value.isocalendar()
+            return f"{year}-W{week:02d}"
+        return value.strftime('%Y-%m')
+
+    def _period_bounds(self, label, granularity):
+        """[start, end) dates of a period label."""
+        if granularity == 'day':
+            start = datetime.strptime(label, '%Y-%m-%d').date()
+            return start, start + timedelta(days=1)
+        if granularity == 'week':
+            start = datetime.strptime(f"{label}-1", '%G-W%V-%u').date()
+            return start, start + timedelta(days=7)
+        start = datetime.strptime(label, '%Y-%m').date()
+        return start, (start + timedelta(days=32)).replace(day=1)
+
+    def _landed_occupancy(self, live_from, live_to, limit=None):
+        """
+        Occupancy of landed flights departing in [live_from, live_to) (newest first when limited).
+        Sold seats are aggregated per flight before the join; capacity comes from aircraft_capacity.
+        occupancy_rate is NULL for aircraft without a cabin configuration.
+        """
         query = """
-            SELECT 
+            SELECT
                 f.flight_id,
-                r.origin_airport, 
+                r.origin_airport,
                 r.destination_airport,
                 f.departure_time,
-                ROUND(
-                    (COUNT(ol.unique_order_code) * 100.0 / (
-                        SELECT SUM((ac.row_end - ac.row_start + 1) * CHAR_LENGTH(ac.columns))
-                        FROM aircraft_classes ac
-                        WHERE ac.aircraft_id = f.aircraft_id
-                    )),
-                    2
-                ) as occupancy_rate
+                COALESCE(sold.sold_seats, 0) * 100.0 / cap.total_seats as occupancy_rate
             FROM flights f
             JOIN routes r ON f.route_id = r.route_id
-            LEFT JOIN order_lines ol ON f.flight_id = ol.flight_id
-            LEFT JOIN orders o ON ol.unique_order_code = o.unique_order_code
+            LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            LEFT JOIN (
+                SELECT ol.flight_id, COUNT(*) as sold_seats
+                FROM order_lines ol
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                JOIN flights fs ON ol.flight_id = fs.flight_id
+                WHERE o.order_status != 'Cancelled'
+                AND fs.flight_status = 'Landed'
+                AND fs.departure_time >= %s AND fs.departure_time < %s
+                GROUP BY ol.flight_id
+            ) sold ON sold.flight_id = f.flight_id
             WHERE f.flight_status = 'Landed'
-            AND (o.order_status != 'Cancelled' OR o.order_status IS NULL)
-            GROUP BY f.flight_id
-            ORDER BY f.departure_time DESC
-            LIMIT %s
+            AND f.departure_time >= %s AND f.departure_time < %s
+        """
+        params = [live_from, live_to, live_from, live_to]
+        if limit:
+            query += " ORDER BY f.departure_time DESC LIMIT %s"
+            params.append(limit)
+        return self.db.fetch_all(query, tuple(params))
+
+    def get_avg_fleet_occupancy(self, date_from=None, date_to=None, granularity=None):
+        """
+        Average seat occupancy percentage of landed flights departing in [date_from, date_to).
+        With a granularity, returns [{<granularity>, avg_occupancy, flights}] per period instead.
         """
-        return self.db.fetch_all(query, (limit,))
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+        period = self._period('departure_time', granularity) if granularity else "'all'"
 
-    def get_revenue_by_manufacturer(self):
-        """Calculates total revenue grouped by Aircraft Manufacturer and Cabin Class."""
+        rolled = self.db.fetch_all(f"""
+            SELECT {period} as period, SUM(seats_sold * 100.0 / capacity) as rate_sum, COUNT(*) as flights
+            FROM rollup_flights
+            WHERE flight_status = 'Landed' AND capacity > 0
+            AND departure_time >= %s AND departure_time < %s
+            AND (flight_date < %s OR flight_date >= %s)
+            GROUP BY period
+        """, (range_from, range_to, live_from, live_to))
+
+        totals = {row['period']: [float(row['rate_sum']), row['flights']] for row in rolled}
+        for row in self._landed_occupancy(live_from, live_to):
+            if row['occupancy_rate'] is None:
+                continue
+            bucket = totals.setdefault(self._period_label(row['departure_time'], granularity) if granularity else 'all', [0.0, 0])
+            bucket[0] += float(row['occupancy_rate'])
+            bucket[1] += 1
+
+        if not granularity:
+            rate_sum, flights = totals.get('all', (0.0, 0))
+            return round(rate_sum / flights, 1) if flights else 0
+        return [
+            {granularity: label, 'avg_occupancy': round(rate_sum / flights, 1), 'flights': flights}
+            for label, (rate_sum, flights) in sorted(totals.items())
+        ]
+
+    def get_recent_flights_occupancy(self, limit=5, date_from=None, date_to=None):
+        """Retrieves occupancy rates for the last N landed flights departing in [date_from, date_to)."""
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+
+        flights = self._landed_occupancy(live_from, live_to, limit)
+        for flight in flights:
+            if flight['occupancy_rate'] is not None:
+                flight['occupancy_rate'] = round(float(flight['occupancy_rate']), 2)
+
+        # (flight_status, departure_time) index: range scan read backwards, stops after LIMIT rows
+        flights += self.db.fetch_all("""
+            SELECT
+                rf.flight_id,
+                r.origin_airport,
+                r.destination_airport,
+                rf.departure_time,
+                ROUND(rf.seats_sold * 100.0 / rf.capacity, 2) as occupancy_rate
+            FROM rollup_flights rf
+            JOIN routes r ON rf.route_id = r.route_id
+            WHERE rf.flight_status = 'Landed'
+            AND rf.departure_time >= %s AND rf.departure_time < %s
+            AND (rf.flight_date < %s OR rf.flight_date >= %s)
+            ORDER BY rf.departure_time DESC
+            LIMIT %s
+        """, (range_from, range_to) + (live_from, live_to) + (limit,))
+
+        flights.sort(key=lambda f: f['departure_time'], reverse=True)
+        return flights[:limit]
+
+    OCCUPANCY_EXPORT_COLUMNS = (
+        'flight_id', 'origin_airport', 'destination_airport', 'departure_time',
+        'seats_sold', 'capacity', 'occupancy_rate'
+    )
+
+    def stream_flight_occupancy(self, date_from=None, date_to=None, batch_size=10000):
+        """
+        Yields batches of per-flight occupancy tuples (OCCUPANCY_EXPORT_COLUMNS) for landed flights
+        departing in [date_from, date_to): rollup rows for closed days, live rows from the live date on.
+        """
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
         query = """
-            SELECT 
-                CONCAT(a.size, ' / ', a.manufacturer, ' / ', ol.class) as label,
+            SELECT
+                rf.flight_id, r.origin_airport, r.destination_airport, rf.departure_time,
+                rf.seats_sold, rf.capacity, ROUND(rf.seats_sold * 100.0 / rf.capacity, 2)
+            FROM rollup_flights rf
+            JOIN routes r ON rf.route_id = r.route_id
+            WHERE rf.flight_status = 'Landed'
+            AND rf.departure_time >= %s AND rf.departure_time < %s
+            AND (rf.flight_date < %s OR rf.flight_date >= %s)
+            UNION ALL
+            SELECT
+                f.flight_id, r.origin_airport, r.destination_airport, f.departure_time,
+                COALESCE(sold.sold_seats, 0), cap.total_seats,
+                ROUND(COALESCE(sold.sold_seats, 0) * 100.0 / cap.total_seats, 2)
+            FROM flights f
+            JOIN routes r ON f.route_id = r.route_id
+            LEFT JOIN aircraft_capacity cap ON cap.aircraft_id = f.aircraft_id
+            LEFT JOIN (
+                SELECT ol.flight_id, COUNT(*) as sold_seats
+                FROM order_lines ol
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                JOIN flights fs ON ol.flight_id = fs.flight_id
+                WHERE o.order_status != 'Cancelled'
+                AND fs.flight_status = 'Landed'
+                AND fs.departure_time >= %s AND fs.departure_time < %s
+                GROUP BY ol.flight_id
+            ) sold ON sold.flight_id = f.flight_id
+            WHERE f.flight_status = 'Landed'
+            AND f.departure_time >= %s AND f.departure_time < %s
+        """
+        params = (range_from, range_to) + (live_from, live_to) * 3
+        return self.db.stream(query, params, batch_size)
+
+    def get_revenue_by_manufacturer(self, date_from=None, date_to=None, granularity=None):
+        """
+        Calculates total revenue grouped by Aircraft Manufacturer and Cabin Class, for flights
+        departing in [date_from, date_to). A granularity adds a leading period column.
+        """
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+        rolled_period = f"{self._period('flight_date', granularity)} AS period, " if granularity else ""
+        live_period = f"{self._period('f.departure_time', granularity)}, " if granularity else ""
+        period_column = f"rev.period AS `{granularity}`, " if granularity else ""
+        period_group = "rev.period, " if granularity else ""
+
+        query = f"""
+            SELECT
+                {period_column}
+                CONCAT(a.size, ' / ', a.manufacturer, ' / ', rev.class) as label,
                 a.manufacturer,
-                SUM(
-                    CASE 
-                        WHEN ol.class = 'Economy' THEN f.economy_price 
-                        WHEN ol.class = 'Business' THEN f.business_price 
-                        ELSE 0 
+                SUM(rev.revenue) AS total_revenue
+            FROM (
+                SELECT {rolled_period}aircraft_id, 'Economy' AS class, economy_revenue AS revenue
+                FROM rollup_flights
+                WHERE economy_sold > 0
+                AND flight_date >= %s AND flight_date < %s
+                AND (flight_date < %s OR flight_date >= %s)
+                UNION ALL
+                SELECT {rolled_period}aircraft_id, 'Business', business_revenue
+                FROM rollup_flights
+                WHERE business_sold > 0
+                AND flight_date >= %s AND flight_date < %s
+                AND (flight_date < %s OR flight_date >= %s)
+                UNION ALL
+                SELECT
+                    {live_period}
+                    f.aircraft_id,
+                    ol.class,
+                    CASE
+                        WHEN ol.class = 'Economy' THEN f.economy_price
+                        WHEN ol.class = 'Business' THEN f.business_price
+                        ELSE 0
                     END
-                ) AS total_revenue
-            FROM order_lines ol
-            JOIN orders o ON ol.unique_order_code = o.unique_order_code
-            JOIN flights f ON ol.flight_id = f.flight_id
-            JOIN aircraft a ON f.aircraft_id = a.aircraft_id
-            WHERE o.order_status != 'Cancelled'
-            GROUP BY a.size, a.manufacturer, ol.class
-            ORDER BY total_revenue DESC
-        """
-        return self.db.fetch_all(query)
-
-    def get_employee_flight_hours(self):
-        """Aggregates flight hours for crew members, split by Short/Long haul."""
-        query = """
-            SELECT 
+                FROM flights f
+                JOIN order_lines ol ON ol.flight_id = f.flight_id
+                JOIN orders o ON ol.unique_order_code = o.unique_order_code
+                WHERE o.order_status != 'Cancelled'
+                AND f.departure_time >= %s AND f.departure_time < %s
+            ) rev
+            JOIN aircraft a ON rev.aircraft_id = a.aircraft_id
+            GROUP BY {period_group}a.size, a.manufacturer, rev.class
+            ORDER BY {period_group}total_revenue DESC
+        """
+        params = (range_from, range_to, live_from, live_to) * 2 + (live_from, live_to)
+        return self.db.fetch_all(query, params)
+
+    def get_employee_flight_hours(self, date_from=None, date_to=None, granularity=None, limit=20):
+        """
+        Aggregates landed flight hours for crew members, split by Short/Long haul, for flights
+        departing in [date_from, date_to). Top `limit` crew overall, or per period with a granularity.
+        """
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+        rolled_period = f"{self._period('stat_date', granularity)} AS period, " if granularity else ""
+        live_period = f"{self._period('f.departure_time', granularity)}, " if granularity else ""
+
+        hours = f"""
+            SELECT
+                {'h.period, ' if granularity else ''}
                 CONCAT(s.first_name, ' ', s.last_name, ' (', cm.role_type, ')') as label,
-                ROUND(SUM(CASE WHEN TIME_TO_SEC(rt.flight_duration)/3600 <= 6 THEN TIME_TO_SEC(rt.flight_duration)/3600 ELSE 0 END), 1) AS short_flight_hours,
-                ROUND(SUM(CASE WHEN TIME_TO_SEC(rt.flight_duration)/3600 > 6 THEN TIME_TO_SEC(rt.flight_duration)/3600 ELSE 0 END), 1) AS long_flight_hours,
-                ROUND(SUM(TIME_TO_SEC(rt.flight_duration)/3600), 1) as total_hours
-            FROM crew_assignments ca
-            JOIN crew_members cm ON ca.employee_id = cm.employee_id
+                ROUND(SUM(h.short_hours), 1) AS short_flight_hours,
+                ROUND(SUM(h.long_hours), 1) AS long_flight_hours,
+                ROUND(SUM(h.short_hours + h.long_hours), 1) as total_hours
+                {', ROW_NUMBER() OVER (PARTITION BY h.period ORDER BY SUM(h.short_hours + h.long_hours) DESC) AS period_rank' if granularity else ''}
+            FROM (
+                SELECT {rolled_period}employee_id, short_hours, long_hours
+                FROM rollup_employee_daily
+                WHERE stat_date >= %s AND stat_date < %s
+                AND (stat_date < %s OR stat_date >= %s)
+                UNION ALL
+                SELECT
+                    {live_period}
+                    ca.employee_id,
+                    CASE WHEN TIME_TO_SEC(rt.flight_duration)/3600 <= 6 THEN TIME_TO_SEC(rt.flight_duration)/3600 ELSE 0 END,
+                    CASE WHEN TIME_TO_SEC(rt.flight_duration)/3600 > 6 THEN TIME_TO_SEC(rt.flight_duration)/3600 ELSE 0 END
+                FROM flights f
+                JOIN crew_assignments ca ON ca.flight_id = f.flight_id
+                JOIN routes rt ON f.route_id = rt.route_id
+                WHERE f.flight_status = 'Landed'
+                AND f.departure_time >= %s AND f.departure_time < %s
+            ) h
+            JOIN crew_members cm ON h.employee_id = cm.employee_id
             JOIN staff s ON cm.employee_id = s.employee_id
-            JOIN flights f ON ca.flight_id = f.flight_id
-            JOIN routes rt ON f.route_id = rt.route_id
-            WHERE f.flight_status = 'Landed'
-            GROUP BY cm.employee_id, s.first_name, s.last_name, cm.role_type
-            ORDER BY total_hours DESC
-            LIMIT 20
+            GROUP BY {'h.period, ' if granularity else ''}cm.employee_id, s.first_name, s.last_name, cm.role_type
         """
-        return self.db.fetch_all(query)
+        params = (range_from, range_to, live_from, live_to, live_from, live_to, limit)
 
-    def get_monthly_cancellation_rate(self):
-        """Calculates the percentage of cancelled orders per month."""
-        query = """
-            SELECT 
-                DATE_FORMAT(order_date, '%Y-%m') AS month,
-                ROUND((SUM(CASE WHEN LOWER(order_status) = 'customer_cancelled' THEN 1 ELSE 0 END) * 100.0 / COUNT(*)), 1) AS cancellation_rate
-            FROM orders 
-            WHERE order_date IS NOT NULL
-            GROUP BY DATE_FORMAT(order_date, '%Y-%m')
-            ORDER BY month DESC
+        if not granularity:
+            return self.db.fetch_all(hours + " ORDER BY total_hours DESC LIMIT %s", params)
+
+        # One window pass ranks crew inside every period
+        return self.db.fetch_all(f"""
+            SELECT period AS `{granularity}`, label, short_flight_hours, long_flight_hours, total_hours
+            FROM ({hours}) ranked
+            WHERE period_rank <= %s
+            ORDER BY period, total_hours DESC
+        """, params)
+
+    def get_cancellation_rate(self, date_from=None, date_to=None, granularity='month'):
+        """
+        Percentage of orders placed in [date_from, date_to) that the customer cancelled, per period.
+        Whole months come from rollup_order_months; partial edge months, the live window and day/week
+        periods are counted from orders over order_date ranges (idx_orders_order_date).
+        """
+        granularity = granularity or 'month'
+        range_from, range_to = date_from or self.ALL_TIME[0], date_to or self.ALL_TIME[1]
+        live_from, live_to = self._live_window()
 
+        # [full_from, full_to): the whole months inside the range (none unless grouping by month)
+        full_from = range_from if range_from.day == 1 else (range_from.replace(day=1) + timedelta(days=32)).replace(day=1)
+        full_to = range_to.replace(day=1)
+        if granularity != 'month' or full_from >= full_to:
+            full_from = full_to = range_from
+
+        query = f"""
+            SELECT
+                p.period AS `{granularity}`,
+                ROUND(SUM(p.cancelled_count) * 100.0 / SUM(p.orders_count), 1) AS cancellation_rate
+            FROM (
+                SELECT month AS period, orders_count, cancelled_count
+                FROM rollup_order_months
+                WHERE month >= %s AND month < %s
+                UNION ALL
+                SELECT
+                    {self._period('order_date', granularity)},
+                    COUNT(*),
+                    SUM(CASE WHEN LOWER(order_status) = 'customer_cancelled' THEN 1 ELSE 0 END)
+                FROM orders
+                WHERE order_date >= %s AND order_date < %s
+                AND (order_date < %s OR order_date >= %s OR (order_date >= %s AND order_date < %s))
+                GROUP BY 1
+            ) p
+            GROUP BY p.period
+            ORDER BY p.period
         """
-        results = self.db.fetch_all(query)
-        return results[::-1] if results else []
+        params = (full_from.strftime('%Y-%m'), full_to.strftime('%Y-%m'),
+                  range_from, range_to, full_from, full_to, live_from, live_to)
+        return self.db.fetch_all(query, params)
 
-    def get_aircraft_activity_30_days(self):
+    def get_aircraft_activity(self, date_from=None, date_to=None, granularity=None):
         """
-        Retrieves utilization stats and dominant routes for aircraft over the last 30 days.
+        Flights, utilization (share of the period spent in the air) and dominant route per aircraft
+        for landed flights in [date_from, date_to), by default the last ACTIVITY_DAYS days.
+        With a granularity, returns one row per active aircraft and period.
         """
-        query = """
-            SELECT 
+        date_to = date_to or date.today() + timedelta(days=1)
+        date_from = date_from or date_to - timedelta(days=self.ACTIVITY_DAYS)
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+
+        rolled_period = f"{self._period('stat_date', granularity)} AS period, " if granularity else ""
+        live_period = f"{self._period('f.departure_time', granularity)}, " if granularity else ""
+        period_key = "act.period, " if granularity else ""
+
+        # Routes are ranked per aircraft (and period) in one window pass over the grouped activity
+        query = f"""
+            WITH activity AS (
+                SELECT {rolled_period}aircraft_id, route_id, landed_flights, flight_hours
+                FROM rollup_aircraft_daily
+                WHERE stat_date >= %s AND stat_date < %s
+                AND (stat_date < %s OR stat_date >= %s)
+                UNION ALL
+                SELECT {live_period}f.aircraft_id, f.route_id, COUNT(*), SUM(TIME_TO_SEC(rt.flight_duration)/3600)
+                FROM flights f
+                JOIN routes rt ON f.route_id = rt.route_id
+                WHERE f.flight_status = 'Landed' AND f.aircraft_id IS NOT NULL
+                AND f.departure_time >= %s AND f.departure_time < %s
+                GROUP BY {'1, ' if granularity else ''}f.aircraft_id, f.route_id
+            ),
+            by_route AS (
+                SELECT
+                    {period_key}act.aircraft_id,
+                    CONCAT(r.origin_airport, '-', r.destination_airport) AS route,
+                    SUM(act.landed_flights) AS flights,
+                    SUM(act.flight_hours) AS hours,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY {period_key}act.aircraft_id
+                        ORDER BY SUM(act.landed_flights) DESC, r.origin_airport, r.destination_airport
+                    ) AS route_rank
+                FROM activity act
+                JOIN routes r ON act.route_id = r.route_id
+                GROUP BY {period_key}act.aircraft_id, r.origin_airport, r.destination_airport
+            )
+            SELECT
+                {f'br.period AS `{granularity}`, ' if granularity else ''}
                 CONCAT('Plane ', a.aircraft_id, ' (', COALESCE(a.manufacturer, 'Unknown'), ')') as label,
-                COUNT(f.flight_id) as flights_count,
-                ROUND(COALESCE(SUM(TIME_TO_SEC(rt.flight_duration)/3600), 0) / 720 * 100, 1) as utilization,
-                (
-                    SELECT CONCAT(r2.origin_airport, '-', r2.destination_airport) 
-                    FROM flights f2 
-                    JOIN routes r2 ON f2.route_id = r2.route_id
-                    WHERE f2.aircraft_id = a.aircraft_id 
-                    AND f2.flight_status = 'Landed'
-                    AND f2.departure_time >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                    GROUP BY r2.origin_airport, r2.destination_airport 
-                    ORDER BY COUNT(*) DESC LIMIT 1
-                ) as dominant_route
+                COALESCE(SUM(br.flights), 0) as flights_count,
+                COALESCE(SUM(br.hours), 0) as flight_hours,
+                MAX(CASE WHEN br.route_rank = 1 THEN br.route END) as dominant_route
             FROM aircraft a
-            LEFT JOIN flights f ON a.aircraft_id = f.aircraft_id 
-                AND f.flight_status = 'Landed'
-                AND f.departure_time >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            LEFT JOIN routes rt ON f.route_id = rt.route_id
-            GROUP BY a.aircraft_id, a.manufacturer
-            ORDER BY flights_count DESC
-        """
-        return self.db.fetch_all(query)
+            {'JOIN' if granularity else 'LEFT JOIN'} by_route br ON br.aircraft_id = a.aircraft_id
+            GROUP BY {'br.period, ' if granularity else ''}a.aircraft_id, a.manufacturer
+            ORDER BY {'br.period, ' if granularity else ''}flights_count DESC
+        """
+        rows = self.db.fetch_all(query, (range_from, range_to, live_from, live_to, live_from, live_to))
+
+        # Hours available in each row's period, clipped to the range
+        for row in rows:
+            period_from, period_to = (self._period_bounds(row[granularity], granularity)
+                                      if granularity else (range_from, range_to))
+            available = (min(period_to, range_to) - max(period_from, range_from)).days * 24
+            hours = float(row['flight_hours'])
+            row['flight_hours'] = round(hours, 1)
+            row['utilization'] = round(hours * 100.0 / available, 1) if available > 0 else 0
+        return rows
+
+    def get_series(self, date_from, date_to, resolution='day', split_by=None, route_id=None, aircraft_id=None,
+                   travel_class=None):
+        """
+        Time-series buckets for flights departing in [date_from, date_to), by departure day:
+        [{period_start, series, flights, bookings, seats_sold, capacity, revenue}] ordered by series and period.
+        Closed days come from rollup_series_daily; the live window is bucketed from the source tables with
+        the same SELECT. Coarser resolutions are aggregated from the daily buckets in the query.
+        """
+        range_from, range_to, live_from, live_to = self._windows(date_from, date_to)
+
+        filters, filter_params = [], []
+        for column, value in (('route_id', route_id), ('aircraft_id', aircraft_id), ('class', travel_class)):
+            if value is not None:
+                filters.append(f"{column} = %s")
+                filter_params.append(value)
+        rolled_filter = ''.join(f" AND {condition}" for condition in filters)
+        outer_filter = f"WHERE {' AND '.join('b.' + condition for condition in filters)}" if filters else ""
+
+        series = self.SERIES_SPLITS[split_by] if split_by else "'All'"
+        period = self.RESOLUTIONS[resolution].format(d='b.stat_date')
+
+        query = f"""
+            SELECT
+                {period} AS period_start,
+                {series} AS series,
+                SUM(b.flights) AS flights,
+                SUM(b.bookings) AS bookings,
+                SUM(b.seats_sold) AS seats_sold,
+                SUM(b.capacity) AS capacity,
+                SUM(b.revenue) AS revenue
+            FROM (
+                SELECT stat_date, route_id, aircraft_id, class, flights, bookings, seats_sold, capacity, revenue
+                FROM rollup_series_daily
+                WHERE stat_date >= %s AND stat_date < %s
+                AND (stat_date < %s OR stat_date >= %s){rolled_filter}
+                UNION ALL
+                SELECT * FROM ({RollupDAO.series_select("f.departure_time >= %s AND f.departure_time < %s")}) live
+            ) b
+            {"JOIN routes r ON r.route_id = b.route_id" if split_by == 'route' else ""}
+            {outer_filter}
+            GROUP BY period_start, series
+            ORDER BY series, period_start
+        """
+        params = (range_from, range_to, live_from, live_to, *filter_params, live_from, live_to, *filter_params)
+        return self.db.fetch_all(query, params)
+
+    def get_employee_hours_totals(self):
+        """Total landed flight hours per crew member (same data as get_employee_flight_hours, unranked)."""
+        live_from, live_to = self._live_window()
+        query = """
+            SELECT employee_id, SUM(hours) as total_hours
+            FROM (
+                SELECT employee_id, short_hours + long_hours AS hours
+                FROM rollup_employee_daily
+                WHERE stat_date < %s OR stat_date >= %s
+                UNION ALL
+                SELECT ca.employee_id, TIME_TO_SEC(rt.flight_duration)/3600
+                FROM crew_assignments ca
+                JOIN flights f ON ca.flight_id = f.flight_id
+                JOIN routes rt ON f.route_id = rt.route_id
+                WHERE f.flight_status = 'Landed'
+                AND f.departure_time >= %s AND f.departure_time < %s
+            ) h
+            GROUP BY employee_id
+        """
+        return {row['employee_id']: float(row['total_hours'] or 0) for row in self.db.fetch_all(query, (live_from, live_to) * 2)}
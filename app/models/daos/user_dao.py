@@ -12,16 +12,18 @@ class UserDAO:
         self.db = db_manager
 
     def get_customer_by_email(self, email):
-        """Checks if a registered customer exists and returns a Customer object."""
-        query = "SELECT * FROM customers WHERE customer_email = %s"
+        """Checks if a registered customer exists and returns a Customer object (one query incl. phones)."""
+        query = """
+            SELECT c.*, p.phone_number
+            FROM customers c
+            LEFT JOIN customer_phone_numbers p ON p.customer_email = c.customer_email
+            WHERE c.customer_email = %s
+        """
         try:
             result = self.db.fetch_all(query, (email,))
             if result and len(result) > 0:
                 row = result[0]
-                # Fetch phone numbers
-                query_phones = "SELECT phone_number FROM customer_phone_numbers WHERE customer_email = %s"
-                phone_results = self.db.fetch_all(query_phones, (email,))
-                phone_numbers = [p['phone_number'] for p in phone_results] if phone_results else []
+                phone_numbers = [r['phone_number'] for r in result if r['phone_number']]
 
                 return Customer(
                     email=row['customer_email'],
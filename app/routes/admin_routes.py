@@ -2,11 +2,22 @@
 File: admin_routes.py
 Purpose: Routes for Admin Panel (Wizard, Dashboard, Reports).
 """
-from flask import Blueprint, render_template, request, session, redirect, url_for, current_app, flash
+from flask import Blueprint, render_template, request, session, redirect, url_for, current_app, flash, jsonify, Response, stream_with_context
 from database.db_manager import DBManager
 from app.services.flight_service import FlightService
 from app.services.auth_service import AuthService
-from datetime import datetime
+from app.services.crew_service import CrewService
+from app.services.roster_service import RosterService
+from app.services.schedule_service import ScheduleService
+from app.services.pricing_service import PricingService
+from app.services.report_cache import ReportCache
+from app.services.analytics_service import AnalyticsService, FleetSnapshot
+from app.services.export_service import ExportService
+from app.services.timeseries_service import TimeSeriesService
+from app.utils.profiling import RequestProfiler
+import io
+import os
+from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -14,6 +25,22 @@ admin_bp = Blueprint('admin', __name__)
 db = DBManager()
 flight_service = FlightService(db)
 auth_service = AuthService(db)
+roster_service = RosterService(db)
+schedule_service = ScheduleService(db)
+pricing_service = PricingService(db)
+report_cache = ReportCache(flight_service.stats_dao)
+analytics_service = AnalyticsService(db)
+export_service = ExportService(db)
+timeseries_service = TimeSeriesService(db)
+
+# Report page -> StatisticsDAO reports it shows (used by the manual refresh)
+REPORT_SOURCES = {
+    'occupancy': ('get_avg_fleet_occupancy', 'get_recent_flights_occupancy'),
+    'revenue': ('get_revenue_by_manufacturer',),
+    'hours': ('get_employee_flight_hours',),
+    'cancellations': ('get_cancellation_rate',),
+    'activity': ('get_aircraft_activity',)
+}
 
 @admin_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -34,8 +61,9 @@ def login():
 
 @admin_bp.route('/dashboard')
 def dashboard():
-    """Main Admin Dashboard."""
-    return render_template('admin/dashboard.html')
+    """Main Admin Dashboard (KPI strip: a slow or failing KPI shows its last good value, marked as cached)."""
+    stats = flight_service.get_admin_dashboard_stats()
+    return render_template('admin/dashboard.html', stats=stats)
 
 # --- Wizard Step 1: Route & Time ---
 @admin_bp.route('/create_flight/step1', methods=['GET', 'POST'])
@@ -81,6 +109,10 @@ def create_flight_step2():
     if not route_info:
         flash("Invalid Route selected", "danger")
         return redirect(url_for('admin.create_flight_step1'))
+
+    # Remember the duration so step 3 does not look the route up again
+    wizard_data['flight_duration_sec'] = int(route_info['flight_duration'].total_seconds())
+    session['wizard_data'] = wizard_data
     
     # Get available aircrafts
     available_aircrafts = flight_service.get_available_aircrafts(
@@ -104,19 +136,16 @@ def create_flight_step3():
     wizard_data = session.get('wizard_data', {})
     if not wizard_data: return redirect(url_for('admin.create_flight_step1'))
 
-    req_pilots = 2
-    req_attendants = 3  # Start with small defaults
     aircraft_size = 'Small'
 
     # Re-fetch aircraft info to determine constraints (could be cached in session, but safe to fetch)
     if wizard_data.get('aircraft_id'):
-        # We need DAO access here or add method to service?
         # Service has access to AircraftDAO.
-        aircraft = flight_service.aircraft_dao.get_aircraft_by_id(wizard_data.get('aircraft_id'))
+        aircraft = flight_service.aircraft_service.aircraft_dao.get_aircraft_by_id(wizard_data.get('aircraft_id'))
         if aircraft and str(aircraft['size']).lower() == 'big':
             aircraft_size = 'Big'
-            req_pilots = 3
-            req_attendants = 6
+
+    req_pilots, req_attendants = CrewService.get_crew_quotas(aircraft_size)
     
     constraints = {
         'pilots': req_pilots,
@@ -166,24 +195,20 @@ def create_flight_step3():
              flash(f"Error creating flight: {result.get('message')}", "danger")
              return redirect(url_for('admin.create_flight_step1'))
 
-    # GET: Show Candidates
-    route_info = flight_service.get_route_details(wizard_data['origin'], wizard_data['destination'])
-    
-    pilots = flight_service.get_crew_candidates(
-        wizard_data['origin'], 
-        wizard_data['destination'], 
-        wizard_data['departure_time'], 
-        route_info['flight_duration'],
-        'Pilot'
-    )
-    
-    attendants = flight_service.get_crew_candidates(
+    # GET: Show Candidates (route context from step 2, both roles in one query)
+    if 'flight_duration_sec' in wizard_data:
+        flight_duration = timedelta(seconds=wizard_data['flight_duration_sec'])
+    else:
+        flight_duration = flight_service.get_route_details(wizard_data['origin'], wizard_data['destination'])['flight_duration']
+
+    candidates = flight_service.get_crew_candidates_by_role(
         wizard_data['origin'], 
         wizard_data['destination'], 
         wizard_data['departure_time'], 
-        route_info['flight_duration'],
-        'Flight Attendant'
+        flight_duration
     )
+    pilots = candidates['Pilot']
+    attendants = candidates['Flight Attendant']
 
     # Check for Shortages
     warnings = {}
@@ -228,6 +253,201 @@ def cancel_flight(flight_id):
         
     return redirect(url_for('admin.view_flights'))
 
+@admin_bp.route('/cancel_flights/bulk', methods=['GET', 'POST'])
+def bulk_cancel_flights():
+    """Mass cancellation for a grounded aircraft or a closed airport (preview, then apply)."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+
+    locations = flight_service.get_all_locations()
+    form = request.form if request.method == 'POST' else {}
+    flights = None
+
+    if request.method == 'POST':
+        try:
+            date_from = max(datetime.strptime(form.get('date_from'), '%Y-%m-%d'), datetime.now())
+            # The form's end date is inclusive
+            date_to = datetime.strptime(form.get('date_to'), '%Y-%m-%d') + timedelta(days=1)
+            aircraft_id = int(form['aircraft_id']) if form.get('aircraft_id') else None
+        except (TypeError, ValueError):
+            flash("Error: Invalid date or aircraft ID.", "danger")
+            return redirect(url_for('admin.bulk_cancel_flights'))
+
+        airport = form.get('airport') or None
+        if not aircraft_id and not airport:
+            flash("Error: Select an aircraft or an airport.", "danger")
+            return redirect(url_for('admin.bulk_cancel_flights'))
+
+        if form.get('action') == 'apply':
+            result = flight_service.mass_cancel_flights(date_from, date_to, aircraft_id, airport)
+            if result['status'] == 'success':
+                flash(result['message'], "success")
+            elif result['status'] == 'warning':
+                flash(result['message'], "warning")
+            else:
+                flash(f"Error: {result['message']}", "danger")
+            return redirect(url_for('admin.view_flights'))
+
+        flights = flight_service.get_flights_to_cancel(date_from, date_to, aircraft_id, airport)
+
+    return render_template('admin/bulk_cancel.html', active_page='flights',
+                           locations=locations, form=form, flights=flights)
+
+@admin_bp.route('/flights/reprice', methods=['GET', 'POST'])
+def reprice_flights():
+    """Bulk fare repricing with a dry-run preview (action=preview) before applying (action=apply)."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+
+    locations = flight_service.get_all_locations()
+    form = request.form if request.method == 'POST' else {}
+    summary = None
+
+    if request.method == 'POST':
+        try:
+            date_from = datetime.strptime(form.get('date_from'), '%Y-%m-%d')
+            # The form's end date is inclusive
+            date_to = datetime.strptime(form.get('date_to'), '%Y-%m-%d') + timedelta(days=1)
+            min_lf = float(form['min_load_factor']) / 100 if form.get('min_load_factor') else None
+            max_lf = float(form['max_load_factor']) / 100 if form.get('max_load_factor') else None
+        except (TypeError, ValueError):
+            flash("Error: Invalid date or load factor.", "danger")
+            return redirect(url_for('admin.reprice_flights'))
+
+        filters = {
+            'date_from': max(date_from, datetime.now()),
+            'date_to': date_to,
+            'origin': form.get('origin') or None,
+            'destination': form.get('destination') or None,
+            'aircraft_size': form.get('aircraft_size') or None,
+            'min_load_factor': min_lf,
+            'max_load_factor': max_lf
+        }
+        summary = pricing_service.reprice(
+            filters,
+            form.get('mode'),
+            form.get('economy_change'),
+            form.get('business_change'),
+            dry_run=form.get('action') != 'apply'
+        )
+
+        if summary['status'] != 'success':
+            flash(f"Error: {summary['message']}", "danger")
+            if 'flights' not in summary:
+                summary = None
+        elif not summary['dry_run']:
+            flash(f"{summary['flights_updated']} flights repriced.", "success")
+
+    return render_template('admin/reprice.html', active_page='flights',
+                           locations=locations, form=form, summary=summary)
+
+@admin_bp.route('/roster', methods=['GET', 'POST'])
+def roster():
+    """Automatic crew rostering over a date range (runs as a background job)."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+
+    if request.method == 'POST':
+        try:
+            date_from = datetime.strptime(request.form.get('date_from'), '%Y-%m-%d')
+            # The form's end date is inclusive
+            date_to = datetime.strptime(request.form.get('date_to'), '%Y-%m-%d') + timedelta(days=1)
+        except (TypeError, ValueError):
+            flash("Error: Invalid date format.", "danger")
+            return redirect(url_for('admin.roster'))
+
+        if date_to <= date_from:
+            flash("Error: End date must not be before start date.", "danger")
+            return redirect(url_for('admin.roster'))
+
+        if date_to - date_from > timedelta(days=92):
+            flash("Error: Planning horizon is limited to 3 months.", "danger")
+            return redirect(url_for('admin.roster'))
+
+        res = roster_service.start_roster_job(date_from, date_to)
+        if res['status'] != 'success':
+            flash(f"Error: {res['message']}", "danger")
+            if res['job_id']:
+                return redirect(url_for('admin.roster_job', job_id=res['job_id']))
+            return redirect(url_for('admin.roster'))
+        return redirect(url_for('admin.roster_job', job_id=res['job_id']))
+
+    return render_template('admin/roster.html', active_page='roster', job=None)
+
+@admin_bp.route('/roster/<job_id>')
+def roster_job(job_id):
+    """Progress page for a rostering job."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+
+    job = roster_service.get_job(job_id)
+    if not job:
+        flash("Roster job not found.", "danger")
+        return redirect(url_for('admin.roster'))
+
+    return render_template('admin/roster.html', active_page='roster', job=job)
+
+@admin_bp.route('/roster/<job_id>/status')
+def roster_job_status(job_id):
+    """JSON progress endpoint polled by the roster page."""
+    if not session.get('admin_logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    job = roster_service.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({
+        "status": job['status'],
+        "processed": job['processed'],
+        "total": job['total'],
+        "result": job['result'],
+        "error": job['error']
+    })
+
+@admin_bp.route('/schedule/import', methods=['GET', 'POST'])
+def schedule_import():
+    """Bulk schedule import: CSV upload or a single recurrence rule."""
+    if not session.get('admin_logged_in'):
+        return redirect(url_for('admin.login'))
+
+    locations = flight_service.get_all_locations()
+    summary = None
+
+    if request.method == 'POST':
+        upload = request.files.get('schedule_csv')
+        if upload and upload.filename:
+            try:
+                specs, errors = schedule_service.parse_csv(io.StringIO(upload.read().decode('utf-8-sig')))
+            except UnicodeDecodeError:
+                specs, errors = [], [ScheduleService.CSV_ENCODING_ERROR]
+        else:
+            rule = {
+                'origin': request.form.get('origin'),
+                'destination': request.form.get('destination'),
+                'days': request.form.getlist('days'),
+                'time': request.form.get('time'),
+                'date_from': request.form.get('date_from'),
+                'date_to': request.form.get('date_to'),
+                'economy_price': request.form.get('economy_price'),
+                'business_price': request.form.get('business_price') or 0
+            }
+            specs, errors = schedule_service.expand_rules([rule])
+
+        if errors:
+            for error in errors[:5]:
+                flash(f"Error: {error}", "danger")
+            return redirect(url_for('admin.schedule_import'))
+
+        summary = schedule_service.import_schedule(
+            specs,
+            auto_assign=request.form.get('auto_assign') == '1',
+            dry_run=request.form.get('dry_run') == '1'
+        )
+
+    return render_template('admin/schedule_import.html', active_page='schedule',
+                           locations=locations, summary=summary)
+
 @admin_bp.route('/add_crew', methods=['GET', 'POST'])
 def add_crew():
     """Form to add new pilots or attendants."""
@@ -287,46 +507,204 @@ def reports_hub():
 
 @admin_bp.route('/dashboard/reports/occupancy')
 def report_occupancy():
-    """Specific Report: Fleet Occupancy."""
+    """Specific Report: Fleet Occupancy (?date_from=&date_to=&granularity=)."""
     if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
-    
-    # Kpi Occupancy
-    kpi = flight_service.stats_dao.get_avg_fleet_occupancy()
-    recent_data = flight_service.stats_dao.get_recent_flights_occupancy(limit=5)
-    
-    return render_template('admin/reports/occupancy.html', kpi_occupancy=kpi, recent_data=recent_data)
+
+    (date_from, date_to, granularity), range_error = _report_range()
+    kpi, kpi_age = report_cache.get('get_avg_fleet_occupancy', date_from, date_to, granularity)
+    if granularity:
+        return _period_report('Average Flight Occupancy', 'occupancy', kpi, kpi_age, range_error)
+
+    recent_data, recent_age = report_cache.get('get_recent_flights_occupancy', 5, date_from, date_to)
+    return render_template('admin/reports/occupancy.html', kpi_occupancy=kpi, recent_data=recent_data,
+                           report_name='occupancy', cache_age=max(kpi_age, recent_age), range_error=range_error)
 
 @admin_bp.route('/dashboard/reports/revenue')
 def report_revenue():
-    """Specific Report: Revenue Analysis."""
+    """Specific Report: Revenue Analysis (?date_from=&date_to=&granularity=)."""
     if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
-    
-    data = flight_service.stats_dao.get_revenue_by_manufacturer()
-    return render_template('admin/reports/revenue.html', rev_by_manufacturer=data)
+
+    (date_from, date_to, granularity), range_error = _report_range()
+    data, age = report_cache.get('get_revenue_by_manufacturer', date_from, date_to, granularity)
+    if granularity:
+        return _period_report('Total Revenue Analysis', 'revenue', data, age, range_error)
+    return render_template('admin/reports/revenue.html', rev_by_manufacturer=data,
+                           report_name='revenue', cache_age=age, range_error=range_error)
 
 @admin_bp.route('/dashboard/reports/hours')
 def report_hours():
-    """Specific Report: Employee Flight Hours."""
+    """Specific Report: Employee Flight Hours (?date_from=&date_to=&granularity=)."""
     if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
-    
-    data = flight_service.stats_dao.get_employee_flight_hours()
-    return render_template('admin/reports/hours.html', emp_hours=data)
+
+    (date_from, date_to, granularity), range_error = _report_range()
+    data, age = report_cache.get('get_employee_flight_hours', date_from, date_to, granularity)
+    if granularity:
+        return _period_report('Employee Flight Hours', 'hours', data, age, range_error)
+    return render_template('admin/reports/hours.html', emp_hours=data,
+                           report_name='hours', cache_age=age, range_error=range_error)
 
 @admin_bp.route('/dashboard/reports/cancellations')
 def report_cancellations():
-    """Specific Report: Cancellation Trends."""
+    """Specific Report: Cancellation Trends (monthly unless ?granularity= is given)."""
     if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
-    
-    data = flight_service.stats_dao.get_monthly_cancellation_rate()
-    return render_template('admin/reports/cancellations.html', cancel_rates=data)
+
+    (date_from, date_to, granularity), range_error = _report_range()
+    data, age = report_cache.get('get_cancellation_rate', date_from, date_to, granularity or 'month')
+    if granularity and granularity != 'month':
+        return _period_report('Cancellation Trends', 'cancellations', data, age, range_error)
+    return render_template('admin/reports/cancellations.html', cancel_rates=data,
+                           report_name='cancellations', cache_age=age, range_error=range_error)
 
 @admin_bp.route('/dashboard/reports/activity')
 def report_activity():
-    """Specific Report: Aircraft Activity."""
+    """Specific Report: Aircraft Activity (last 30 days unless ?date_from=&date_to= are given)."""
     if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
-    
-    data = flight_service.stats_dao.get_aircraft_activity_30_days()
-    return render_template('admin/reports/activity.html', aircraft_activity=data)
+
+    (date_from, date_to, granularity), range_error = _report_range()
+    data, age = report_cache.get('get_aircraft_activity', date_from, date_to, granularity)
+    if granularity:
+        return _period_report('Aircraft Activity', 'activity', data, age, range_error)
+    return render_template('admin/reports/activity.html', aircraft_activity=data,
+                           report_name='activity', cache_age=age, range_error=range_error)
+
+def _report_range():
+    """Report range from the query string; an invalid range falls back to the defaults plus an error message."""
+    range_args, range_error = ReportCache.parse_range(
+        request.args.get('date_from'), request.args.get('date_to'), request.args.get('granularity')
+    )
+    return range_args or (None, None, None), range_error
+
+def _period_report(title, report_name, rows, cache_age, range_error):
+    """Renders a report broken down by period as a plain table."""
+    return render_template('admin/reports/period_table.html', report_title=title, rows=rows,
+                           report_name=report_name, cache_age=cache_age, range_error=range_error)
+
+@admin_bp.route('/dashboard/reports/analytics')
+def report_analytics():
+    """Ad-hoc analytics: load factor, revenue and utilization by any dimension, with what-if repricing (?format=json)."""
+    if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
+
+    args = request.args
+    group_by = [dim for dim in args.getlist('group_by') if dim] or ['route']
+    filters = {dim: args.getlist(dim) for dim in AnalyticsService.FILTER_DIMENSIONS if args.getlist(dim)}
+
+    what_if = None
+    result = None
+    if args.getlist('wi_route'):
+        try:
+            what_if = {
+                'filters': {'route': args.getlist('wi_route')},
+                'economy_pct': float(args.get('wi_economy_pct') or 0),
+                'business_pct': float(args.get('wi_business_pct') or 0),
+                'elasticity': float(args.get('wi_elasticity') or 0)
+            }
+        except ValueError:
+            result = {"status": "error", "message": "What-if changes must be numbers."}
+
+    if result is None:
+        result = analytics_service.analyze(
+            group_by,
+            filters=filters,
+            date_from=args.get('date_from'),
+            date_to=args.get('date_to'),
+            include_cancelled=bool(args.get('include_cancelled')),
+            what_if=what_if,
+            refresh=bool(args.get('refresh'))
+        )
+
+    if args.get('format') == 'json':
+        return jsonify(result), (200 if result['status'] == 'success' else 400)
+
+    try:
+        dimension_values = analytics_service.dimension_values()
+    except Exception as e:
+        print(f"Error loading analytics dimensions: {e}")
+        dimension_values = {}
+
+    return render_template('admin/reports/analytics.html',
+                           result=result,
+                           args=args,
+                           group_by=group_by,
+                           what_if=what_if,
+                           dimensions=FleetSnapshot.DIMENSIONS,
+                           filter_dimensions=AnalyticsService.FILTER_DIMENSIONS,
+                           dimension_values=dimension_values,
+                           refresh_url=url_for('admin.report_analytics', refresh=1, **{
+                               key: values for key, values in args.to_dict(flat=False).items() if key != 'refresh'
+                           }))
+
+@admin_bp.route('/dashboard/api/timeseries')
+def timeseries():
+    """
+    JSON time series of bookings, seats sold, revenue and load factor by departure date.
+    ?date_from=&date_to=&resolution=day|week|month|quarter|year&split_by=route|aircraft|class
+    &route_id=&aircraft_id=&class=&max_points= (coarser resolution when the range needs more points).
+    """
+    if not session.get('admin_logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    args = request.args
+    result = timeseries_service.get_series(
+        date_from=args.get('date_from'),
+        date_to=args.get('date_to'),
+        resolution=args.get('resolution'),
+        split_by=args.get('split_by'),
+        route_id=args.get('route_id'),
+        aircraft_id=args.get('aircraft_id'),
+        travel_class=args.get('class'),
+        max_points=args.get('max_points')
+    )
+    return jsonify(result), (200 if result['status'] == 'success' else 400)
+
+@admin_bp.route('/dashboard/api/profiling')
+def profiling_stats():
+    """Per-endpoint request timings of the worker answering (FLYTAU_PROFILING=1)."""
+    if not session.get('admin_logged_in'):
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify({
+        "enabled": RequestProfiler.enabled,
+        "pid": os.getpid(),
+        "endpoints": RequestProfiler.endpoint_stats()
+    })
+
+@admin_bp.route('/dashboard/exports')
+def exports():
+    """Lists the CSV exports with their date-range and gzip options."""
+    if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
+    return render_template('admin/reports/exports.html', exports=ExportService.EXPORTS,
+                           report_exports=ExportService.REPORT_EXPORTS)
+
+@admin_bp.route('/dashboard/exports/<name>')
+def export_csv(name):
+    """Streams a CSV export (?date_from=&date_to=YYYY-MM-DD, ?granularity=, ?gzip=1) without buffering it in memory."""
+    if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
+
+    compress = bool(request.args.get('gzip'))
+    result = export_service.open_export(name, request.args.get('date_from'), request.args.get('date_to'), compress,
+                                        request.args.get('granularity'))
+    if result['status'] != 'success':
+        return jsonify(result), 400
+
+    return Response(
+        stream_with_context(result['chunks']),
+        mimetype='application/gzip' if compress else 'text/csv',
+        headers={
+            'Content-Disposition': f"attachment; filename={result['filename']}",
+            'X-Accel-Buffering': 'no'  # Let a fronting nginx pass chunks through
+        }
+    )
+
+@admin_bp.route('/dashboard/reports/<report>/refresh', methods=['POST'])
+def refresh_report(report):
+    """Drops a report's cached results so the page is recomputed now."""
+    if not session.get('admin_logged_in'): return redirect(url_for('admin.login'))
+    if report not in REPORT_SOURCES:
+        return redirect(url_for('admin.reports_hub'))
+
+    for source in REPORT_SOURCES[report]:
+        ReportCache.invalidate(source)
+    return redirect(url_for(f'admin.report_{report}', **request.args))
 
 @admin_bp.route('/add_aircraft', methods=['GET', 'POST'])
 def add_aircraft():
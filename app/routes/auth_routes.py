@@ -44,12 +44,14 @@ def profile():
     
     email = session['user_email']
     status_filter = request.args.get('status')
+    cursor = request.args.get('before')
     
     # Use Services
     user = auth_service.user_dao.get_customer_by_email(email) 
-    orders = booking_service.get_customer_history(email, status_filter)
+    orders, next_cursor = booking_service.get_customer_history(email, status_filter, cursor)
     
-    return render_template('profile.html', orders=orders, user=user, current_filter=status_filter)
+    return render_template('profile.html', orders=orders, user=user, current_filter=status_filter,
+                           next_cursor=next_cursor, is_first_page=not cursor)
 
 # --- Register ---
 @routes.route('/register', methods=['GET', 'POST'])
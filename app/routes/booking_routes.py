@@ -47,7 +47,9 @@ def select_seats(flight_id):
     guest_email = request.args.get('guest_email')
     
     flight = booking_service.get_flight_for_booking(flight_id)
-    seats_by_row = booking_service.get_seat_map(flight_id)
+    # Seats held by this visitor's own draft stay selectable
+    draft = session.get('draft_order') or {}
+    seats_by_row = booking_service.get_seat_map(flight_id, draft.get('hold_token'))
 
     return render_template('flights/seats.html', 
                            flight=flight, 
@@ -66,6 +68,18 @@ def review_order():
         flash("No seats selected. Please try again.", "warning")
         return redirect(url_for('booking.select_seats', flight_id=flight_id))
 
+    # Reserve the seats while the user reviews and pays
+    previous = session.get('draft_order') or {}
+    hold = booking_service.hold_seats(flight_id, selected_seats, previous.get('hold_token'))
+    if hold['status'] != 'success':
+        session.pop('draft_order', None)
+        if hold.get('lost_seats'):
+            flash(f"Seats {', '.join(s.replace('-', '') for s in hold['lost_seats'])} were just taken. Please choose again.", "warning")
+        else:
+            flash(f"Could not reserve seats: {hold['message']}", "danger")
+        return redirect(url_for('booking.select_seats', flight_id=flight_id,
+                                qty=len(selected_seats), guest_email=guest_email))
+
     # Service Call
     flight = booking_service.get_flight_for_booking(flight_id)
     seat_details, total_price = booking_service.process_seat_selection(flight_id, selected_seats)
@@ -75,6 +89,8 @@ def review_order():
         'flight_id': flight_id,
         'guest_email': guest_email,
         'seat_ids': selected_seats,
+        'hold_token': hold['hold_token'],
+        'idempotency_key': booking_service.new_idempotency_key(),
         'total_price': float(total_price),
         'seat_details_view': [(s['row_number'], s['column_number'], s['class'], float(s['price'])) for s in seat_details]
     }
@@ -83,13 +99,19 @@ def review_order():
                            flight=flight, 
                            seat_details=seat_details, 
                            total_price=total_price,
-                           guest_email=guest_email)
+                           guest_email=guest_email,
+                           hold_expires_at=hold['expires_at'],
+                           idempotency_key=session['draft_order']['idempotency_key'])
 
 @booking_bp.route('/booking/confirm', methods=['POST'])
 def confirm_booking():
     """Step 4: Finalize Order from Draft"""
     draft = session.get('draft_order')
     if not draft:
+        # A retry of an already completed confirm (draft consumed): send it to the original order
+        existing = booking_service.find_order_by_idempotency_key(request.form.get('idempotency_key'))
+        if existing:
+            return redirect(url_for('booking.confirmation', code=existing))
         flash("Session expired or invalid. Please start over.", "danger")
         return redirect(url_for('routes.home'))
         
@@ -106,7 +128,9 @@ def confirm_booking():
         customer_email=customer_email,
         guest_email=guest_email,
         total_price=total_price,
-        seat_ids=seat_ids
+        seat_ids=seat_ids,
+        hold_token=draft.get('hold_token'),
+        idempotency_key=draft.get('idempotency_key')
     )
 
     if result['status'] == 'success':
@@ -114,15 +138,17 @@ def confirm_booking():
         return redirect(url_for('booking.confirmation', code=result['order_code']))
     else:
         flash(f"Booking Failed: {result['message']}", "danger")
+        if result.get('lost_seats'):
+            # Someone else took a seat first: let the user pick replacements for the same party size
+            return redirect(url_for('booking.select_seats', flight_id=flight_id,
+                                    qty=len(seat_ids), guest_email=guest_email))
         return redirect(url_for('booking.select_seats', flight_id=flight_id))
 
 @booking_bp.route('/booking/confirmation/<code>')
 def confirmation(code):
     """Step 4: Summary Page"""
-    order = booking_service.get_order_confirmation(code.lower())
-    if not order:
-        order = booking_service.get_order_confirmation(code.upper())
-        
+    order = booking_service.get_order_confirmation(code)
+
     return render_template('flights/confirmation.html', order=order)
 
 @booking_bp.route('/search', methods=['GET', 'POST'])
@@ -160,7 +186,7 @@ def manage_login():
         order = booking_service.verify_booking_access(order_code, email)
         
         if order:
-            session['manage_order_code'] = order_code
+            session['manage_order_code'] = order['unique_order_code']
             return redirect(url_for('booking.manage_dashboard'))
                 
         flash("We could not find a booking matching those details.", "danger")
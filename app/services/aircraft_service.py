@@ -2,8 +2,10 @@
 File: aircraft_service.py
 Purpose: Service Layer for Aircraft Operations (Selection Logic, Scoring, Validations).
 """
+from bisect import bisect_left, bisect_right
 from datetime import timedelta, datetime
 from app.models.daos.aircrafts_dao import AircraftDAO
+from app.models.daos.route_catalog import RouteCatalog
 
 class AircraftService:
     """
@@ -12,6 +14,7 @@ class AircraftService:
     
     def __init__(self, db_manager):
         self.aircraft_dao = AircraftDAO(db_manager)
+        self.routes = RouteCatalog(db_manager)
         self.TURNAROUND_TIME = timedelta(hours=2)
 
     def get_available_aircrafts_for_flight(self, flight_id):
@@ -57,6 +60,52 @@ class AircraftService:
         """Delegates assignment to DAO."""
         return self.aircraft_dao.assign_aircraft_to_flight(flight_id, aircraft_id)
 
+    def assign_aircraft_batch(self, flights, chunk_size=500):
+        """
+        Assigns the best-scored aircraft to each flight (dicts from FlightDAO.get_flights_without_aircraft,
+        in departure order) with the same rules as get_available_aircrafts_for_flight, but planned in
+        memory from one fleet, schedule and route load, then written in chunked UPDATEs.
+        Each assignment is visible to the flights after it, as it was with one commit per flight.
+        """
+        if not flights:
+            return {"status": "success", "assigned": 0}
+
+        for flight in flights:
+            flight['flight_duration'] = self._as_timedelta(flight['flight_duration'])
+        route_map = self.routes.route_map()
+        route_pairs = set(route_map)
+        max_duration = max([f['flight_duration'] for f in flights] +
+                           [r['flight_duration'] for r in route_map.values()])
+
+        # Every flight that can overlap, precede or follow a flight of the batch
+        margin = max_duration + self.TURNAROUND_TIME
+        window_start = flights[0]['departure_time'] - margin
+        window_end = flights[-1]['departure_time'] + margin
+        fleet = self.aircraft_dao.fetch_fleet()
+        schedules = {a['aircraft_id']: ([], []) for a in fleet} # aircraft_id -> (departures, legs)
+        for row in sorted(self.aircraft_dao.fetch_schedules(window_start, window_end), key=lambda r: r['departure_time']):
+            if row['aircraft_id'] in schedules:
+                departures, legs = schedules[row['aircraft_id']]
+                duration = self._as_timedelta(row['flight_duration'])
+                max_duration = max(max_duration, duration)
+                landing = row['departure_time'] + duration
+                departures.append(row['departure_time'])
+                legs.append((landing, row['origin_airport'], row['destination_airport']))
+
+        assignments = []
+        for flight in flights:
+            aircraft_id = self._plan_one(flight, fleet, schedules, route_pairs, max_duration)
+            if aircraft_id is None:
+                continue
+            departures, legs = schedules[aircraft_id]
+            i = bisect_right(departures, flight['departure_time'])
+            departures.insert(i, flight['departure_time'])
+            legs.insert(i, (flight['departure_time'] + flight['flight_duration'],
+                            flight['origin_airport'], flight['destination_airport']))
+            assignments.append((flight['flight_id'], aircraft_id))
+
+        return self.aircraft_dao.bulk_assign_aircraft(assignments, chunk_size)
+
     def register_new_aircraft(self, manufacturer, size, purchase_date=None):
         """Delegates creation to DAO."""
         return self.aircraft_dao.add_aircraft(manufacturer, size, purchase_date)
@@ -143,3 +192,67 @@ class AircraftService:
         else:
             # Need time to ferry to next origin
             return self._check_ferry_possibility(current_landing_dest, next_origin, next_start)
+
+    # --- Batch Planning ---
+
+    def _plan_one(self, flight, fleet, schedules, route_pairs, max_duration):
+        """In-memory _process_candidates for one flight: returns the best aircraft_id, or None."""
+        origin = flight['origin_airport']
+        destination = flight['destination_airport']
+        departure = flight['departure_time']
+        landing = departure + flight['flight_duration']
+        is_long_haul = flight['flight_duration'] > timedelta(hours=6)
+        safe_start = departure - self.TURNAROUND_TIME
+        safe_end = landing + self.TURNAROUND_TIME
+
+        best_id, best_score = None, None
+        for aircraft in fleet:
+            size = str(aircraft['size']).lower()
+            if is_long_haul and size == 'small':
+                continue
+
+            departures, legs = schedules[aircraft['aircraft_id']]
+            # Flying during the safe window (fetch_candidates_by_window)
+            i = bisect_left(departures, safe_start - max_duration)
+            busy = False
+            while i < len(departures) and departures[i] < safe_end:
+                if legs[i][0] > safe_start:
+                    busy = True
+                    break
+                i += 1
+            if busy:
+                continue
+
+            # Location and ferry
+            i = bisect_left(departures, departure) - 1
+            current_loc = legs[i][2] if i >= 0 else (aircraft['current_location'] or 'TLV')
+            score = 0
+            if current_loc != origin:
+                if (current_loc, origin) not in route_pairs:
+                    continue
+                score += 10
+
+            # Next scheduled flight
+            i = bisect_right(departures, landing)
+            if i < len(departures):
+                next_origin = legs[i][1]
+                if destination == next_origin:
+                    if landing + self.TURNAROUND_TIME > departures[i]:
+                        continue
+                elif (destination, next_origin) not in route_pairs:
+                    continue
+
+            if not is_long_haul and size == 'big':
+                score += 5
+
+            # Lowest score wins, the first aircraft on ties (stable sort in _process_candidates)
+            if best_score is None or score < best_score:
+                best_id, best_score = aircraft['aircraft_id'], score
+        return best_id
+
+    def _as_timedelta(self, duration):
+        """Route durations may come back as 'HH:MM:SS' strings."""
+        if isinstance(duration, str):
+            t = datetime.strptime(duration, "%H:%M:%S")
+            return timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
+        return duration
@@ -0,0 +1,353 @@
+"""
+File: analytics_service.py
+Purpose: Service Layer for ad-hoc Fleet Analytics (columnar NumPy snapshot, group-bys, what-if repricing).
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from app.models.daos.analytics_dao import AnalyticsDAO
+
+class Categorical:
+    """Dictionary-encodes a column while it streams in: labels -> int32 codes."""
+
+    def __init__(self, missing='Unknown'):
+        self.missing = missing
+        self.labels = []
+        self._index = {}
+        self._codes = []
+
+    def append(self, value):
+        """Encodes one value (None becomes the 'missing' label)."""
+        if value is None:
+            value = self.missing
+        code = self._index.get(value)
+        if code is None:
+            code = len(self.labels)
+            self._index[value] = code
+            self.labels.append(value)
+        self._codes.append(code)
+
+    def finish(self):
+        """Returns the codes column as an array and drops the build buffer."""
+        codes = np.array(self._codes, dtype=np.int32)
+        self._codes = None
+        return codes
+
+    def codes_for(self, values):
+        """Codes of the given labels (labels that never occurred are ignored)."""
+        return [self._index[v] for v in values if v in self._index]
+
+class FleetSnapshot:
+    """
+    Read-only columnar copy of the flight history: one array element per flight, with
+    categorical codes per dimension and seats sold per class (order lines are reduced to
+    per-flight counts with bincount as they stream in). All queries are NumPy operations.
+    """
+    DIMENSIONS = ('route', 'month', 'aircraft_size', 'manufacturer', 'aircraft', 'status')
+    CANCELLED_STATUSES = ('Cancelled', 'System Cancelled')
+
+    @classmethod
+    def build(cls, dao):
+        """Streams flights and sold order lines from the AnalyticsDAO into a new snapshot."""
+        started = time.perf_counter()
+        snap = cls()
+        categories = {dim: Categorical() for dim in cls.DIMENSIONS}
+        categories['aircraft'].missing = 'Unassigned'
+
+        flight_ids, departures, hours = [], [], []
+        economy_price, business_price, economy_capacity, business_capacity = [], [], [], []
+
+        # 1. Flights (dimension codes and per-flight measures)
+        for batch in dao.stream_flights():
+            for (flight_id, departure, status, eco_price, bus_price, aircraft_id, route,
+                 flight_hours, size, manufacturer, eco_seats, bus_seats) in batch:
+                flight_ids.append(flight_id)
+                departures.append(departure)
+                hours.append(float(flight_hours or 0))
+                economy_price.append(float(eco_price or 0))
+                business_price.append(float(bus_price or 0))
+                economy_capacity.append(int(eco_seats))
+                business_capacity.append(int(bus_seats))
+
+                categories['route'].append(route)
+                categories['month'].append(departure.strftime('%Y-%m'))
+                categories['aircraft_size'].append(size)
+                categories['manufacturer'].append(manufacturer)
+                categories['aircraft'].append(f"Plane {aircraft_id}" if aircraft_id else None)
+                categories['status'].append(status)
+
+        snap.flight_ids = np.array(flight_ids, dtype=np.int64)
+        snap.departure = np.array(departures, dtype='datetime64[s]')
+        snap.flight_hours = np.array(hours, dtype=np.float64)
+        snap.economy_price = np.array(economy_price, dtype=np.float64)
+        snap.business_price = np.array(business_price, dtype=np.float64)
+        snap.economy_capacity = np.array(economy_capacity, dtype=np.int64)
+        snap.business_capacity = np.array(business_capacity, dtype=np.int64)
+        snap.categories = categories
+        snap.codes = {dim: cat.finish() for dim, cat in categories.items()}
+
+        # 2. Sold seats per flight and class (flights are ordered by id, so lines map with searchsorted)
+        size = len(snap.flight_ids)
+        snap.economy_sold = np.zeros(size, dtype=np.int64)
+        snap.business_sold = np.zeros(size, dtype=np.int64)
+        snap.line_count = 0
+        for batch in dao.stream_sold_lines():
+            lines = np.array(batch, dtype=np.int64)
+            snap.line_count += len(lines)
+            if not size:
+                continue
+            idx = np.minimum(np.searchsorted(snap.flight_ids, lines[:, 0]), size - 1)
+            known = snap.flight_ids[idx] == lines[:, 0]
+            idx = idx[known]
+            business = lines[known, 1].astype(bool)
+            snap.economy_sold += np.bincount(idx[~business], minlength=size)
+            snap.business_sold += np.bincount(idx[business], minlength=size)
+
+        snap.built_at = datetime.now()
+        snap.build_seconds = round(time.perf_counter() - started, 2)
+        return snap
+
+    @property
+    def size(self):
+        return len(self.flight_ids)
+
+    def mask(self, filters=None, date_from=None, date_to=None, include_cancelled=False):
+        """Boolean flight mask: departure in [date_from, date_to), dimension filters {dim: [labels]}."""
+        mask = np.ones(self.size, dtype=bool)
+        if date_from:
+            mask &= self.departure >= np.datetime64(date_from, 's')
+        if date_to:
+            mask &= self.departure < np.datetime64(date_to, 's')
+        if not include_cancelled:
+            cancelled = self.categories['status'].codes_for(self.CANCELLED_STATUSES)
+            mask &= ~np.isin(self.codes['status'], cancelled)
+        for dim, labels in (filters or {}).items():
+            if labels:
+                mask &= np.isin(self.codes[dim], self.categories[dim].codes_for(labels))
+        return mask
+
+    def reprice(self, target, economy_change, business_change, elasticity=0.0):
+        """
+        What-if arrays (economy_price, business_price, economy_sold, business_sold) after changing prices
+        by the given fractions on the target flights. Demand moves by elasticity x price change
+        (0 = seats sold unchanged) and never exceeds a configured cabin's capacity.
+        """
+        eco_factor = np.where(target, 1.0 + economy_change, 1.0)
+        bus_factor = np.where(target, 1.0 + business_change, 1.0)
+
+        def demand(sold, factor, capacity):
+            scaled = sold * np.clip(1.0 + elasticity * (factor - 1.0), 0.0, None)
+            return np.where(capacity > 0, np.minimum(scaled, capacity), scaled)
+
+        return (
+            self.economy_price * eco_factor,
+            self.business_price * bus_factor,
+            demand(self.economy_sold, eco_factor, self.economy_capacity),
+            demand(self.business_sold, bus_factor, self.business_capacity)
+        )
+
+    def aggregate(self, group_by, mask, economy_price=None, business_price=None, economy_sold=None, business_sold=None):
+        """
+        Vectorized group-by over the masked flights. Group keys are mixed-radix combinations of the
+        dimension codes; every measure is one bincount. Returns per-group arrays plus decoded keys.
+        Price/sold arrays default to the actual values (pass reprice() output for a scenario).
+        """
+        economy_price = self.economy_price if economy_price is None else economy_price
+        business_price = self.business_price if business_price is None else business_price
+        economy_sold = self.economy_sold if economy_sold is None else economy_sold
+        business_sold = self.business_sold if business_sold is None else business_sold
+
+        key = np.zeros(int(mask.sum()), dtype=np.int64)
+        for dim in group_by:
+            key = key * len(self.categories[dim].labels) + self.codes[dim][mask]
+        groups, inverse = np.unique(key, return_inverse=True)
+        count = len(groups)
+
+        def total(values):
+            return np.bincount(inverse, weights=values[mask], minlength=count)
+
+        result = {
+            'flights': np.bincount(inverse, minlength=count),
+            'seats_sold': total(economy_sold + business_sold),
+            'capacity': total(self.economy_capacity + self.business_capacity),
+            'economy_revenue': total(economy_sold * economy_price),
+            'business_revenue': total(business_sold * business_price),
+            'flight_hours': total(self.flight_hours)
+        }
+
+        # Distinct assigned aircraft per group (utilization denominator)
+        aircraft_codes = self.codes['aircraft'][mask]
+        unassigned = self.categories['aircraft'].codes_for(['Unassigned'])
+        assigned = ~np.isin(aircraft_codes, unassigned)
+        radix = max(len(self.categories['aircraft'].labels), 1)
+        pairs = np.unique(inverse[assigned].astype(np.int64) * radix + aircraft_codes[assigned])
+        result['aircraft'] = np.bincount(pairs // radix, minlength=count)
+
+        # Decode the combined keys back into one code column per dimension
+        keys = {}
+        remaining = groups
+        for dim in reversed(group_by):
+            radix = len(self.categories[dim].labels)
+            keys[dim] = remaining % radix
+            remaining = remaining // radix
+        result['keys'] = keys
+        return result
+
+class AnalyticsService:
+    """
+    Ad-hoc slicing of load factor, revenue and utilization, plus what-if repricing.
+    The snapshot is shared process-wide and rebuilt when older than SNAPSHOT_TTL (or on demand).
+    """
+    SNAPSHOT_TTL = timedelta(minutes=15)
+    REFRESH_DEDUP = timedelta(seconds=5)
+    MAX_GROUP_BY = 2
+    FILTER_DIMENSIONS = ('route', 'aircraft_size', 'manufacturer')
+
+    # Shared across instances (same idea as the DBManager singleton state)
+    _snapshot = None
+    _lock = threading.Lock()
+
+    def __init__(self, db_manager):
+        self.analytics_dao = AnalyticsDAO(db_manager)
+
+    def get_snapshot(self, refresh=False):
+        """Returns the current snapshot, building it if missing, expired or refresh is requested."""
+        cls = type(self)
+        snap = cls._snapshot
+        if not refresh and snap is not None and datetime.now() - snap.built_at < cls.SNAPSHOT_TTL:
+            return snap
+
+        with cls._lock:
+            # Another thread may have rebuilt it while we waited (a forced refresh accepts a just-built one)
+            snap = cls._snapshot
+            if snap is not None and datetime.now() - snap.built_at < (cls.REFRESH_DEDUP if refresh else cls.SNAPSHOT_TTL):
+                return snap
+            cls._snapshot = FleetSnapshot.build(self.analytics_dao)
+            return cls._snapshot
+
+    def dimension_values(self):
+        """Sorted labels per dimension (for filter dropdowns)."""
+        snap = self.get_snapshot()
+        return {dim: sorted(snap.categories[dim].labels) for dim in FleetSnapshot.DIMENSIONS}
+
+    def analyze(self, group_by, filters=None, date_from=None, date_to=None, include_cancelled=False,
+                what_if=None, refresh=False):
+        """
+        Slices the snapshot. group_by: up to MAX_GROUP_BY of FleetSnapshot.DIMENSIONS.
+        date_from/date_to: 'YYYY-MM-DD' (inclusive). what_if: {'filters': {dim: [labels]},
+        'economy_pct': 10, 'business_pct': 10, 'elasticity': -0.5} reprices the matching flights.
+        """
+        group_by = list(dict.fromkeys(group_by or []))
+        unknown = [dim for dim in group_by if dim not in FleetSnapshot.DIMENSIONS]
+        if unknown:
+            return {"status": "error", "message": f"Unknown dimension(s): {', '.join(unknown)}"}
+        if len(group_by) > self.MAX_GROUP_BY:
+            return {"status": "error", "message": f"Group by at most {self.MAX_GROUP_BY} dimensions."}
+
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1) if date_to else None
+        except ValueError:
+            return {"status": "error", "message": "Dates must be YYYY-MM-DD."}
+        if start and end and start >= end:
+            return {"status": "error", "message": "Start date must be before end date."}
+
+        try:
+            snap = self.get_snapshot(refresh=refresh)
+        except Exception as e:
+            print(f"Error building analytics snapshot: {e}")
+            return {"status": "error", "message": "Analytics data could not be loaded."}
+
+        started = time.perf_counter()
+        mask = snap.mask(filters, start, end, include_cancelled)
+        base = snap.aggregate(group_by, mask)
+
+        scenario = None
+        if what_if:
+            target = mask & snap.mask(what_if.get('filters'), include_cancelled=True)
+            scenario = snap.aggregate(group_by, mask, *snap.reprice(
+                target,
+                what_if.get('economy_pct', 0) / 100.0,
+                what_if.get('business_pct', 0) / 100.0,
+                what_if.get('elasticity', 0.0)
+            ))
+
+        # Hours available per aircraft in the window (whole snapshot span when open-ended)
+        span_hours = 0.0
+        if mask.any():
+            first = np.datetime64(start, 's') if start else snap.departure[mask].min()
+            last = np.datetime64(end, 's') if end else snap.departure[mask].max() + np.timedelta64(1, 'D')
+            span_hours = float((last - first) / np.timedelta64(1, 'h'))
+
+        rows = self._rows(snap, group_by, base, scenario, span_hours)
+        return {
+            "status": "success",
+            "group_by": group_by,
+            "rows": rows,
+            "totals": self._totals(rows, scenario is not None),
+            "flights_matched": int(mask.sum()),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "snapshot": {
+                "built_at": snap.built_at.strftime('%Y-%m-%d %H:%M:%S'),
+                "flights": snap.size,
+                "order_lines": snap.line_count,
+                "build_seconds": snap.build_seconds
+            }
+        }
+
+    def _rows(self, snap, group_by, base, scenario, span_hours):
+        """Turns aggregate arrays into report rows, highest revenue first."""
+        columns = {name: values.tolist() for name, values in base.items() if name != 'keys'}
+        keys = {dim: codes.tolist() for dim, codes in base['keys'].items()}
+        if scenario is not None:
+            scenario_revenue = (scenario['economy_revenue'] + scenario['business_revenue']).tolist()
+            scenario_sold = scenario['seats_sold'].tolist()
+
+        rows = []
+        for i in range(len(columns['flights'])):
+            row = {dim: snap.categories[dim].labels[keys[dim][i]] for dim in group_by}
+            capacity = columns['capacity'][i]
+            aircraft = columns['aircraft'][i]
+            revenue = columns['economy_revenue'][i] + columns['business_revenue'][i]
+            row.update({
+                'flights': columns['flights'][i],
+                'seats_sold': int(columns['seats_sold'][i]),
+                'capacity': int(capacity),
+                'load_factor': round(columns['seats_sold'][i] * 100.0 / capacity, 1) if capacity else None,
+                'economy_revenue': round(columns['economy_revenue'][i], 2),
+                'business_revenue': round(columns['business_revenue'][i], 2),
+                'revenue': round(revenue, 2),
+                'flight_hours': round(columns['flight_hours'][i], 1),
+                'utilization': round(columns['flight_hours'][i] * 100.0 / (aircraft * span_hours), 1)
+                               if aircraft and span_hours else None
+            })
+            if scenario is not None:
+                row['scenario_seats_sold'] = round(scenario_sold[i], 1)
+                row['scenario_revenue'] = round(scenario_revenue[i], 2)
+                row['revenue_delta'] = round(scenario_revenue[i] - revenue, 2)
+                row['scenario_load_factor'] = round(scenario_sold[i] * 100.0 / capacity, 1) if capacity else None
+            rows.append(row)
+
+        rows.sort(key=lambda r: r['revenue'], reverse=True)
+        return rows
+
+    def _totals(self, rows, with_scenario):
+        """Grand totals across the returned groups."""
+        seats = sum(r['seats_sold'] for r in rows)
+        capacity = sum(r['capacity'] for r in rows)
+        totals = {
+            'flights': sum(r['flights'] for r in rows),
+            'seats_sold': seats,
+            'capacity': capacity,
+            'load_factor': round(seats * 100.0 / capacity, 1) if capacity else None,
+            'revenue': round(sum(r['revenue'] for r in rows), 2),
+            'flight_hours': round(sum(r['flight_hours'] for r in rows), 1)
+        }
+        if with_scenario:
+            scenario_seats = sum(r['scenario_seats_sold'] for r in rows)
+            totals['scenario_revenue'] = round(sum(r['scenario_revenue'] for r in rows), 2)
+            totals['revenue_delta'] = round(totals['scenario_revenue'] - totals['revenue'], 2)
+            totals['scenario_seats_sold'] = round(scenario_seats, 1)
+            totals['scenario_load_factor'] = round(scenario_seats * 100.0 / capacity, 1) if capacity else None
+        return totals
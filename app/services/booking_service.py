@@ -2,18 +2,31 @@
 File: booking_service.py
 Purpose: Service Layer for Booking Operations (Selection, Payment, History).
 """
+import uuid
+from datetime import datetime, timedelta
 from app.models.daos.flight_dao import FlightDAO
 from app.models.daos.order_dao import OrderDAO
 from app.models.daos.user_dao import UserDAO
+from app.models.daos.seat_hold_dao import SeatHoldDAO
+from app.models.daos.cache_invalidations import CacheInvalidations
+from app.utils.cache import TTLCache
 
 class BookingService:
     """
     Orchestrates the booking flow from seat selection to order finalization.
     """
+    HOLD_TTL = timedelta(minutes=10) # Seats stay reserved this long after the summary page
+
+    # Order views (order + tickets) keyed by normalized code, shared by every BookingService.
+    # Bogus codes are cached as misses so repeated guesses don't reach the database.
+    # Invalidations reach the other worker processes through CacheInvalidations.
+    order_view_cache = TTLCache(ttl=120, max_entries=5000, negative_ttl=30)
+
     def __init__(self, db_manager):
         self.flight_dao = FlightDAO(db_manager)
         self.order_dao = OrderDAO(db_manager)
         self.user_dao = UserDAO(db_manager)
+        self.seat_hold_dao = SeatHoldDAO(db_manager)
 
     # --- Booking Flow ---
     def get_flight_for_booking(self, flight_id):
@@ -26,9 +39,9 @@ class BookingService:
             self.user_dao.ensure_guest_exists(guest_email)
         return True
 
-    def get_seat_map(self, flight_id):
+    def get_seat_map(self, flight_id, hold_token=None):
         """Returns a structured dictionary of seats grouped by row for UI rendering."""
-        seats = self.flight_dao.get_flight_seats(flight_id)
+        seats = self.flight_dao.get_flight_seats(flight_id, hold_token)
         seats_by_row = {}
         if seats:
             for seat in seats:
@@ -58,25 +71,74 @@ class BookingService:
                 
         return details, total_price
 
-    def finalize_booking(self, flight_id, customer_email, guest_email, total_price, seat_ids):
-        """Persists the final order and associated tickets."""
-        return self.order_dao.create_order(
+    def hold_seats(self, flight_id, seat_ids, previous_token=None):
+        """Places a short-TTL hold on the selected seats (replacing the draft's previous hold)."""
+        if previous_token:
+            self.seat_hold_dao.release_holds(previous_token)
+
+        seats = []
+        for sid in seat_ids:
+            try:
+                r_str, c_str = str(sid).split('-')
+                seats.append((int(r_str), c_str))
+            except ValueError:
+                continue
+        if not seats:
+            return {"status": "error", "message": "No valid seats selected"}
+
+        return self.seat_hold_dao.place_holds(flight_id, seats, uuid.uuid4().hex, self.HOLD_TTL)
+
+    @staticmethod
+    def new_idempotency_key():
+        """Key generated with each draft; confirming the same draft twice yields the same order."""
+        return uuid.uuid4().hex
+
+    def find_order_by_idempotency_key(self, idempotency_key):
+        """Looks up the order created by a previous confirm with this key (None if none)."""
+        if not idempotency_key:
+            return None
+        return self.order_dao.get_order_code_by_idempotency_key(idempotency_key)
+
+    def finalize_booking(self, flight_id, customer_email, guest_email, total_price, seat_ids, hold_token=None,
+                         idempotency_key=None):
+        """Persists the final order and associated tickets, converting the draft's seat hold."""
+        result = self.order_dao.create_order(
             flight_id=flight_id,
             customer_email=customer_email,
             guest_email=guest_email,
             total_price=total_price,
-            seat_ids=seat_ids
+            seat_ids=seat_ids,
+            hold_token=hold_token,
+            idempotency_key=idempotency_key
         )
+        if result['status'] == 'success':
+            # The code may have been guessed (and cached as a miss) before it existed
+            self.invalidate_order_views(result['order_code'])
+        return result
+
+    @staticmethod
+    def normalize_order_code(code):
+        """Accepts codes as typed by users (spaces, dashes, 'PNR' prefixes) and keeps the digits."""
+        digits = ''.join(ch for ch in str(code or '') if ch.isdigit())
+        return digits or None
 
     def get_order_confirmation(self, code):
         """Fetches complete order details for the confirmation page."""
-        order = self.order_dao.get_order_details(code)
-        return order
+        code = self.normalize_order_code(code)
+        if not code:
+            return None
+        CacheInvalidations.poll()
+        return self.order_view_cache.get_or_load(code, lambda: self.order_dao.get_order_details(code))
+
+    @classmethod
+    def invalidate_order_views(cls, order_code=None):
+        """Drops one cached order view (or all of them, e.g. after a flight cancellation) in every process."""
+        CacheInvalidations.publish('order_views', cls.normalize_order_code(order_code) if order_code else None)
 
     # --- Manage Booking ---
     def verify_booking_access(self, order_code, email):
         """Verifies if the provided email matches the order (Security Check)."""
-        order = self.order_dao.get_order_details(order_code)
+        order = self.get_order_confirmation(order_code)
         if not order:
             return None
         
@@ -92,7 +154,34 @@ class BookingService:
             return self.order_dao.cancel_order(order_code)
         except ValueError as e:
             return {"status": "error", "message": str(e)}
+        finally:
+            self.invalidate_order_views(order_code)
+
+    HISTORY_PAGE_SIZE = 20
+
+    def get_customer_history(self, email, status_filter=None, cursor=None):
+        """
+        Retrieves one page of order history for a logged-in customer.
+        cursor is the opaque 'before' token from the previous page; returns (orders, next_cursor token).
+        """
+        orders, next_position = self.order_dao.get_customer_orders(
+            email, status_filter, self._decode_history_cursor(cursor), self.HISTORY_PAGE_SIZE
+        )
+        next_cursor = None
+        if next_position:
+            order_date, code = next_position
+            next_cursor = f"{order_date.strftime('%Y%m%d%H%M%S')}-{code}"
+        return orders, next_cursor
+
+    @staticmethod
+    def _decode_history_cursor(cursor):
+        """Parses 'YYYYmmddHHMMSS-code' back to (order_date, code); invalid tokens start from the top."""
+        if not cursor:
+            return None
+        try:
+            date_str, code = cursor.split('-')
+            return datetime.strptime(date_str, '%Y%m%d%H%M%S'), int(code)
+        except ValueError:
+            return None
 
-    def get_customer_history(self, email, status_filter=None):
-        """Retrieves order history for a logged-in customer."""
-        return self.order_dao.get_customer_orders(email, status_filter)
+CacheInvalidations.register('order_views', BookingService.order_view_cache.invalidate)
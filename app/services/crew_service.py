@@ -4,75 +4,96 @@ Purpose: Service Layer for Crew Operations (Scoring, Logic, Quotas).
 """
 from datetime import timedelta
 from app.models.daos.crew_dao import CrewDAO
+from app.services.positioning_index import PositioningIndex
 
 class CrewService:
     """
     Manages crew assignment logic, including certification matching and quotas.
     """
 
+    # Crew must land at the origin at least this long before departure
+    TRANSFER_BUFFER = timedelta(hours=2)
+
     def __init__(self, db_manager):
         self.crew_dao = CrewDAO(db_manager)
+        self.positioning_index = PositioningIndex(self.crew_dao)
 
     def get_candidates_for_wizard(self, origin, destination, departure_time, flight_duration, role_name, limit):
         """Retrieves suitable crew candidates for a potential flight (Wizard flow)."""
+        return self.get_candidates_by_roles_for_wizard(
+            origin, destination, departure_time, flight_duration, {role_name: limit}
+        )[role_name]
+
+    def get_candidates_by_roles_for_wizard(self, origin, destination, departure_time, flight_duration, role_limits):
+        """Retrieves ranked candidates for several roles of a potential flight in one query."""
         is_long_haul = flight_duration > timedelta(hours=6)
         route_type = 'Long' if is_long_haul else 'Short'
 
-        return self._fetch_candidates_logic(origin, destination, departure_time, flight_duration, route_type, role_name, limit)
+        return self._fetch_candidates_logic(origin, destination, departure_time, flight_duration, route_type, role_limits)
 
     def get_candidates(self, flight_id, role_name, limit):
         """Retrieves suitable crew candidates for an existing flight."""
         flight = self.crew_dao.fetch_flight_details_for_crew(flight_id)
         if not flight: return []
 
-        duration = flight['flight_duration']
-        
+        return self._fetch_candidates_for_flight(flight, {role_name: limit})[role_name]
+
+    def _fetch_candidates_for_flight(self, flight, role_limits):
+        """Runs the candidate search using already-fetched flight details."""
         return self._fetch_candidates_logic(
             flight['origin_airport'], 
             flight['destination_airport'], 
             flight['departure_time'], 
-            duration, 
+            flight['flight_duration'], 
             flight['route_type'], 
-            role_name, 
-            limit
+            role_limits
         )
 
-    def _fetch_candidates_logic(self, origin, destination, departure_time, flight_duration, route_type, role_name, limit):
+    def _fetch_candidates_logic(self, origin, destination, departure_time, flight_duration, route_type, role_limits):
         """Orchestrates the parameters for the complex DAO query."""
-        params = (
-            origin, 
-            route_type, route_type, 
-            origin, departure_time, 
-            role_name, 
-            origin, 
-            origin, departure_time, 
-            route_type, 
-            departure_time, flight_duration, departure_time,
-            route_type,
-            int(limit)
+        end_time = departure_time + flight_duration
+
+        # Resolve transfers in memory: which bases have a flight with free seats landing in time
+        inbound = self.positioning_index.inbound_flights(origin, departure_time - self.TRANSFER_BUFFER)
+
+        candidates_by_role = self.crew_dao.fetch_candidates_by_roles(
+            origin, departure_time, end_time, route_type, role_limits, transfer_origins=inbound.keys()
         )
-        return self.crew_dao.fetch_candidates(params)
+        for candidates in candidates_by_role.values():
+            for candidate in candidates:
+                transfer = inbound.get(candidate['current_location']) if candidate['needs_transfer'] else None
+                candidate['transfer_flight_id'] = transfer['flight_id'] if transfer else None
+
+        return candidates_by_role
+
+    def get_locations_as_of(self, as_of, employee_ids=None):
+        """Last known airport per crew member at a point in time (derived from the duty timeline)."""
+        return self.crew_dao.fetch_locations_as_of(as_of, employee_ids)
+
+    @staticmethod
+    def get_crew_quotas(aircraft_size):
+        """Returns (pilots_needed, attendants_needed) for an aircraft size."""
+        if str(aircraft_size).lower() == 'big':
+            return 3, 6
+        return 2, 3 # Small
 
     def assign_crew_for_flight(self, flight_id):
         """Determines crew quotas and fetches available candidates for selection."""
-        # 1. Get flight data
+        # 1. Get flight data (once, reused for every role)
         flight_data = self.crew_dao.fetch_flight_details_for_crew(flight_id)
         if not flight_data:
             return {"error": "Flight not found"}
 
-        aircraft_size = flight_data['aircraft_size']
-        
         # 2. Determine Quotas
-        if str(aircraft_size).lower() == 'big':
-            pilots_needed = 3
-            attendants_needed = 6
-        else: # Small
-            pilots_needed = 2
-            attendants_needed = 3
+        pilots_needed, attendants_needed = self.get_crew_quotas(flight_data['aircraft_size'])
 
-        # 3. Fetch Candidates Pool
-        pilots_pool = self.get_candidates(flight_id, 'Pilot', pilots_needed + 5)
-        attendants_pool = self.get_candidates(flight_id, 'Flight Attendant', attendants_needed + 5)
+        # 3. Fetch Candidates Pool (both roles in a single query)
+        pools = self._fetch_candidates_for_flight(flight_data, {
+            'Pilot': pilots_needed + 5,
+            'Flight Attendant': attendants_needed + 5
+        })
+        pilots_pool = pools['Pilot']
+        attendants_pool = pools['Flight Attendant']
 
         # 4. Construct Response
         return {
@@ -91,14 +112,7 @@ class CrewService:
     def assign_selected_crew(self, flight_id, pilot_ids, attendant_ids):
         """Validates and persists the final crew list, checking for conflicts."""
         try:
-            # 1. Prepare Data
-            assignments_to_insert = []
-            for p_id in pilot_ids:
-                assignments_to_insert.append((flight_id, p_id))
-            for a_id in attendant_ids:
-                assignments_to_insert.append((flight_id, a_id))
-
-            # 2. Validation: Check for concurrent assignments
+            # 1. Validation: Check for concurrent assignments
             flight_details = self.crew_dao.fetch_flight_details_for_crew(flight_id)
             flight_start = flight_details['departure_time']
             flight_end = flight_details['calculated_end_time']
@@ -109,13 +123,10 @@ class CrewService:
                 if conflict:
                     raise Exception(f"Concurrent assignment detected for {conflict['first_name']} {conflict['last_name']}")
 
-            # 3. Execute Transaction
-            # Clear existing assignments for this flight first (Replacement logic)
-            self.crew_dao.clear_assignments(flight_id)
-            
-            for assignment in assignments_to_insert:
-                # assignment is (flight_id, employee_id)
-                self.crew_dao.insert_assignment(assignment[0], assignment[1])
+            # 2. Execute Transaction
+            # Replaces the existing crew and its duty timeline rows atomically, so the
+            # timeline the availability checks read never disagrees with crew_assignments
+            self.crew_dao.replace_assignments(flight_id, all_ids)
 
             return {"status": "success", "message": "Crew assigned successfully"}
 
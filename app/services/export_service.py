@@ -0,0 +1,99 @@
+"""
+File: export_service.py
+Purpose: Business logic for CSV Exports (Streamed in batches, optionally gzipped).
+"""
+import csv
+import io
+import zlib
+from app.models.daos.export_dao import ExportDAO
+from app.models.daos.statistics_dao import StatisticsDAO
+from app.services.report_cache import ReportCache
+
+class ExportService:
+    """
+    Produces CSV exports as lazy generators of byte chunks. Each database batch is encoded
+    (and compressed) before the next one is fetched, so memory stays flat for any row count.
+    """
+    # Export name -> description (CLI help and the exports page)
+    EXPORTS = {
+        'bookings': "Order lines with order, flight, route and seat price (date range on order date)",
+        'flight_occupancy': "Seats sold and occupancy per landed flight (date range on departure)",
+        'revenue': "Revenue by aircraft size, manufacturer and class",
+        'hours': "Crew flight hours, short vs. long haul",
+        'cancellations': "Customer cancellation rate per month (or granularity)",
+        'activity': "Aircraft utilization and dominant route (default: last 30 days)"
+    }
+
+    # Aggregate reports are small: computed up front, exported as one batch
+    REPORT_EXPORTS = {
+        'revenue': 'get_revenue_by_manufacturer',
+        'hours': 'get_employee_flight_hours',
+        'cancellations': 'get_cancellation_rate',
+        'activity': 'get_aircraft_activity'
+    }
+
+    GZIP_LEVEL = 6
+
+    def __init__(self, db_manager):
+        self.export_dao = ExportDAO(db_manager)
+        self.stats_dao = StatisticsDAO(db_manager)
+
+    def open_export(self, name, date_from=None, date_to=None, compress=False, granularity=None):
+        """
+        Prepares an export. date_from/date_to: 'YYYY-MM-DD' (inclusive); granularity (day/week/month)
+        breaks the aggregate reports down by period. Returns {"status": "success", "filename", "chunks"};
+        streamed exports only query the database while chunks is being iterated.
+        """
+        if name not in self.EXPORTS:
+            return {"status": "error", "message": f"Unknown export: {name}"}
+
+        range_args, error = ReportCache.parse_range(date_from, date_to, granularity)
+        if error:
+            return {"status": "error", "message": error}
+        start, end, granularity = range_args
+
+        if name == 'bookings':
+            columns = ExportDAO.ORDER_LINE_COLUMNS
+            batches = self.export_dao.stream_order_lines(start, end)
+        elif name == 'flight_occupancy':
+            columns = StatisticsDAO.OCCUPANCY_EXPORT_COLUMNS
+            batches = self.stats_dao.stream_flight_occupancy(start, end)
+        else:
+            if name == 'cancellations':
+                granularity = granularity or 'month'
+            rows = getattr(self.stats_dao, self.REPORT_EXPORTS[name])(start, end, granularity)
+            columns = list(rows[0].keys()) if rows else []
+            batches = [[tuple(row.values()) for row in rows]]
+
+        suffix = ''.join(f"_{part}" for part in (date_from, date_to, granularity) if part)
+        return {
+            "status": "success",
+            "filename": f"{name}{suffix}.csv" + (".gz" if compress else ""),
+            "chunks": self._csv_chunks(columns, batches, compress)
+        }
+
+    def _csv_chunks(self, columns, batches, compress):
+        """Encodes the header and each batch as CSV bytes (a gzip member when compress is set)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # wbits=31: gzip container, so the output is a regular .csv.gz file
+        compressor = zlib.compressobj(self.GZIP_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+        def drain():
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            return compressor.compress(data) if compressor else data
+
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows(batch)
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+        tail = drain()
+        if compressor:
+            tail += compressor.flush()
+        if tail:
+            yield tail
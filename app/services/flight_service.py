@@ -2,16 +2,40 @@
 File: flight_service.py
 Purpose: Service Layer for Flight Operations (Admin Management & User Search).
 """
-from datetime import datetime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
 from app.models.daos.flight_dao import FlightDAO
 from app.services.aircraft_service import AircraftService
 from app.services.crew_service import CrewService
 from app.models.daos.statistics_dao import StatisticsDAO
+from app.services.positioning_index import PositioningIndex
+from app.services.booking_service import BookingService
+from app.utils.cache import TTLCache
 
 class FlightService:
     """
     Central service for Flight Search, Creation Wizard, and Fleet Management.
     """
+    # Dashboard KPIs: name -> (StatisticsDAO method, timeout in seconds, value when nothing is cached)
+    DASHBOARD_KPIS = {
+        'kpi_occupancy': ('get_avg_fleet_occupancy', 3.0, 0),
+        'rev_by_manufacturer': ('get_revenue_by_manufacturer', 3.0, []),
+        'emp_hours': ('get_employee_flight_hours', 3.0, []),
+        'cancel_rates': ('get_cancellation_rate', 3.0, []),
+        'aircraft_activity': ('get_aircraft_activity', 3.0, [])
+    }
+    DASHBOARD_WORKERS = 3 # Below the DBManager pool size, so page requests still get connections
+
+    # Process-wide KPI executor, in-flight queries and last good values
+    _kpi_executor = None
+    _kpi_executor_pid = None
+    _kpi_inflight = {}
+    _kpi_lock = threading.Lock()
+    _kpi_last_good = TTLCache(ttl=24 * 3600)
+
     def __init__(self, db_manager):
         self.flight_dao = FlightDAO(db_manager)
         self.aircraft_service = AircraftService(db_manager)
@@ -48,6 +72,13 @@ class FlightService:
             origin, destination, dep_time, duration, role, limit
         )
 
+    def get_crew_candidates_by_role(self, origin, destination, dep_time_str, duration, roles=('Pilot', 'Flight Attendant'), limit=50):
+        """Finds crew candidates for every wizard role in a single query."""
+        dep_time = datetime.strptime(dep_time_str, '%Y-%m-%dT%H:%M')
+        return self.crew_service.get_candidates_by_roles_for_wizard(
+            origin, destination, dep_time, duration, {role: limit for role in roles}
+        )
+
     def create_full_flight(self, wizard_data):
         """
         Orchestrates Flight Creation, Aircraft Assignment, and Crew Assignment.
@@ -88,23 +119,98 @@ class FlightService:
             wizard_data['pilot_ids'], 
             wizard_data['attendant_ids']
         )
+
+        # New flight is a potential crew positioning leg
+        PositioningIndex.invalidate()
         
         return {"status": "success", "flight_id": flight_id}
 
     def cancel_flight(self, flight_id):
         """Processes an admin-initiated flight cancellation."""
-        return self.flight_dao.cancel_flight_transaction(flight_id)
+        result = self.flight_dao.cancel_flight_transaction(flight_id)
+        PositioningIndex.invalidate()
+        BookingService.invalidate_order_views() # Refunded orders changed status
+        return result
+
+    def get_flights_to_cancel(self, date_from, date_to, aircraft_id=None, airport=None):
+        """Previews the flights a mass cancellation would hit."""
+        return self.flight_dao.get_flights_to_cancel(date_from, date_to, aircraft_id, airport)
+
+    def mass_cancel_flights(self, date_from, date_to, aircraft_id=None, airport=None):
+        """Cancels every upcoming flight of a grounded aircraft and/or a closed airport in a window."""
+        if not aircraft_id and not airport:
+            return {"status": "error", "message": "Select an aircraft or an airport."}
+
+        flights = self.flight_dao.get_flights_to_cancel(date_from, date_to, aircraft_id, airport)
+        result = self.flight_dao.bulk_cancel_flights([f['flight_id'] for f in flights])
+        PositioningIndex.invalidate()
+        BookingService.invalidate_order_views()
+
+        if result['status'] == 'success':
+            soon = sum(1 for f in flights if f['departure_time'] - datetime.now() < timedelta(hours=24))
+            result['message'] = (f"{result['flights_cancelled']} flights cancelled. "
+                                 f"{result['orders_refunded']} orders refunded.")
+            if soon:
+                result['status'] = 'warning'
+                result['message'] = f"Warning: {soon} flights were due to depart within 24h. " + result['message']
+        return result
 
     # --- Dashboard Stats ---
     def get_admin_dashboard_stats(self):
-        """Aggregates all KPIs for the admin dashboard."""
-        return {
-            'kpi_occupancy': self.stats_dao.get_avg_fleet_occupancy(),
-            'rev_by_manufacturer': self.stats_dao.get_revenue_by_manufacturer(),
-            'emp_hours': self.stats_dao.get_employee_flight_hours(),
-            'cancel_rates': self.stats_dao.get_monthly_cancellation_rate(),
-            'aircraft_activity': self.stats_dao.get_aircraft_activity_30_days() # Updated to new method
-        }
+        """
+        Aggregates all KPIs for the admin dashboard, running the queries concurrently
+        (each StatisticsDAO call takes its own pooled connection). A KPI that misses its timeout
+        or fails is served from its last good value and listed in 'stale_kpis'.
+        """
+        started = time.monotonic()
+        futures = {name: self._submit_kpi(name, method) for name, (method, _, _) in self.DASHBOARD_KPIS.items()}
+
+        stats = {}
+        stale = []
+        for name, future in futures.items():
+            _, timeout, default = self.DASHBOARD_KPIS[name]
+            try:
+                stats[name] = future.result(timeout=max(0, started + timeout - time.monotonic()))
+            except Exception as e:
+                if not isinstance(e, FutureTimeout):
+                    print(f"Error computing dashboard KPI {name}: {e}")
+                cached = self._kpi_last_good.get(name, default)
+                stats[name] = default if cached is None else cached
+                stale.append(name)
+
+        stats['stale_kpis'] = stale
+        return stats
+
+    def _submit_kpi(self, name, method):
+        """Starts a KPI query on the shared executor, or joins the one already running for it."""
+        cls = type(self)
+        submitted = False
+        with cls._kpi_lock:
+            if cls._kpi_executor_pid != os.getpid():
+                # First use in this process (threads do not survive a fork)
+                cls._kpi_executor = ThreadPoolExecutor(max_workers=cls.DASHBOARD_WORKERS, thread_name_prefix='dashboard-kpi')
+                cls._kpi_executor_pid = os.getpid()
+                cls._kpi_inflight = {}
+
+            future = cls._kpi_inflight.get(name)
+            if future is None:
+                future = cls._kpi_executor.submit(getattr(self.stats_dao, method))
+                cls._kpi_inflight[name] = future
+                submitted = True
+
+        if submitted:
+            # Registered outside the lock: a future that already finished runs the callback inline
+            future.add_done_callback(lambda f: cls._kpi_finished(name, f))
+        return future
+
+    @classmethod
+    def _kpi_finished(cls, name, future):
+        """Clears the in-flight slot and remembers successful results (even ones that arrived late)."""
+        with cls._kpi_lock:
+            if cls._kpi_inflight.get(name) is future:
+                del cls._kpi_inflight[name]
+        if not future.cancelled() and future.exception() is None:
+            cls._kpi_last_good.set(name, future.result())
 
     # --- Fleet Management ---
     def register_new_aircraft(self, manufacturer, size, economy_seats, business_seats, purchase_date=None):
@@ -0,0 +1,94 @@
+"""
+File: positioning_index.py
+Purpose: In-memory index of upcoming flights per (from, to) airport pair, used to position crew.
+"""
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from app.models.daos.cache_invalidations import CacheInvalidations
+
+class PositioningIndex:
+    """
+    Process-wide index of bookable flights, keyed by (origin, destination) and sorted by arrival time.
+    Answers "latest inbound flight arriving before T" with a binary search instead of a table scan.
+    """
+    REFRESH_INTERVAL = timedelta(seconds=60)
+
+    # Shared across instances (same idea as the DBManager singleton state)
+    _legs = None           # {(from, to): ([arrival_time, ...], [flight, ...])} sorted by arrival
+    _inbound_origins = None  # {to: {from, ...}}
+    _built_at = None
+    _lock = threading.Lock()
+
+    def __init__(self, crew_dao):
+        self.crew_dao = crew_dao
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the index so the next lookup rebuilds it (call after schedule changes, in every process)."""
+        CacheInvalidations.publish('positioning_index')
+
+    @classmethod
+    def _invalidate_local(cls, key=None):
+        """CacheInvalidations handler: drops this process's copy."""
+        with cls._lock:
+            cls._legs = None
+            cls._inbound_origins = None
+            cls._built_at = None
+
+    def _ensure_built(self):
+        """Rebuilds the index if it was invalidated or is older than REFRESH_INTERVAL."""
+        CacheInvalidations.poll()
+        cls = type(self)
+        if cls._legs is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+            return cls._legs, cls._inbound_origins
+
+        with cls._lock:
+            # Another thread may have rebuilt it while we waited
+            if cls._legs is not None and datetime.now() - cls._built_at < cls.REFRESH_INTERVAL:
+                return cls._legs, cls._inbound_origins
+
+            flights = self.crew_dao.fetch_positioning_flights()
+            flights.sort(key=lambda f: f['arrival_time'])
+
+            legs = {}
+            inbound_origins = {}
+            for flight in flights:
+                key = (flight['origin_airport'], flight['destination_airport'])
+                arrivals, leg_flights = legs.setdefault(key, ([], []))
+                arrivals.append(flight['arrival_time'])
+                leg_flights.append(flight)
+                inbound_origins.setdefault(flight['destination_airport'], set()).add(flight['origin_airport'])
+
+            cls._legs = legs
+            cls._inbound_origins = inbound_origins
+            cls._built_at = datetime.now()
+            return legs, inbound_origins
+
+    def latest_inbound(self, from_airport, to_airport, arrive_by, min_seats=1):
+        """Returns the latest flight from -> to landing no later than arrive_by with seats left, or None."""
+        legs, _ = self._ensure_built()
+        leg = legs.get((from_airport, to_airport))
+        if not leg:
+            return None
+
+        arrivals, leg_flights = leg
+        i = bisect_right(arrivals, arrive_by) - 1
+        # Walk back past full flights (rarely more than a step or two)
+        while i >= 0:
+            if (leg_flights[i]['seats_available'] or 0) >= min_seats:
+                return leg_flights[i]
+            i -= 1
+        return None
+
+    def inbound_flights(self, to_airport, arrive_by, min_seats=1):
+        """Maps every airport with a usable positioning flight into to_airport to that flight."""
+        _, inbound_origins = self._ensure_built()
+        result = {}
+        for from_airport in inbound_origins.get(to_airport, ()):
+            flight = self.latest_inbound(from_airport, to_airport, arrive_by, min_seats)
+            if flight:
+                result[from_airport] = flight
+        return result
+
+CacheInvalidations.register('positioning_index', PositioningIndex._invalidate_local)
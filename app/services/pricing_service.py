@@ -0,0 +1,111 @@
+"""
+File: pricing_service.py
+Purpose: Service Layer for Bulk Fare Repricing (Filters, Dry-run preview, Batched updates).
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from app.models.daos.flight_dao import FlightDAO
+
+class PricingService:
+    """
+    Reprices many flights at once: selects targets with a single aggregated query,
+    previews the new fares and projected revenue delta, then applies set-based UPDATEs in batches.
+    """
+    MODES = ('percent', 'absolute')
+    BATCH_SIZE = 500
+
+    def __init__(self, db_manager):
+        self.flight_dao = FlightDAO(db_manager)
+
+    def reprice(self, filters, mode, economy_change, business_change, dry_run=True):
+        """
+        filters: date_from, date_to (required), origin, destination, aircraft_size,
+                 min_load_factor, max_load_factor (0-1).
+        mode: 'percent' (e.g. 10 = +10%) or 'absolute' (e.g. -25 = $25 cheaper).
+        Returns a summary with per-flight preview rows and totals; writes only when dry_run is False.
+        """
+        if mode not in self.MODES:
+            return {"status": "error", "message": f"Unknown repricing mode '{mode}'."}
+
+        try:
+            eco = self._to_factor_offset(mode, economy_change)
+            bus = self._to_factor_offset(mode, business_change)
+        except (TypeError, ValueError, ArithmeticError):
+            return {"status": "error", "message": "Invalid price change."}
+
+        if not filters.get('date_from') or not filters.get('date_to'):
+            return {"status": "error", "message": "A date window is required."}
+        if filters['date_to'] <= filters['date_from']:
+            return {"status": "error", "message": "End date must be after start date."}
+
+        flights = self.flight_dao.get_reprice_targets(
+            filters['date_from'], filters['date_to'],
+            origin=filters.get('origin'),
+            destination=filters.get('destination'),
+            aircraft_size=filters.get('aircraft_size'),
+            min_load_factor=filters.get('min_load_factor'),
+            max_load_factor=filters.get('max_load_factor')
+        )
+
+        preview = []
+        total_delta = Decimal('0')
+        for flight in flights:
+            old_eco = Decimal(str(flight['economy_price'] or 0))
+            old_bus = Decimal(str(flight['business_price'] or 0))
+            new_eco = self._apply(old_eco, eco)
+            new_bus = self._apply(old_bus, bus) if old_bus > 0 else old_bus
+
+            # Sold tickets keep their price, so only unsold seats move revenue
+            eco_unsold = max(int(flight['economy_seats']) - int(flight['economy_sold']), 0)
+            bus_unsold = max(int(flight['business_seats']) - int(flight['business_sold']), 0)
+            delta = (new_eco - old_eco) * eco_unsold + (new_bus - old_bus) * bus_unsold
+            total_delta += delta
+
+            preview.append({
+                'flight_id': flight['flight_id'],
+                'departure_time': flight['departure_time'],
+                'origin_airport': flight['origin_airport'],
+                'destination_airport': flight['destination_airport'],
+                'aircraft_size': flight['aircraft_size'],
+                'load_factor': float(flight['load_factor']) if flight['load_factor'] is not None else None,
+                'old_economy_price': old_eco,
+                'new_economy_price': new_eco,
+                'old_business_price': old_bus,
+                'new_business_price': new_bus,
+                'revenue_delta': delta
+            })
+
+        summary = {
+            "status": "success",
+            "dry_run": dry_run,
+            "flights_matched": len(preview),
+            "flights_updated": 0,
+            "projected_revenue_delta": total_delta,
+            "flights": preview
+        }
+
+        if dry_run or not preview:
+            return summary
+
+        res = self.flight_dao.bulk_update_prices(
+            [row['flight_id'] for row in preview], eco, bus, self.BATCH_SIZE
+        )
+        summary["flights_updated"] = res["updated"]
+        if res["status"] != "success":
+            summary["status"] = "error"
+            summary["message"] = f"Repricing stopped after {res['updated']} flights: {res['message']}"
+        return summary
+
+    @staticmethod
+    def _to_factor_offset(mode, change):
+        """Normalizes a change to (factor, offset) so preview and SQL share one formula."""
+        change = Decimal(str(change or 0))
+        if mode == 'percent':
+            return (1 + change / 100, Decimal('0'))
+        return (Decimal('1'), change)
+
+    @staticmethod
+    def _apply(price, factor_offset):
+        """Python mirror of the UPDATE expression: GREATEST(0, ROUND(price * factor + offset, 2))."""
+        factor, offset = factor_offset
+        new_price = (price * factor + offset).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        return max(new_price, Decimal('0'))
@@ -0,0 +1,74 @@
+"""
+File: report_cache.py
+Purpose: Cached access to the StatisticsDAO reports (per-report TTL, stale-while-revalidate).
+"""
+from datetime import date, datetime, timedelta
+from app.utils.cache import StaleWhileRevalidateCache
+from app.models.daos.statistics_dao import StatisticsDAO
+from app.models.daos.cache_invalidations import CacheInvalidations
+
+class ReportCache:
+    """
+    Process-wide report cache shared by every instance. A report is recomputed at most once per TTL.
+    After that, admins keep getting the previous result (up to MAX_STALE seconds old) while one
+    background refresh runs. Results for explicit date ranges (arbitrary, request-controlled keys)
+    live in a separate, smaller LRU so ad-hoc ranges can neither grow memory without bound nor
+    evict the default dashboards.
+    """
+    # StatisticsDAO method -> seconds a result counts as fresh
+    REPORT_TTLS = {
+        'get_avg_fleet_occupancy': 60,
+        'get_recent_flights_occupancy': 60,
+        'get_revenue_by_manufacturer': 300,
+        'get_employee_flight_hours': 300,
+        'get_cancellation_rate': 600,
+        'get_aircraft_activity': 300,
+        'get_series': 300
+    }
+    MAX_STALE = 3600
+    MAX_ENTRIES = 64        # Default ranges: one entry per report and granularity
+    MAX_RANGE_ENTRIES = 128 # Explicit date ranges (and time series)
+
+    _cache = StaleWhileRevalidateCache(max_stale=MAX_STALE, max_entries=MAX_ENTRIES)
+    _range_cache = StaleWhileRevalidateCache(max_stale=MAX_STALE, max_entries=MAX_RANGE_ENTRIES)
+
+    def __init__(self, stats_dao):
+        self.stats_dao = stats_dao
+
+    def get(self, report, *args):
+        """Returns (result, age in seconds) of a StatisticsDAO report."""
+        CacheInvalidations.poll()
+        method = getattr(self.stats_dao, report)
+        cache = self._range_cache if any(isinstance(arg, date) for arg in args) else self._cache
+        return cache.get((report, *args), lambda: method(*args), self.REPORT_TTLS[report])
+
+    @staticmethod
+    def parse_range(date_from=None, date_to=None, granularity=None):
+        """
+        Validates report parameters from a request: 'YYYY-MM-DD' dates (date_to inclusive) and a granularity.
+        Returns ((date_from, date_to exclusive, granularity), None) or (None, error message).
+        """
+        try:
+            start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d').date() + timedelta(days=1) if date_to else None
+        except ValueError:
+            return None, "Dates must be YYYY-MM-DD."
+        if start and end and start >= end:
+            return None, "Start date must be before end date."
+        if granularity and granularity not in StatisticsDAO.GRANULARITIES:
+            return None, f"Granularity must be one of: {', '.join(StatisticsDAO.GRANULARITIES)}."
+        return (start, end, granularity or None), None
+
+    @classmethod
+    def invalidate(cls, report=None):
+        """Forces the next request, on any worker, to recompute one report (all argument variants) or every report."""
+        CacheInvalidations.publish('reports', report)
+
+    @classmethod
+    def _invalidate_local(cls, report=None):
+        """CacheInvalidations handler: clears this process's copies."""
+        predicate = None if report is None else (lambda key: key[0] == report)
+        cls._cache.invalidate(predicate)
+        cls._range_cache.invalidate(predicate)
+
+CacheInvalidations.register('reports', ReportCache._invalidate_local)
@@ -0,0 +1,28 @@
+"""
+File: rollup_service.py
+Purpose: Service Layer for refreshing the report rollup tables.
+"""
+import time
+from app.models.daos.rollup_dao import RollupDAO
+
+class RollupService:
+    """
+    Runs the incremental rollup refresh (scheduled via app/utils/refresh_rollups.py).
+    Reports read everything from the last refresh day on live, so a missed run makes them slower, not stale;
+    closed days are as current as the last run. Run with full=True after aircraft cabins are reconfigured,
+    because capacities are stored per flight.
+    """
+    def __init__(self, db_manager):
+        self.rollup_dao = RollupDAO(db_manager)
+
+    def refresh(self, full=False):
+        """Refreshes touched partitions (or everything) and reports what was done."""
+        started = time.perf_counter()
+        result = self.rollup_dao.refresh(full=full)
+        result['elapsed_sec'] = round(time.perf_counter() - started, 2)
+
+        if result['status'] == 'success':
+            kind = "Full rebuild" if result['full'] else "Incremental refresh"
+            result['message'] = (f"{kind}: {result['days_refreshed']} days, {result['months_refreshed']} months "
+                                 f"in {result['elapsed_sec']}s (live from {result['live_date']}).")
+        return result
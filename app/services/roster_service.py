@@ -0,0 +1,279 @@
+"""
+File: roster_service.py
+Purpose: Service Layer for Automatic Crew Rostering (Bulk assignment over a planning horizon).
+"""
+import heapq
+import os
+import subprocess
+import sys
+import time
+import uuid
+from bisect import bisect_left
+from datetime import timedelta
+from app.models.daos.crew_dao import CrewDAO
+from app.models.daos.roster_job_dao import RosterJobDAO
+from app.models.daos.statistics_dao import StatisticsDAO
+from app.services.crew_service import CrewService
+from app.services.positioning_index import PositioningIndex
+
+class RosterService:
+    """
+    Fills every unstaffed flight in a date range, respecting the same rules as the wizard
+    (quotas, overlap, location, long-haul certification) plus a minimum rest between duties.
+    Candidates are ranked like the wizard, with accumulated flight hours as the tie-breaker.
+    """
+    MIN_REST = timedelta(hours=10)
+    BATCH_SIZE = 200  # Flights per write transaction
+
+    # Background jobs run in their own process (app/utils/run_roster_job.py), so any worker can
+    # report on them and recycling or restarting a web worker does not cut a roster short
+    JOB_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils/run_roster_job.py'))
+    PROGRESS_INTERVAL = 1.0  # Seconds between progress writes
+    STALL_AFTER = 300        # Seconds without a heartbeat before a job is reported as stalled
+
+    def __init__(self, db_manager):
+        self.crew_dao = CrewDAO(db_manager)
+        self.stats_dao = StatisticsDAO(db_manager)
+        self.job_dao = RosterJobDAO(db_manager)
+        self.positioning_index = PositioningIndex(self.crew_dao)
+
+    # --- Background Jobs ---
+
+    def start_roster_job(self, date_from, date_to):
+        """
+        Records a queued job and starts its process. Refused while another job is queued or running,
+        as two rosters would both staff the same flights. Returns a result dict with the job_id to poll.
+        """
+        active = self.job_dao.get_active_job(self.STALL_AFTER)
+        if active:
+            return {"status": "error", "job_id": active['job_id'],
+                    "message": f"A roster job for {active['date_from']:%Y-%m-%d} - {active['date_to']:%Y-%m-%d} is already {active['status']}."}
+
+        job_id = uuid.uuid4().hex[:12]
+        if not self.job_dao.create_job(job_id, date_from, date_to):
+            return {"status": "error", "job_id": None, "message": "Could not start the roster job."}
+
+        try:
+            # New session: the job is not in the web worker's process group, so it outlives the worker
+            subprocess.Popen([sys.executable, self.JOB_SCRIPT, job_id], start_new_session=True,
+                             stdin=subprocess.DEVNULL)
+        except OSError as e:
+            print(f"Error starting roster job: {e}")
+            self.job_dao.finish_job(job_id, 'failed', error=f"Could not start the job process: {e}")
+        return {"status": "success", "job_id": job_id, "message": "Roster job started."}
+
+    def get_job(self, job_id):
+        """Returns a job's state, or None if unknown. A running job without a recent heartbeat is reported as failed."""
+        job = self.job_dao.get_job(job_id)
+        if job and job['status'] in ('queued', 'running') and job['heartbeat_age'] > self.STALL_AFTER:
+            job['status'] = 'failed'
+            job['error'] = "The job process stopped responding. Start the roster again; staffed flights are kept."
+        return job
+
+    def run_job(self, job_id):
+        """Job body (job process): runs the roster and records progress, result or error. False if not queued."""
+        job = self.job_dao.get_job(job_id)
+        if not job or not self.job_dao.mark_running(job_id):
+            return False
+
+        last_write = 0.0
+        def report_progress(processed, total):
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write >= self.PROGRESS_INTERVAL or processed == total:
+                last_write = now
+                self.job_dao.update_progress(job_id, processed, total)
+
+        try:
+            result = self.generate_roster(job['date_from'], job['date_to'], progress=report_progress)
+            self.job_dao.finish_job(job_id, 'completed', result=result)
+        except Exception as e:
+            print(f"Error generating roster: {e}")
+            self.job_dao.finish_job(job_id, 'failed', error=str(e))
+        return True
+
+    # --- Core Logic ---
+
+    def generate_roster(self, date_from, date_to, progress=None, dry_run=False):
+        """
+        Assigns crew to all unstaffed flights departing in [date_from, date_to).
+        Flights are processed in departure order, so crew locations only ever move forward in time.
+        Returns a summary dict; flights that cannot be fully staffed are left untouched.
+        Holds the roster lock throughout (unless dry_run) and raises RuntimeError if another roster runs.
+        """
+        if dry_run:
+            return self._generate_roster(date_from, date_to, progress, dry_run)
+
+        lock = self.crew_dao.acquire_roster_lock()
+        if lock is None:
+            raise RuntimeError("Another roster is being generated; try again when it finishes.")
+        try:
+            return self._generate_roster(date_from, date_to, progress, dry_run)
+        finally:
+            self.crew_dao.release_roster_lock(lock)
+
+    def _generate_roster(self, date_from, date_to, progress, dry_run):
+        """generate_roster body (runs under the roster lock)."""
+        clock_start = time.perf_counter()
+
+        flights = self.crew_dao.fetch_unstaffed_flights(date_from, date_to)
+        total = len(flights)
+        crew, buckets, events = self._load_crew_state(date_from, date_to)
+
+        pending = []
+        unstaffed = []
+        assignments_count = 0
+        transfers_count = 0
+
+        for i, flight in enumerate(flights, start=1):
+            departure = flight['departure_time']
+
+            # Move crew whose duties ended before this departure to their landing airport
+            while events and events[0][0] <= departure:
+                _, employee_id, airport = heapq.heappop(events)
+                self._move(crew, buckets, employee_id, airport)
+
+            selection = self._select_crew(flight, crew, buckets)
+            if selection is None:
+                unstaffed.append(flight['flight_id'])
+            else:
+                for employee_id, transfer in selection:
+                    self._commit_duty(crew, buckets, events, employee_id, flight)
+                    pending.append((flight['flight_id'], employee_id))
+                    transfers_count += 1 if transfer else 0
+
+            if not dry_run and pending and i % self.BATCH_SIZE == 0:
+                assignments_count += self.crew_dao.insert_assignments_bulk(pending)
+                pending = []
+
+            if progress:
+                progress(i, total)
+
+        if dry_run:
+            assignments_count += len(pending)
+        elif pending:
+            assignments_count += self.crew_dao.insert_assignments_bulk(pending)
+
+        elapsed = time.perf_counter() - clock_start
+        return {
+            "flights_total": total,
+            "flights_staffed": total - len(unstaffed),
+            "unstaffed_flight_ids": unstaffed,
+            "assignments": assignments_count,
+            "transfers": transfers_count,
+            "elapsed_sec": round(elapsed, 2)
+        }
+
+    def _load_crew_state(self, date_from, date_to):
+        """Builds per-employee state, location buckets and the duty-end event heap."""
+        hours = self.stats_dao.get_employee_hours_totals()
+        locations = self.crew_dao.fetch_locations_as_of(date_from)
+
+        crew = {}
+        buckets = {}
+        for member in self.crew_dao.fetch_crew_pool():
+            employee_id = member['employee_id']
+            location = locations.get(employee_id, member['current_location'])
+            crew[employee_id] = {
+                'role': member['role'],
+                'certified': bool(member['long_haul_certified']),
+                'location': location,
+                'hours': hours.get(employee_id, 0.0),
+                'starts': [],  # Sorted busy_start values (for bisect)
+                'duties': []   # (busy_start, busy_end, start_location, end_location), same order
+            }
+            buckets.setdefault((member['role'], location), set()).add(employee_id)
+
+        # Existing duties around the horizon: needed for overlap, rest and chain checks.
+        # The extra day after date_to catches assignments that the last flights would run into.
+        events = []
+        window = self.crew_dao.fetch_timeline_window(date_from - self.MIN_REST, date_to + timedelta(days=1))
+        for duty in window:
+            state = crew.get(duty['employee_id'])
+            if not state:
+                continue
+            self._add_duty(state, duty['busy_start'], duty['busy_end'], duty['start_location'], duty['end_location'])
+            heapq.heappush(events, (duty['busy_end'], duty['employee_id'], duty['end_location']))
+
+        return crew, buckets, events
+
+    def _select_crew(self, flight, crew, buckets):
+        """Picks crew for every role of a flight, or returns None if any quota cannot be met."""
+        pilots_needed, attendants_needed = CrewService.get_crew_quotas(flight['aircraft_size'])
+        origin = flight['origin_airport']
+        is_long = flight['route_type'] == 'Long'
+        start = flight['departure_time']
+        end = flight['calculated_end_time']
+
+        inbound = self.positioning_index.inbound_flights(origin, start - CrewService.TRANSFER_BUFFER)
+
+        selection = []
+        for role, needed in (('Pilot', pilots_needed), ('Flight Attendant', attendants_needed)):
+            ranked = []
+
+            # Local crew first, then crew that can be positioned on an inbound flight
+            sources = [(origin, None)] + [(airport, transfer) for airport, transfer in inbound.items()]
+            for airport, transfer in sources:
+                ready_by = transfer['departure_time'] if transfer else start
+                for employee_id in buckets.get((role, airport), ()):
+                    state = crew[employee_id]
+                    if is_long and not state['certified']:
+                        continue
+                    if not self._fits_schedule(state, start, end, ready_by, flight['destination_airport']):
+                        continue
+                    overqualified = 1 if (not is_long and state['certified']) else 0
+                    ranked.append(((1 if transfer else 0, overqualified, state['hours']), employee_id, transfer))
+
+            if len(ranked) < needed:
+                return None
+
+            ranked.sort(key=lambda item: item[0])
+            selection.extend((employee_id, transfer) for _, employee_id, transfer in ranked[:needed])
+
+        return selection
+
+    def _fits_schedule(self, state, start, end, ready_by, destination):
+        """Overlap, rest and chain checks against the employee's neighbouring duties."""
+        i = bisect_left(state['starts'], start)
+
+        if i > 0:
+            _, prev_end, _, _ = state['duties'][i - 1]
+            # Rested before reporting (or before boarding the positioning flight)
+            if prev_end + self.MIN_REST > min(start, ready_by):
+                return False
+
+        if i < len(state['duties']):
+            next_start, _, next_origin, _ = state['duties'][i]
+            # Rested before the next duty, and it must depart from where this flight lands
+            if end + self.MIN_REST > next_start or next_origin != destination:
+                return False
+
+        return True
+
+    def _commit_duty(self, crew, buckets, events, employee_id, flight):
+        """Records a new assignment in memory so later flights see it."""
+        state = crew[employee_id]
+        self._add_duty(state, flight['departure_time'], flight['calculated_end_time'],
+                       flight['origin_airport'], flight['destination_airport'])
+        state['hours'] += flight['flight_duration'].total_seconds() / 3600
+
+        # Later flights all depart after this one, so the crew member is effectively at the origin now
+        self._move(crew, buckets, employee_id, flight['origin_airport'])
+        heapq.heappush(events, (flight['calculated_end_time'], employee_id, flight['destination_airport']))
+
+    @staticmethod
+    def _add_duty(state, busy_start, busy_end, start_location, end_location):
+        """Inserts a duty keeping starts/duties sorted by start time."""
+        i = bisect_left(state['starts'], busy_start)
+        state['starts'].insert(i, busy_start)
+        state['duties'].insert(i, (busy_start, busy_end, start_location, end_location))
+
+    @staticmethod
+    def _move(crew, buckets, employee_id, airport):
+        """Moves an employee between (role, airport) buckets."""
+        state = crew.get(employee_id)
+        if not state or state['location'] == airport:
+            return
+        buckets.get((state['role'], state['location']), set()).discard(employee_id)
+        buckets.setdefault((state['role'], airport), set()).add(employee_id)
+        state['location'] = airport
@@ -0,0 +1,234 @@
+"""
+File: schedule_service.py
+Purpose: Service Layer for Bulk Scheduling (Recurring rules, CSV import, Auto-assignment).
+"""
+import csv
+import time
+from datetime import datetime, timedelta
+from app.models.daos.flight_dao import FlightDAO
+from app.services.aircraft_service import AircraftService
+from app.services.roster_service import RosterService
+from app.services.positioning_index import PositioningIndex
+
+class ScheduleService:
+    """
+    Builds season schedules in bulk: expands recurrence rules or reads a CSV, validates every
+    flight in memory against the route graph, then inserts them with chunked multi-row INSERTs.
+    """
+    CSV_COLUMNS = ('origin', 'destination', 'departure_time', 'economy_price', 'business_price')
+    DAY_NAMES = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+    MAX_REPORTED_ERRORS = 50
+    CSV_ENCODING_ERROR = "CSV file is not UTF-8 encoded (save it as 'CSV UTF-8')"
+
+    def __init__(self, db_manager):
+        self.flight_dao = FlightDAO(db_manager)
+        self.aircraft_service = AircraftService(db_manager)
+        self.roster_service = RosterService(db_manager)
+
+    # --- Input Parsing ---
+
+    def expand_rules(self, rules):
+        """
+        Expands recurrence rules into flight specs.
+        Rule keys: origin, destination, days ('Mon,Wed' / ['mon', 'wed'] / [1, 3] with ISO 1=Mon),
+        time ('HH:MM'), date_from, date_to ('YYYY-MM-DD', inclusive), economy_price, business_price.
+        Returns (specs, errors).
+        """
+        specs = []
+        errors = []
+        for n, rule in enumerate(rules, start=1):
+            try:
+                weekdays = self._parse_days(rule['days'])
+                dep_time = datetime.strptime(rule['time'], '%H:%M').time()
+                day = datetime.strptime(rule['date_from'], '%Y-%m-%d').date()
+                last_day = datetime.strptime(rule['date_to'], '%Y-%m-%d').date()
+            except (KeyError, ValueError) as e:
+                errors.append(f"Rule {n}: invalid or missing field ({e})")
+                continue
+
+            while day <= last_day:
+                if day.weekday() in weekdays:
+                    specs.append({
+                        'source': f"Rule {n}",
+                        'origin': rule.get('origin'),
+                        'destination': rule.get('destination'),
+                        'departure_time': datetime.combine(day, dep_time),
+                        'economy_price': rule.get('economy_price'),
+                        'business_price': rule.get('business_price', 0)
+                    })
+                day += timedelta(days=1)
+
+        return specs, errors
+
+    def parse_csv(self, text_stream):
+        """
+        Reads flight specs from a CSV with a header row:
+        origin,destination,departure_time (YYYY-MM-DD HH:MM),economy_price,business_price
+        Returns (specs, errors).
+        """
+        reader = csv.DictReader(text_stream)
+        missing = [c for c in self.CSV_COLUMNS[:4] if c not in (reader.fieldnames or [])]
+        if missing:
+            return [], [f"CSV is missing columns: {', '.join(missing)}"]
+
+        specs = []
+        errors = []
+        for n, row in enumerate(reader, start=2): # Line 1 is the header
+            if row['departure_time'] is None: # Short row: DictReader fills the missing columns with None
+                errors.append(f"Line {n}: missing columns (expected {', '.join(self.CSV_COLUMNS[:4])})")
+                continue
+            try:
+                departure = datetime.strptime(row['departure_time'].strip(), '%Y-%m-%d %H:%M')
+            except ValueError:
+                errors.append(f"Line {n}: invalid departure_time '{row['departure_time']}'")
+                continue
+            specs.append({
+                'source': f"Line {n}",
+                'origin': (row['origin'] or '').strip(),
+                'destination': (row['destination'] or '').strip(),
+                'departure_time': departure,
+                'economy_price': row['economy_price'],
+                'business_price': row.get('business_price') or 0
+            })
+        return specs, errors
+
+    def _parse_days(self, days):
+        """Normalizes day-of-week input to a set of Python weekday numbers (Mon=0)."""
+        if isinstance(days, str):
+            days = [d for d in days.replace(' ', '').split(',') if d]
+
+        weekdays = set()
+        for d in days:
+            if isinstance(d, int) or str(d).isdigit():
+                iso = int(d)
+                if not 1 <= iso <= 7:
+                    raise ValueError(f"day {d} out of range 1-7")
+                weekdays.add(iso - 1)
+            else:
+                weekdays.add(self.DAY_NAMES[str(d).lower()[:3]])
+        if not weekdays:
+            raise ValueError("no days given")
+        return weekdays
+
+    # --- Validation ---
+
+    def validate(self, specs):
+        """
+        Validates specs in memory (route exists, future date, prices, duplicates) using a
+        single route-graph load and a single existing-departures load.
+        Returns (rows ready for FlightDAO.bulk_insert_flights, errors).
+        """
+        if not specs:
+            return [], []
+
+        route_map = self.flight_dao.get_route_map()
+        now = datetime.now()
+        first = min(s['departure_time'] for s in specs)
+        last = max(s['departure_time'] for s in specs)
+        taken = self.flight_dao.get_existing_departures(first, last)
+
+        rows = []
+        errors = []
+        for spec in specs:
+            route = route_map.get((spec['origin'], spec['destination']))
+            if not route:
+                errors.append(f"{spec['source']}: no route from {spec['origin']} to {spec['destination']}")
+                continue
+
+            if spec['departure_time'] < now:
+                errors.append(f"{spec['source']}: departure {spec['departure_time']} is in the past")
+                continue
+
+            try:
+                economy_price = float(spec['economy_price'])
+                business_price = float(spec['business_price'] or 0)
+            except (TypeError, ValueError):
+                errors.append(f"{spec['source']}: invalid price")
+                continue
+            if economy_price < 0 or business_price < 0:
+                errors.append(f"{spec['source']}: you can not create a flight with negative price")
+                continue
+
+            key = (route['route_id'], spec['departure_time'])
+            if key in taken:
+                errors.append(f"{spec['source']}: {spec['origin']}-{spec['destination']} at {spec['departure_time']} already exists")
+                continue
+            taken.add(key)
+
+            rows.append((route['route_id'], spec['departure_time'], economy_price, business_price))
+
+        return rows, errors
+
+    # --- Import ---
+
+    def import_schedule(self, specs, auto_assign=False, dry_run=False, chunk_size=500):
+        """
+        Validates and inserts a batch of flight specs (all-or-nothing on validation errors),
+        optionally auto-assigning aircraft and crew. Returns a summary with the insert throughput
+        (flights_per_sec covers the INSERTs only) and the time of each assignment step.
+        """
+        clock_start = time.perf_counter()
+        rows, errors = self.validate(specs)
+
+        summary = {
+            "status": "success",
+            "flights_requested": len(specs),
+            "flights_valid": len(rows),
+            "inserted": 0,
+            "errors": errors[:self.MAX_REPORTED_ERRORS],
+            "error_count": len(errors)
+        }
+
+        if errors:
+            summary["status"] = "error"
+            summary["message"] = f"{len(errors)} invalid flight(s); nothing was imported."
+            return summary
+
+        if dry_run or not rows:
+            summary["elapsed_sec"] = round(time.perf_counter() - clock_start, 3)
+            return summary
+
+        # 1. Insert
+        insert_start = time.perf_counter()
+        res = self.flight_dao.bulk_insert_flights(rows, chunk_size)
+        insert_elapsed = time.perf_counter() - insert_start
+
+        summary["inserted"] = res["inserted"]
+        summary["insert_sec"] = round(insert_elapsed, 3)
+        summary["flights_per_sec"] = round(res["inserted"] / insert_elapsed, 1) if insert_elapsed > 0 else None
+        if res["status"] != "success":
+            summary["status"] = "error"
+            summary["message"] = f"Import stopped after {res['inserted']} flights: {res['message']}"
+
+        PositioningIndex.invalidate()
+
+        # 2. Optional auto-assignment over the imported window
+        if auto_assign and res["inserted"]:
+            first = min(r[1] for r in rows)
+            last = max(r[1] for r in rows) + timedelta(seconds=1)
+            step_start = time.perf_counter()
+            summary["aircraft_assigned"] = self.auto_assign_aircraft(first, last)
+            summary["aircraft_assign_sec"] = round(time.perf_counter() - step_start, 3)
+
+            step_start = time.perf_counter()
+            try:
+                summary["roster"] = self.roster_service.generate_roster(first, last)
+            except RuntimeError as e:
+                summary["roster"] = {"flights_staffed": 0, "flights_total": 0, "assignments": 0}
+                summary["status"] = "error"
+                summary["message"] = f"Flights imported, crew not assigned: {e}"
+            summary["roster_sec"] = round(time.perf_counter() - step_start, 3)
+
+        summary["elapsed_sec"] = round(time.perf_counter() - clock_start, 3)
+        return summary
+
+    def auto_assign_aircraft(self, start_time, end_time):
+        """
+        Assigns the best-scored aircraft to every flight in the window that has none (departure order),
+        planned in memory and written in chunks. Returns the number of flights assigned.
+        """
+        flights = self.flight_dao.get_flights_without_aircraft(start_time, end_time)
+        res = self.aircraft_service.assign_aircraft_batch(flights)
+        if res["status"] != "success":
+            print(f"Error assigning aircraft: {res['message']}")
+        return res["assigned"]
@@ -3,8 +3,23 @@ File: seat_service.py
 Purpose: Service Layer for Seat Configuration.
 """
 import math
+from app.models.daos.aircraft_layouts import AircraftLayouts
 
 class SeatService:
+    # Recomputes the stored capacity row of one aircraft from its class ranges
+    CAPACITY_DELETE_SQL = "DELETE FROM aircraft_capacity WHERE aircraft_id = %s"
+    CAPACITY_INSERT_SQL = """
+        INSERT INTO aircraft_capacity (aircraft_id, total_seats, economy_seats, business_seats)
+        SELECT
+            aircraft_id,
+            SUM((row_end - row_start + 1) * CHAR_LENGTH(columns)),
+            SUM(CASE WHEN class_name = 'Business' THEN 0 ELSE (row_end - row_start + 1) * CHAR_LENGTH(columns) END),
+            SUM(CASE WHEN class_name = 'Business' THEN (row_end - row_start + 1) * CHAR_LENGTH(columns) ELSE 0 END)
+        FROM aircraft_classes
+        WHERE aircraft_id = %s
+        GROUP BY aircraft_id
+    """
+
     def __init__(self, db_manager):
         self.db = db_manager
 
@@ -51,7 +66,12 @@ class SeatService:
                 """
                 cursor.execute(sql_eco, (aircraft_id, current_row, row_end, eco_cols_str))
                 
+            # 3. Stored capacity (same transaction as the classes it is derived from)
+            cursor.execute(self.CAPACITY_DELETE_SQL, (aircraft_id,))
+            cursor.execute(self.CAPACITY_INSERT_SQL, (aircraft_id,))
+
             conn.commit()
+            AircraftLayouts.invalidate()
             print(f"configured Aircraft {aircraft_id} successfully")
             return True
             
@@ -69,8 +89,33 @@ class SeatService:
             INSERT INTO aircraft_classes (aircraft_id, class_name, row_start, row_end, columns)
             VALUES (%s, %s, %s, %s, %s)
         """
-        return self.db.execute_query(sql, (aircraft_id, class_name, row_start, row_end, columns))
+        result = self.db.execute_query(sql, (aircraft_id, class_name, row_start, row_end, columns))
+        self.refresh_capacity(aircraft_id)
+        AircraftLayouts.invalidate()
+        return result
+
+    def refresh_capacity(self, aircraft_id):
+        """Recomputes the stored total/per-class capacity of one aircraft."""
+        conn = self.db.get_connection()
+        if not conn:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute(self.CAPACITY_DELETE_SQL, (aircraft_id,))
+            cursor.execute(self.CAPACITY_INSERT_SQL, (aircraft_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error refreshing capacity for aircraft {aircraft_id}: {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+            conn.close()
         
     def clear_configurations(self):
-        """Truncates the aircraft_classes table."""
-        return self.db.execute_query("TRUNCATE TABLE aircraft_classes") 
+        """Truncates the aircraft_classes table (and the capacities derived from it)."""
+        result = self.db.execute_query("TRUNCATE TABLE aircraft_classes")
+        self.db.execute_query("TRUNCATE TABLE aircraft_capacity")
+        AircraftLayouts.invalidate()
+        return result
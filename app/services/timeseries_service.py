@@ -0,0 +1,110 @@
+"""
+File: timeseries_service.py
+Purpose: Business logic for the Time-Series API (Bookings, seats, revenue and load factor over time).
+"""
+import math
+from datetime import date, datetime, timedelta
+from app.models.daos.statistics_dao import StatisticsDAO
+from app.models.daos.route_catalog import RouteCatalog
+from app.models.daos.aircraft_layouts import AircraftLayouts
+from app.services.report_cache import ReportCache
+
+class TimeSeriesService:
+    """
+    Serves per-route/aircraft/class series from the daily rollup buckets. When the requested
+    resolution would return more than max_points buckets, the next coarser resolution is used,
+    so a multi-year range still comes back as a bounded number of points.
+    """
+    # Resolution -> approximate bucket length in days (finest first)
+    RESOLUTION_DAYS = {'day': 1, 'week': 7, 'month': 30.44, 'quarter': 91.31, 'year': 365.25}
+    METRICS = ('flights', 'bookings', 'seats_sold', 'revenue', 'load_factor')
+    CLASSES = ('Economy', 'Business')
+
+    DEFAULT_DAYS = 365
+    DEFAULT_POINTS = 366
+    MAX_POINTS = 2000
+    MAX_SERIES = 12 # Highest-revenue series when splitting
+
+    def __init__(self, db_manager):
+        self.report_cache = ReportCache(StatisticsDAO(db_manager))
+        self.routes = RouteCatalog(db_manager)
+        self.layouts = AircraftLayouts(db_manager)
+
+    def get_series(self, date_from=None, date_to=None, resolution='day', split_by=None, route_id=None,
+                   aircraft_id=None, travel_class=None, max_points=None):
+        """
+        Returns {"status", "resolution", "downsampled", "date_from", "date_to", "series": [{"key", "points"}]}.
+        date_from/date_to: 'YYYY-MM-DD' (inclusive; default: the last DEFAULT_DAYS days up to today).
+        Points: {"period_start", "flights", "bookings", "seats_sold", "revenue", "load_factor"}.
+        """
+        resolution = resolution or 'day'
+        if resolution not in self.RESOLUTION_DAYS:
+            return {"status": "error", "message": f"Resolution must be one of: {', '.join(self.RESOLUTION_DAYS)}."}
+        if split_by and split_by not in StatisticsDAO.SERIES_SPLITS:
+            return {"status": "error", "message": f"split_by must be one of: {', '.join(StatisticsDAO.SERIES_SPLITS)}."}
+        if travel_class and travel_class not in self.CLASSES:
+            return {"status": "error", "message": f"Class must be one of: {', '.join(self.CLASSES)}."}
+
+        try:
+            route_id = int(route_id) if route_id not in (None, '') else None
+            aircraft_id = int(aircraft_id) if aircraft_id not in (None, '') else None
+            max_points = min(int(max_points), self.MAX_POINTS) if max_points not in (None, '') else self.DEFAULT_POINTS
+            start = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+            end = datetime.strptime(date_to, '%Y-%m-%d').date() + timedelta(days=1) if date_to else None
+        except ValueError:
+            return {"status": "error", "message": "Invalid number or date (dates must be YYYY-MM-DD)."}
+        if max_points < 1:
+            return {"status": "error", "message": "max_points must be positive."}
+
+        end = end or date.today() + timedelta(days=1)
+        start = start or end - timedelta(days=self.DEFAULT_DAYS)
+        if start >= end:
+            return {"status": "error", "message": "Start date must be before end date."}
+
+        # Unknown ids are rejected before they can become cache keys
+        if route_id is not None and route_id not in self.routes.route_ids():
+            return {"status": "error", "message": f"Unknown route: {route_id}"}
+        if aircraft_id is not None and self.layouts.get(aircraft_id) is None:
+            return {"status": "error", "message": f"Unknown or unconfigured aircraft: {aircraft_id}"}
+
+        # max_points only selects one of the fixed resolutions; the cache key holds the resolution,
+        # so any max_points value maps onto at most len(RESOLUTION_DAYS) entries per range
+        chosen = self._resolution_for(resolution, (end - start).days, max_points)
+        rows, age = self.report_cache.get('get_series', start, end, chosen, split_by or None,
+                                          route_id, aircraft_id, travel_class or None)
+
+        series = {}
+        for row in rows:
+            capacity = int(row['capacity'] or 0)
+            seats = int(row['seats_sold'] or 0)
+            series.setdefault(row['series'], []).append({
+                'period_start': row['period_start'].isoformat(),
+                'flights': int(row['flights'] or 0),
+                'bookings': int(row['bookings'] or 0),
+                'seats_sold': seats,
+                'revenue': float(row['revenue'] or 0),
+                'load_factor': round(seats * 100.0 / capacity, 1) if capacity else None
+            })
+
+        ranked = sorted(series.items(), key=lambda item: sum(p['revenue'] for p in item[1]), reverse=True)
+        return {
+            "status": "success",
+            "resolution": chosen,
+            "downsampled": chosen != resolution,
+            "date_from": start.isoformat(),
+            "date_to": (end - timedelta(days=1)).isoformat(),
+            "metrics": list(self.METRICS),
+            "series": [{"key": key, "points": points} for key, points in ranked[:self.MAX_SERIES]],
+            "series_truncated": len(ranked) > self.MAX_SERIES,
+            "cache_age": round(age, 1)
+        }
+
+    def _resolution_for(self, requested, days, max_points):
+        """The requested resolution, or the first coarser one whose bucket count fits max_points."""
+        resolutions = list(self.RESOLUTION_DAYS)
+        for resolution in resolutions[resolutions.index(requested):]:
+            # A range that starts mid-bucket touches one extra bucket
+            buckets = days if resolution == 'day' else math.ceil(days / self.RESOLUTION_DAYS[resolution]) + 1
+            if buckets <= max_points:
+                return resolution
+        return resolutions[-1]
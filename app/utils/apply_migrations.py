@@ -0,0 +1,46 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from database.db_manager import DB
+
+MIGRATIONS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../database/migrations'))
+
+def get_applied_migrations():
+    """
+    Returns the set of migration file names already recorded in schema_migrations.
+    """
+    DB.execute_query("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            migration_name VARCHAR(255) PRIMARY KEY,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    rows = DB.fetch_all("SELECT migration_name FROM schema_migrations")
+    return {row['migration_name'] for row in rows}
+
+def apply_migrations():
+    print("🚀 Applying Database Migrations...")
+
+    applied = get_applied_migrations()
+    pending = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql') and f not in applied)
+
+    if not pending:
+        print("✅ Schema is up to date.")
+        return
+
+    for file_name in pending:
+        # A migration is recorded only when every statement succeeded. MySQL commits DDL
+        # implicitly, so statements before the failing one stay applied: fix the schema
+        # (or the script) by hand before re-running.
+        if not DB.execute_sql_script(os.path.join(MIGRATIONS_DIR, file_name), stop_on_error=True):
+            print(f"❌ Stopped at {file_name} (not recorded in schema_migrations)")
+            return
+
+        DB.execute_query("INSERT INTO schema_migrations (migration_name) VALUES (%s)", (file_name,))
+
+    print(f"✅ Applied {len(pending)} migration(s).")
+
+if __name__ == "__main__":
+    apply_migrations()
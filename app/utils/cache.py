@@ -0,0 +1,181 @@
+"""
+File: cache.py
+Purpose: Thread-safe in-process caches (TTL read-through with negative caching, stale-while-revalidate).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+class TTLCache:
+    """
+    Small process-wide cache. Entries expire after ttl seconds; a loader result of None
+    can be cached separately for negative_ttl seconds so repeated misses skip the database.
+    Values are shared between callers and must be treated as read-only.
+    """
+    _NEGATIVE = object()
+
+    def __init__(self, ttl, max_entries=10000, negative_ttl=None):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, stored_at, value)
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Returns the live (stored_at, value) entry or None; caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def _store(self, key, value, ttl):
+        """Stores an entry and evicts the least recently used ones; caller holds the lock."""
+        now = time.monotonic()
+        self._entries[key] = (now + ttl, now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Returns a cached value (None for a cached miss) or default if absent/expired."""
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is None:
+            return default
+        return None if entry[1] is self._NEGATIVE else entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Caches a value for ttl seconds (defaults to the cache TTL)."""
+        with self._lock:
+            self._store(key, value, self.ttl if ttl is None else ttl)
+
+    def get_or_load(self, key, loader):
+        """Read-through: returns the cached value or calls loader() and caches its result."""
+        with self._lock:
+            entry = self._lookup(key)
+        if entry is not None:
+            return None if entry[1] is self._NEGATIVE else entry[1]
+
+        value = loader()
+        if value is None:
+            if self.negative_ttl:
+                self.set(key, self._NEGATIVE, self.negative_ttl)
+        else:
+            self.set(key, value)
+        return value
+
+    def age(self, key):
+        """Seconds since the entry was stored, or None if it is absent/expired."""
+        with self._lock:
+            entry = self._lookup(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def invalidate(self, key=None):
+        """Drops one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class StaleWhileRevalidateCache:
+    """
+    Serves an entry while it is younger than its ttl. For max_stale seconds after that it is
+    still served while one background load refreshes it. Loads are single-flight: concurrent
+    callers missing the same key wait for one loader call. At most max_entries are kept
+    (least recently used first out); entries past ttl + max_stale are dropped on the next store.
+    """
+
+    def __init__(self, max_stale, workers=2, max_entries=256):
+        self.max_stale = max_stale
+        self.workers = workers
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, value, expires_at)
+        self._inflight = {}  # key -> Future of the running load
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def get(self, key, loader, ttl):
+        """Returns (value, age in seconds), loading on a miss and revalidating in the background when stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[0] if entry else None
+            if entry:
+                self._entries.move_to_end(key)
+            if entry and age < ttl:
+                return entry[1], age
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+            if entry and age < ttl + self.max_stale:
+                if owner:
+                    self._background().submit(self._load, key, loader, future, ttl)
+                return entry[1], age
+
+        # Miss (or too stale): the first caller loads inline, the others wait for its result
+        if owner:
+            self._load(key, loader, future, ttl)
+        value = future.result()
+        age = self.age(key)
+        return value, age if age is not None else 0.0
+
+    def _background(self):
+        """Executor for revalidation, created per process (threads do not survive a fork); caller holds the lock."""
+        if self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cache-revalidate')
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _load(self, key, loader, future, ttl):
+        """Runs loader() and publishes the result unless the key was invalidated meanwhile."""
+        try:
+            value = loader()
+        except Exception as e:
+            print(f"Error loading cache entry {key}: {e}")
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                self._store(key, value, ttl)
+        future.set_result(value)
+
+    def _store(self, key, value, ttl):
+        """Stores an entry, drops expired ones and trims to max_entries (LRU); caller holds the lock."""
+        now = time.monotonic()
+        self._entries[key] = (now, value, now + ttl + self.max_stale)
+        self._entries.move_to_end(key)
+        for expired in [k for k, entry in self._entries.items() if entry[2] <= now]:
+            del self._entries[expired]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def age(self, key):
+        """Seconds since the entry was loaded, or None if absent."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else time.monotonic() - entry[0]
+
+    def invalidate(self, predicate=None):
+        """Drops the entries whose key matches predicate (everything when None); running loads are discarded."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate is None or predicate(k)]:
+                del self._entries[key]
+            for key in [k for k in self._inflight if predicate is None or predicate(k)]:
+                del self._inflight[key]
@@ -0,0 +1,51 @@
+"""
+File: export_csv.py
+Purpose: CLI for streaming CSV exports (bookings and admin reports) to a file or stdout.
+
+Usage:
+    python app/utils/export_csv.py <export> [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--granularity day|week|month] [--gzip] [-o FILE]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from database.db_manager import DB
+from app.services.export_service import ExportService
+
+def export_csv(args):
+    result = ExportService(DB).open_export(args.export, args.date_from, args.date_to, compress=args.gzip,
+                                           granularity=args.granularity)
+    if result['status'] != 'success':
+        print(f"❌ Export failed: {result['message']}", file=sys.stderr)
+        sys.exit(1)
+
+    output = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        for chunk in result['chunks']:
+            output.write(chunk)
+            written += len(chunk)
+    except Exception as e:
+        print(f"❌ Export interrupted after {written} bytes: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if args.output:
+            output.close()
+
+    if args.output:
+        print(f"✅ Wrote {written} bytes to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    epilog = "\n".join(f"  {name:<18} {description}" for name, description in ExportService.EXPORTS.items())
+    parser = argparse.ArgumentParser(description="Stream a CSV export",
+                                     epilog=f"exports:\n{epilog}",
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('export', choices=sorted(ExportService.EXPORTS), help="What to export")
+    parser.add_argument('--from', dest='date_from', help="First day, YYYY-MM-DD")
+    parser.add_argument('--to', dest='date_to', help="Last day, YYYY-MM-DD, inclusive")
+    parser.add_argument('--granularity', choices=['day', 'week', 'month'], help="Break reports down by period")
+    parser.add_argument('--gzip', action='store_true', help="Gzip the output")
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    export_csv(parser.parse_args())
@@ -0,0 +1,84 @@
+"""
+File: import_schedule.py
+Purpose: CLI for bulk schedule import (CSV file or JSON recurrence rules).
+
+Usage:
+    python app/utils/import_schedule.py --csv season.csv [--auto-assign] [--dry-run]
+    python app/utils/import_schedule.py --rules rules.json [--auto-assign] [--dry-run]
+
+rules.json is a list of rules, e.g.
+    [{"origin": "TLV", "destination": "LHR", "days": "Mon,Thu", "time": "08:30",
+      "date_from": "2026-11-01", "date_to": "2027-03-31", "economy_price": 250, "business_price": 900}]
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from database.db_manager import DB
+from app.services.schedule_service import ScheduleService
+
+def import_schedule(args):
+    print("🚀 Importing schedule...")
+    schedule_service = ScheduleService(DB)
+
+    try:
+        # 1. Build specs
+        if args.csv:
+            try:
+                with open(args.csv, newline='', encoding='utf-8-sig') as f:
+                    specs, errors = schedule_service.parse_csv(f)
+            except UnicodeDecodeError:
+                specs, errors = [], [ScheduleService.CSV_ENCODING_ERROR]
+        else:
+            with open(args.rules, encoding='utf-8') as f:
+                specs, errors = schedule_service.expand_rules(json.load(f))
+
+        if errors:
+            print(f"❌ {len(errors)} input error(s):")
+            for error in errors[:ScheduleService.MAX_REPORTED_ERRORS]:
+                print(f"   - {error}")
+            return
+
+        # 2. Validate + insert
+        summary = schedule_service.import_schedule(
+            specs, auto_assign=args.auto_assign, dry_run=args.dry_run, chunk_size=args.chunk_size
+        )
+
+        if summary['errors']:
+            print(f"❌ {summary['message']}")
+            for error in summary['errors']:
+                print(f"   - {error}")
+            if summary['error_count'] > len(summary['errors']):
+                print(f"   ... and {summary['error_count'] - len(summary['errors'])} more")
+            return
+
+        if args.dry_run:
+            print(f"✅ Dry run: {summary['flights_valid']} flights are valid (nothing written).")
+            return
+
+        print(f"✅ Inserted {summary['inserted']} / {summary['flights_valid']} flights in {summary.get('insert_sec')}s "
+              f"({summary.get('flights_per_sec')} flights/sec).")
+        if summary['status'] != 'success':
+            print(f"❌ {summary['message']}")
+        if 'aircraft_assigned' in summary:
+            roster = summary['roster']
+            print(f"   Aircraft assigned: {summary['aircraft_assigned']} ({summary['aircraft_assign_sec']}s)")
+            print(f"   Flights staffed:   {roster['flights_staffed']} / {roster['flights_total']} "
+                  f"({roster['assignments']} assignments, {summary['roster_sec']}s)")
+        print(f"   Total time: {summary['elapsed_sec']}s")
+
+    except Exception as e:
+        print(f"❌ Error importing schedule: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk flight schedule import")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="CSV file: origin,destination,departure_time,economy_price,business_price")
+    source.add_argument('--rules', help="JSON file with a list of recurrence rules")
+    parser.add_argument('--auto-assign', action='store_true', help="Assign aircraft and crew after import")
+    parser.add_argument('--dry-run', action='store_true', help="Validate only")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Flights per INSERT/transaction")
+    import_schedule(parser.parse_args())
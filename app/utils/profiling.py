@@ -0,0 +1,318 @@
+"""
+File: profiling.py
+Purpose: Opt-in per-request profiling (DB, template and Python time, query count, memory, slow-request dumps).
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime
+from flask import g, request, before_render_template, template_rendered
+from database.db_manager import DBManager
+
+# The profile of the request running in this thread (None outside profiled requests)
+_current = ContextVar('request_profile', default=None)
+
+class RequestProfile:
+    """Timings collected for one request."""
+    __slots__ = ('endpoint', 'thread_id', 'started', 'db_time', 'queries', 'template_time',
+                 'template_started', 'memory_start', 'profiler', 'stack')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.thread_id = threading.get_ident()
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.template_started = None
+        self.memory_start = None
+        self.profiler = None
+        self.stack = None
+
+# --- Database Instrumentation ---
+
+class _ProfiledCursor:
+    """Cursor proxy adding execute/fetch time and query count to the request profile."""
+    __slots__ = ('_cursor', '_profile')
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+
+    def _timed(self, method, args, kwargs, query=False):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._profile.db_time += time.perf_counter() - start
+            if query:
+                self._profile.queries += 1
+
+    def execute(self, *args, **kwargs):
+        return self._timed(self._cursor.execute, args, kwargs, query=True)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed(self._cursor.executemany, args, kwargs, query=True)
+
+    def fetchone(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchone, args, kwargs)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchmany, args, kwargs)
+
+    def fetchall(self, *args, **kwargs):
+        return self._timed(self._cursor.fetchall, args, kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _ProfiledConnection:
+    """Connection proxy whose cursors are profiled."""
+    __slots__ = ('_connection', '_profile')
+
+    def __init__(self, connection, profile):
+        self._connection = connection
+        self._profile = profile
+
+    def cursor(self, *args, **kwargs):
+        return _ProfiledCursor(self._connection.cursor(*args, **kwargs), self._profile)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+def _profile_connection(connection):
+    """DBManager.connection_hook: wraps connections taken while a profiled request runs in this thread."""
+    profile = _current.get()
+    return _ProfiledConnection(connection, profile) if profile else connection
+
+# --- Middleware ---
+
+class RequestProfiler:
+    """
+    Flask extension recording, per request: wall time split into DB, template and Python time,
+    the query count and (PROFILE_MEMORY) the tracemalloc peak. Requests slower than PROFILE_SLOW_MS
+    are written to PROFILE_DIR as JSON with a stack snapshot taken when the threshold was crossed,
+    plus a cProfile .prof when the request was sampled (PROFILE_CPROFILE_RATE).
+    Nothing is installed unless PROFILING is set, so a disabled profiler costs nothing.
+
+    DB time covers queries issued from the request thread (not background executors). The memory
+    peak is process-wide: exact with one request per process, an upper bound with threaded workers.
+    """
+    DEFAULTS = {
+        'PROFILING': False,
+        'PROFILE_SLOW_MS': 500,
+        'PROFILE_DIR': 'profiles',
+        'PROFILE_CPROFILE_RATE': 0.05,
+        'PROFILE_MEMORY': False
+    }
+
+    # Per-endpoint totals for this process
+    _stats = {}
+    _stats_lock = threading.Lock()
+    enabled = False
+
+    def __init__(self, app=None):
+        self._active = {}
+        self._active_lock = threading.Lock()
+        self._cprofile_lock = threading.Lock() # One cProfile at a time per process
+        self._watchdog_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Reads the PROFILE_* settings and registers the hooks when PROFILING is on."""
+        for key, value in self.DEFAULTS.items():
+            app.config.setdefault(key, value)
+        if not app.config['PROFILING']:
+            return
+
+        self.slow_seconds = app.config['PROFILE_SLOW_MS'] / 1000.0
+        self.directory = app.config['PROFILE_DIR']
+        self.cprofile_rate = app.config['PROFILE_CPROFILE_RATE']
+        self.memory = app.config['PROFILE_MEMORY']
+        os.makedirs(self.directory, exist_ok=True)
+
+        type(self).enabled = True
+        DBManager.connection_hook = _profile_connection
+        app.before_request(self._start)
+        app.after_request(self._server_timing)
+        app.teardown_request(self._finish)
+        before_render_template.connect(self._template_start, app, weak=False)
+        template_rendered.connect(self._template_end, app, weak=False)
+        print(f"⏱️ Request profiling on: slow > {app.config['PROFILE_SLOW_MS']} ms -> {self.directory}/")
+
+    @classmethod
+    def endpoint_stats(cls):
+        """Per-endpoint averages for this process, slowest total first."""
+        with cls._stats_lock:
+            items = [(endpoint, dict(stats)) for endpoint, stats in cls._stats.items()]
+
+        rows = []
+        for endpoint, s in items:
+            n = s['count']
+            rows.append({
+                'endpoint': endpoint,
+                'requests': n,
+                'slow': s['slow'],
+                'avg_ms': round(s['wall_ms'] / n, 1),
+                'avg_db_ms': round(s['db_ms'] / n, 1),
+                'avg_template_ms': round(s['template_ms'] / n, 1),
+                'avg_python_ms': round(s['python_ms'] / n, 1),
+                'avg_queries': round(s['queries'] / n, 1),
+                'max_ms': round(s['max_ms'], 1),
+                'max_memory_kb': s['max_memory_kb'],
+                'total_ms': round(s['wall_ms'], 1)
+            })
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    # --- Request Hooks ---
+
+    def _start(self):
+        """Opens the profile (and a sampled cProfile) for this request."""
+        profile = RequestProfile(request.endpoint or request.path)
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            profile.memory_start = tracemalloc.get_traced_memory()[0]
+        if self.cprofile_rate and random.random() < self.cprofile_rate and self._cprofile_lock.acquire(blocking=False):
+            profile.profiler = cProfile.Profile()
+            profile.profiler.enable()
+
+        g._request_profile = profile
+        _current.set(profile)
+        with self._active_lock:
+            self._active[profile.thread_id] = profile
+        self._ensure_watchdog()
+
+    def _server_timing(self, response):
+        """Adds a Server-Timing header (shown in the browser's network panel)."""
+        profile = g.get('_request_profile')
+        if profile:
+            wall = time.perf_counter() - profile.started
+            python = max(wall - profile.db_time - profile.template_time, 0.0)
+            response.headers['Server-Timing'] = (
+                f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries", '
+                f'tpl;dur={profile.template_time * 1000:.1f}, app;dur={python * 1000:.1f}, '
+                f'total;dur={wall * 1000:.1f}'
+            )
+        return response
+
+    def _finish(self, exc=None):
+        """Closes the profile, updates the endpoint totals and dumps slow requests."""
+        profile = g.pop('_request_profile', None)
+        if profile is None:
+            return
+        wall = time.perf_counter() - profile.started
+        if profile.profiler:
+            profile.profiler.disable()
+            self._cprofile_lock.release()
+        _current.set(None)
+        with self._active_lock:
+            self._active.pop(profile.thread_id, None)
+
+        memory_kb = None
+        if profile.memory_start is not None:
+            memory_kb = round(max(tracemalloc.get_traced_memory()[1] - profile.memory_start, 0) / 1024, 1)
+
+        python = max(wall - profile.db_time - profile.template_time, 0.0)
+        slow = wall >= self.slow_seconds
+        with self._stats_lock:
+            s = self._stats.setdefault(profile.endpoint, {
+                'count': 0, 'slow': 0, 'wall_ms': 0.0, 'db_ms': 0.0, 'template_ms': 0.0,
+                'python_ms': 0.0, 'queries': 0, 'max_ms': 0.0, 'max_memory_kb': None
+            })
+            s['count'] += 1
+            s['slow'] += slow
+            s['wall_ms'] += wall * 1000
+            s['db_ms'] += profile.db_time * 1000
+            s['template_ms'] += profile.template_time * 1000
+            s['python_ms'] += python * 1000
+            s['queries'] += profile.queries
+            s['max_ms'] = max(s['max_ms'], wall * 1000)
+            if memory_kb is not None:
+                s['max_memory_kb'] = max(s['max_memory_kb'] or 0, memory_kb)
+
+        if slow:
+            self._dump(profile, wall, python, memory_kb, exc)
+
+    def _template_start(self, sender, template, context, **extra):
+        profile = _current.get()
+        if profile:
+            profile.template_started = time.perf_counter()
+
+    def _template_end(self, sender, template, context, **extra):
+        profile = _current.get()
+        if profile and profile.template_started is not None:
+            profile.template_time += time.perf_counter() - profile.template_started
+            profile.template_started = None
+
+    # --- Slow Requests ---
+
+    def _dump(self, profile, wall, python, memory_kb, exc):
+        """Writes <time>_<endpoint>_<ms>ms.json (and .prof when sampled) to the profile directory."""
+        wall_ms = round(wall * 1000, 1)
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}_{re.sub(r'[^A-Za-z0-9_.-]', '_', profile.endpoint)}_{wall_ms:.0f}ms"
+        path = os.path.join(self.directory, name)
+        record = {
+            'endpoint': profile.endpoint,
+            'method': request.method,
+            'path': request.full_path,
+            'pid': os.getpid(),
+            'wall_ms': wall_ms,
+            'db_ms': round(profile.db_time * 1000, 1),
+            'queries': profile.queries,
+            'template_ms': round(profile.template_time * 1000, 1),
+            'python_ms': round(python * 1000, 1),
+            'memory_peak_kb': memory_kb,
+            'error': repr(exc) if exc else None,
+            'stack': profile.stack,
+            'cprofile': f"{name}.prof" if profile.profiler else None
+        }
+        try:
+            if profile.profiler:
+                profile.profiler.dump_stats(f"{path}.prof")
+            with open(f"{path}.json", 'w', encoding='utf-8') as f:
+                json.dump(record, f, indent=2)
+        except OSError as e:
+            print(f"Error writing request profile: {e}")
+        print(f"🐢 Slow request {request.method} {request.path}: {wall_ms} ms "
+              f"(db {record['db_ms']} ms / {profile.queries} queries, template {record['template_ms']} ms)")
+
+    def _ensure_watchdog(self):
+        """Starts this process's stack sampler (again after a fork, as threads do not survive it)."""
+        if self._watchdog_pid == os.getpid():
+            return
+        with self._active_lock:
+            if self._watchdog_pid == os.getpid():
+                return
+            self._watchdog_pid = os.getpid()
+            threading.Thread(target=self._watch, name='request-profiler', daemon=True).start()
+
+    def _watch(self):
+        """Snapshots the stack of every request still running past the slow threshold."""
+        interval = min(max(self.slow_seconds / 4, 0.01), 0.25)
+        while True:
+            time.sleep(interval)
+            now = time.perf_counter()
+            with self._active_lock:
+                overdue = [p for p in self._active.values() if p.stack is None and now - p.started >= self.slow_seconds]
+            if not overdue:
+                continue
+            frames = sys._current_frames()
+            for profile in overdue:
+                frame = frames.get(profile.thread_id)
+                # The thread may have finished this request and started another meanwhile
+                if frame is not None and self._active.get(profile.thread_id) is profile:
+                    profile.stack = ''.join(traceback.format_stack(frame))
@@ -0,0 +1,30 @@
+"""
+File: refresh_rollups.py
+Purpose: CLI for refreshing the admin report rollups (run from cron, e.g. every 15 minutes).
+
+Usage:
+    python app/utils/refresh_rollups.py [--full]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from database.db_manager import DB
+from app.services.rollup_service import RollupService
+
+def refresh_rollups(args):
+    print("🚀 Refreshing report rollups...")
+    result = RollupService(DB).refresh(full=args.full)
+
+    if result['status'] == 'success':
+        print(f"✅ {result['message']}")
+    else:
+        print(f"❌ Rollup refresh failed: {result['message']}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh admin report rollups")
+    parser.add_argument('--full', action='store_true', help="Rebuild every partition (e.g. after cabin reconfiguration)")
+    refresh_rollups(parser.parse_args())
@@ -0,0 +1,24 @@
+"""
+File: run_roster_job.py
+Purpose: Runs one queued roster job (started by RosterService in its own process).
+
+Usage:
+    python app/utils/run_roster_job.py <job_id>
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+
+from database.db_manager import DB
+from app.services.roster_service import RosterService
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a queued roster job")
+    parser.add_argument('job_id')
+    args = parser.parse_args()
+
+    if not RosterService(DB).run_job(args.job_id):
+        print(f"❌ Roster job {args.job_id} is not queued")
+        sys.exit(1)
@@ -0,0 +1,30 @@
+"""
+File: warmup.py
+Purpose: Preloads the process-wide caches (routes, locations, cabin layouts) before a worker takes traffic.
+"""
+import os
+import time
+from app.models.daos.route_catalog import RouteCatalog
+from app.models.daos.aircraft_layouts import AircraftLayouts
+
+def warm_caches(db_manager):
+    """Loads the route network and every cabin layout; returns {cache: milliseconds}. Never raises."""
+    steps = {
+        'routes': lambda: RouteCatalog(db_manager).route_map(),
+        'locations': lambda: RouteCatalog(db_manager).locations(),
+        'layouts': lambda: AircraftLayouts(db_manager).capacities()
+    }
+
+    timings = {}
+    for name, load in steps.items():
+        start = time.perf_counter()
+        try:
+            loaded = load()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+            if not loaded:
+                print(f"⚠️ Warmup [{os.getpid()}]: {name} is empty (will load on first request)")
+        except Exception as e:
+            print(f"Error warming {name} cache: {e}")
+
+    print(f"🔥 Warmup [{os.getpid()}]: " + ", ".join(f"{name} {ms} ms" for name, ms in timings.items()))
+    return timings
@@ -0,0 +1,181 @@
+"""
+File: bench_crew_candidates.py
+Purpose: Compares the legacy correlated-subquery crew search with the duty-timeline search.
+
+Seeds synthetic crew, flights and assignments inside a single transaction, times both
+queries on that connection and rolls everything back, so the database is left untouched.
+
+Usage: python benchmarks/bench_crew_candidates.py [--crew 5000] [--flights 2000] [--runs 20]
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from database.db_manager import DB
+from app.models.daos.crew_dao import CrewDAO
+from app.services.crew_service import CrewService
+from app.services.positioning_index import PositioningIndex
+from benchmarks.common import CursorDB, time_query, time_call, print_comparison
+
+BENCH_EMPLOYEE_BASE = 900000000
+
+# fetch_candidates as it was before the duty timeline (kept verbatim for comparison)
+LEGACY_QUERY = """
+SELECT
+    s.employee_id as id_number, s.first_name, s.last_name, cm.current_location, cm.long_haul_certified,
+    CASE WHEN cm.current_location = %s THEN 0 ELSE 1 END AS needs_transfer,
+    CASE
+        WHEN %s = 'Short' AND cm.long_haul_certified = 1 THEN 'Overqualified (Reserve for Long)'
+        WHEN %s = 'Long' AND cm.long_haul_certified = 1 THEN 'Perfect Match'
+        ELSE 'Standard Match'
+    END AS match_quality,
+    (
+        SELECT f_in.flight_id
+        FROM flights f_in
+        JOIN routes rt_in ON f_in.route_id = rt_in.route_id
+        WHERE rt_in.origin_airport = cm.current_location
+            AND rt_in.destination_airport = %s
+            AND ADDTIME(f_in.departure_time, rt_in.flight_duration) <= %s - INTERVAL 2 HOUR
+        ORDER BY f_in.departure_time DESC
+        LIMIT 1
+    ) as transfer_flight_id
+FROM staff s
+JOIN crew_members cm ON s.employee_id = cm.employee_id
+WHERE s.role = %s
+  AND (
+      cm.current_location = %s
+      OR EXISTS (
+          SELECT 1 FROM flights f_in
+          JOIN routes rt_in ON f_in.route_id = rt_in.route_id
+          WHERE rt_in.origin_airport = cm.current_location
+              AND rt_in.destination_airport = %s
+              AND ADDTIME(f_in.departure_time, rt_in.flight_duration) <= %s - INTERVAL 2 HOUR
+      )
+  )
+  AND ((%s = 'Short') OR (cm.long_haul_certified = 1))
+  AND NOT EXISTS (
+      SELECT 1
+      FROM crew_assignments ca_busy
+      JOIN flights f_busy ON ca_busy.flight_id = f_busy.flight_id
+      JOIN routes r_busy ON f_busy.route_id = r_busy.route_id
+      WHERE ca_busy.employee_id = s.employee_id
+      AND f_busy.flight_status != 'Cancelled'
+      AND (
+          f_busy.departure_time < ADDTIME(%s, %s)
+          AND ADDTIME(f_busy.departure_time, r_busy.flight_duration) > %s
+      )
+  )
+ORDER BY
+    needs_transfer ASC,
+    CASE WHEN %s = 'Short' AND cm.long_haul_certified = 1 THEN 1 ELSE 0 END ASC,
+    s.last_name ASC
+LIMIT %s;
+"""
+
+def seed(cursor, crew_count, flight_count):
+    """Inserts synthetic crew, flights, assignments and timeline rows (uncommitted)."""
+    cursor.execute("SELECT route_id, origin_airport, destination_airport, flight_duration FROM routes")
+    routes = cursor.fetchall()
+    if not routes:
+        raise RuntimeError("The routes table is empty - seed the base schema first.")
+    locations = sorted({r['origin_airport'] for r in routes} | {r['destination_airport'] for r in routes})
+
+    staff_rows = []
+    crew_rows = []
+    for i in range(crew_count):
+        employee_id = BENCH_EMPLOYEE_BASE + i
+        role = 'Pilot' if i % 3 == 0 else 'Flight Attendant'
+        staff_rows.append((employee_id, 'Bench', f'Crew{i:05d}', '000', 'City', 'Street', '1', '2020-01-01', role))
+        crew_rows.append((employee_id, 1 if i % 4 == 0 else 0, random.choice(locations)))
+
+    cursor.executemany("""
+        INSERT INTO staff
+        (employee_id, first_name, last_name, phone_number, city, street, house_no, employment_start_date, role)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, staff_rows)
+    cursor.executemany(
+        "INSERT INTO crew_members (employee_id, long_haul_certified, current_location) VALUES (%s, %s, %s)",
+        crew_rows
+    )
+
+    base_time = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    flight_rows = []
+    for i in range(flight_count):
+        route = random.choice(routes)
+        departure = base_time + timedelta(hours=random.randint(-24 * 30, 24 * 30))
+        flight_rows.append((route['route_id'], departure, 100, 0))
+
+    cursor.executemany("""
+        INSERT INTO flights (route_id, aircraft_id, departure_time, economy_price, business_price, flight_status)
+        VALUES (%s, NULL, %s, %s, %s, 'Scheduled')
+    """, flight_rows)
+    cursor.execute("SELECT MAX(flight_id) AS last_id FROM flights")
+    last_id = cursor.fetchone()['last_id']
+    flight_ids = list(range(last_id - flight_count + 1, last_id + 1))
+
+    assignment_rows = set()
+    for i in range(crew_count):
+        for flight_id in random.sample(flight_ids, 3):
+            assignment_rows.add((flight_id, BENCH_EMPLOYEE_BASE + i))
+    cursor.executemany("INSERT INTO crew_assignments (flight_id, employee_id) VALUES (%s, %s)", list(assignment_rows))
+
+    cursor.execute(CrewDAO.TIMELINE_INSERT_SQL.format(flight_filter="ca.employee_id >= %s"), (BENCH_EMPLOYEE_BASE,))
+
+    return routes, base_time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--crew', type=int, default=5000)
+    parser.add_argument('--flights', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = DB.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        print(f"Seeding {args.crew} crew members and {args.flights} flights (uncommitted)...")
+        routes, base_time = seed(cursor, args.crew, args.flights)
+
+        route = routes[0]
+        origin = route['origin_airport']
+        duration = route['flight_duration']
+        route_type = 'Long' if duration > timedelta(hours=6) else 'Short'
+        departure = base_time + timedelta(days=3)
+        end_time = departure + duration
+        role, limit = 'Flight Attendant', 50
+
+        legacy_params = (
+            origin, route_type, route_type, origin, departure, role, origin, origin, departure,
+            route_type, departure, duration, departure, route_type, limit
+        )
+        legacy_timings, legacy_rows = time_query(cursor, LEGACY_QUERY, legacy_params, args.runs)
+
+        dao = CrewDAO(CursorDB(cursor))
+        PositioningIndex.invalidate()
+        index = PositioningIndex(dao)
+
+        def timeline_search():
+            inbound = index.inbound_flights(origin, departure - CrewService.TRANSFER_BUFFER)
+            return dao.fetch_candidates(origin, departure, end_time, route_type, role, limit, inbound.keys())
+
+        timeline_timings, timeline_rows = time_call(timeline_search, args.runs)
+
+        print(f"\nCandidate search ({role}, {origin}, {route_type} haul, limit {limit}):")
+        print_comparison('legacy', legacy_timings, 'timeline', timeline_timings)
+
+        # Transfers differ by design (the index skips departed, unassigned and full flights)
+        local_legacy = [r['id_number'] for r in legacy_rows if not r['needs_transfer']]
+        local_timeline = [r['id_number'] for r in timeline_rows if not r['needs_transfer']]
+        print(f"Identical ranking of local crew: {'yes' if local_legacy == local_timeline else 'NO'}")
+
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
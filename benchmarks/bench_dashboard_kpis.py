@@ -0,0 +1,45 @@
+"""
+File: bench_dashboard_kpis.py
+Purpose: Dashboard KPI latency, sequential queries vs the concurrent fan-out in FlightService.
+
+The concurrent path reuses in-flight queries and caches the last good values. Each run
+therefore starts from a fresh in-flight table, so both variants really query the database.
+
+Usage: python benchmarks/bench_dashboard_kpis.py [--runs 10]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from database.db_manager import DB
+from app.services.flight_service import FlightService
+from benchmarks.common import time_call, print_comparison
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    service = FlightService(DB)
+
+    def sequential():
+        return {name: getattr(service.stats_dao, method)() for name, (method, _, _) in FlightService.DASHBOARD_KPIS.items()}
+
+    def concurrent():
+        return service.get_admin_dashboard_stats()
+
+    # Warm up connections and the aircraft layout cache
+    sequential()
+    concurrent()
+
+    seq_timings, _ = time_call(sequential, args.runs)
+    par_timings, stats = time_call(concurrent, args.runs)
+    print(f"{len(FlightService.DASHBOARD_KPIS)} KPIs, {FlightService.DASHBOARD_WORKERS} workers, {args.runs} runs")
+    print_comparison('sequential', seq_timings, 'concurrent', par_timings)
+    if stats['stale_kpis']:
+        print(f"Served stale in the last run: {', '.join(stats['stale_kpis'])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+File: bench_occupancy.py
+Purpose: Fleet occupancy query on many landed flights (correlated capacity subquery vs stored capacity).
+
+Seeds --flights landed flights with --lines sold seats each inside a single transaction,
+runs the legacy and current occupancy queries on that connection and rolls everything back.
+Requires migration 008 (aircraft_capacity).
+
+Usage: python benchmarks/bench_occupancy.py [--flights 50000] [--lines 8] [--runs 5]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from database.db_manager import DB
+from app.models.daos.statistics_dao import StatisticsDAO
+from benchmarks.common import CursorDB, time_call, print_comparison
+
+BENCH_EMAIL = 'occupancy@bench.invalid'
+BENCH_CODE_BASE = 800000000  # Below the history benchmark's codes, above legacy 6-digit codes
+BENCH_START = datetime(1990, 1, 1)
+BATCH = 2000
+
+# get_avg_fleet_occupancy before the capacity/rollup work
+LEGACY_QUERY = """
+    SELECT AVG(occupancy_rate) as avg_occupancy FROM (
+        SELECT 
+            f.flight_id, 
+            (COUNT(ol.unique_order_code) * 100.0 / (
+                SELECT SUM((ac.row_end - ac.row_start + 1) * CHAR_LENGTH(ac.columns))
+                FROM aircraft_classes ac
+                WHERE ac.aircraft_id = f.aircraft_id
+            )) as occupancy_rate
+        FROM flights f 
+        LEFT JOIN order_lines ol ON f.flight_id = ol.flight_id
+        LEFT JOIN orders o ON ol.unique_order_code = o.unique_order_code
+        WHERE f.flight_status = 'Landed' 
+        AND (o.order_status != 'Cancelled' OR o.order_status IS NULL)
+        GROUP BY f.flight_id
+    ) subquery
+"""
+
+def seed(cursor, flight_count, lines_per_flight):
+    """Inserts landed flights, one order each with lines_per_flight seats (uncommitted)."""
+    cursor.execute("""
+        SELECT cap.aircraft_id, MIN(r.route_id) AS route_id
+        FROM aircraft_capacity cap
+        CROSS JOIN routes r
+        GROUP BY cap.aircraft_id
+        ORDER BY cap.aircraft_id
+        LIMIT 1
+    """)
+    base = cursor.fetchone()
+    if not base:
+        raise RuntimeError("Needs a configured aircraft and a route - seed the base data and apply migrations first.")
+
+    cursor.execute("INSERT IGNORE INTO guests (guest_email) VALUES (%s)", (BENCH_EMAIL,))
+
+    flights = [(base['route_id'], base['aircraft_id'], BENCH_START + timedelta(minutes=10 * i))
+               for i in range(flight_count)]
+    for i in range(0, len(flights), BATCH):
+        cursor.executemany("""
+            INSERT INTO flights (route_id, aircraft_id, departure_time, economy_price, business_price, flight_status)
+            VALUES (%s, %s, %s, 100, 0, 'Landed')
+        """, flights[i:i + BATCH])
+
+    cursor.execute("""
+        SELECT flight_id FROM flights
+        WHERE departure_time >= %s AND departure_time < %s AND aircraft_id = %s
+        ORDER BY flight_id
+    """, (BENCH_START, BENCH_START + timedelta(minutes=10 * flight_count), base['aircraft_id']))
+    flight_ids = [row['flight_id'] for row in cursor.fetchall()]
+
+    orders = [(BENCH_CODE_BASE + i, flight_id, BENCH_EMAIL) for i, flight_id in enumerate(flight_ids)]
+    for i in range(0, len(orders), BATCH):
+        cursor.executemany("""
+            INSERT INTO orders (unique_order_code, order_date, order_status, flight_id, total_price, guest_email)
+            VALUES (%s, NOW(), 'completed', %s, 100, %s)
+        """, orders[i:i + BATCH])
+
+    lines = [(code, flight_id, row) for code, flight_id, _ in orders for row in range(1, lines_per_flight + 1)]
+    for i in range(0, len(lines), BATCH):
+        cursor.executemany("""
+            INSERT INTO order_lines (unique_order_code, flight_id, `row_number`, `column_number`, `class`, is_active)
+            VALUES (%s, %s, %s, 'A', 'Economy', NULL)
+        """, lines[i:i + BATCH])
+    return len(flight_ids), len(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--flights', type=int, default=50000)
+    parser.add_argument('--lines', type=int, default=8, help="Sold seats per flight")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = DB.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        print(f"Seeding {args.flights:,} landed flights x {args.lines} seats (uncommitted)...")
+        flights, lines = seed(cursor, args.flights, args.lines)
+        print(f"Seeded {flights:,} flights, {lines:,} order lines")
+
+        db = CursorDB(cursor)
+        dao = StatisticsDAO(db)
+        live_from, live_to = StatisticsDAO.ALL_TIME
+
+        def legacy():
+            return db.fetch_one(LEGACY_QUERY)['avg_occupancy']
+
+        def current():
+            rates = [float(r['occupancy_rate']) for r in dao._landed_occupancy(live_from, live_to)
+                     if r['occupancy_rate'] is not None]
+            return sum(rates) / len(rates) if rates else 0
+
+        legacy_timings, legacy_avg = time_call(legacy, args.runs)
+        current_timings, current_avg = time_call(current, args.runs)
+        print_comparison('legacy', legacy_timings, 'stored cap', current_timings)
+        print(f"Average occupancy: legacy {float(legacy_avg or 0):.2f}% | stored capacity {current_avg:.2f}%")
+
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+File: bench_order_history.py
+Purpose: Query count and latency of the customer order history (per-order tickets vs bulk fetch).
+
+Seeds one frequent-flyer customer with many orders inside a single transaction,
+runs both variants on that connection and rolls everything back.
+
+Usage: python benchmarks/bench_order_history.py [--orders 300] [--tickets 2] [--runs 10]
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from database.db_manager import DB
+from app.models.daos.order_dao import OrderDAO
+from benchmarks.common import CursorDB, time_call, print_comparison
+
+BENCH_EMAIL = 'frequent-flyer@bench.invalid'
+BENCH_CODE_BASE = 900000000  # Between legacy 6-digit and allocated 10-digit codes
+
+def seed(cursor, order_count, tickets_per_order):
+    """Inserts a customer with order_count orders (uncommitted)."""
+    cursor.execute("SELECT flight_id FROM flights ORDER BY flight_id LIMIT 1")
+    flight = cursor.fetchone()
+    if not flight:
+        raise RuntimeError("The flights table is empty - seed the base data first.")
+
+    cursor.execute("""
+        INSERT INTO customers
+        (customer_email, first_name, last_name, date_of_birth, passport_number, registration_date, login_password)
+        VALUES (%s, 'Bench', 'Flyer', '1990-01-01', 'X0000000', CURDATE(), 'bench')
+    """, (BENCH_EMAIL,))
+
+    start = datetime.now().replace(microsecond=0) - timedelta(days=order_count)
+    orders = []
+    lines = []
+    for i in range(order_count):
+        code = BENCH_CODE_BASE + i
+        orders.append((code, start + timedelta(days=i), flight['flight_id'], BENCH_EMAIL))
+        for t in range(tickets_per_order):
+            # is_active NULL: history rows must not collide with real seats
+            lines.append((code, flight['flight_id'], 100 + i, chr(ord('A') + t)))
+
+    cursor.executemany("""
+        INSERT INTO orders (unique_order_code, order_date, order_status, flight_id, total_price, customer_email)
+        VALUES (%s, %s, 'completed', %s, 100, %s)
+    """, orders)
+    cursor.executemany("""
+        INSERT INTO order_lines (unique_order_code, flight_id, `row_number`, `column_number`, `class`, is_active)
+        VALUES (%s, %s, %s, %s, 'Economy', NULL)
+    """, lines)
+
+def legacy_history(db, email):
+    """get_customer_orders as it was: full history, then one ticket query per order."""
+    orders = db.fetch_all("""
+        SELECT o.unique_order_code, o.order_date, o.order_status, o.total_price,
+               f.departure_time, r.origin_airport, r.destination_airport, a.manufacturer
+        FROM orders o
+        JOIN flights f ON o.flight_id = f.flight_id
+        JOIN routes r ON f.route_id = r.route_id
+        LEFT JOIN aircraft a ON f.aircraft_id = a.aircraft_id
+        WHERE o.customer_email = %s
+        ORDER BY o.order_date DESC
+    """, (email,))
+    for order in orders:
+        order['tickets'] = db.fetch_all("""
+            SELECT `row_number`, `column_number`, `class`
+            FROM order_lines
+            WHERE unique_order_code = %s
+            ORDER BY `row_number`, `column_number`
+        """, (order['unique_order_code'],))
+    return orders
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--orders', type=int, default=300)
+    parser.add_argument('--tickets', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    conn = DB.get_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        print(f"Seeding {args.orders} orders x {args.tickets} tickets (uncommitted)...")
+        seed(cursor, args.orders, args.tickets)
+        db = CursorDB(cursor)
+        dao = OrderDAO(db)
+
+        # --- Query counts ---
+        db.queries = 0
+        legacy_history(db, BENCH_EMAIL)
+        legacy_queries = db.queries
+
+        page_queries = []
+        before = None
+        pages = 0
+        while True:
+            db.queries = 0
+            orders, before = dao.get_customer_orders(BENCH_EMAIL, before=before, per_page=args.per_page)
+            page_queries.append(db.queries)
+            pages += 1
+            if not before:
+                break
+
+        print(f"\nQueries: legacy {legacy_queries} for the full history | "
+              f"paged {min(page_queries)}-{max(page_queries)} per page ({pages} pages of {args.per_page})")
+
+        # --- Latency (first page vs legacy full history) ---
+        legacy_timings, _ = time_call(lambda: legacy_history(db, BENCH_EMAIL), args.runs)
+        paged_timings, _ = time_call(lambda: dao.get_customer_orders(BENCH_EMAIL, per_page=args.per_page), args.runs)
+        print_comparison('legacy', legacy_timings, 'first page', paged_timings)
+
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
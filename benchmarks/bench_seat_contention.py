@@ -0,0 +1,126 @@
+"""
+File: bench_seat_contention.py
+Purpose: Stress test for seat-level booking: many threads buy overlapping seats on one flight.
+
+Creates a throwaway flight (committed, since the threads need to see each other's work),
+lets every thread call OrderDAO.create_order on a small pool of "hot" seats, then checks
+that no seat was sold twice and that every successful order got all its seats.
+The flight, its orders and the bench guest are deleted at the end.
+
+Usage: python benchmarks/bench_seat_contention.py [--threads 16] [--attempts 100] [--hot-seats 30] [--seats-per-order 2]
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from app.models.daos.flight_dao import FlightDAO
+from app.models.daos.order_dao import OrderDAO
+from benchmarks.common import PooledDB
+
+BENCH_GUEST = 'seat-contention@bench.invalid'
+
+def create_bench_flight(db):
+    """Inserts a far-future flight on an aircraft that has a seat configuration."""
+    aircraft = db.fetch_one("SELECT aircraft_id FROM aircraft_classes LIMIT 1")
+    route = db.fetch_one("SELECT route_id FROM routes LIMIT 1")
+    if not aircraft or not route:
+        raise RuntimeError("Need at least one route and one configured aircraft - seed the base data first.")
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO flights (route_id, aircraft_id, departure_time, economy_price, business_price, flight_status)
+            VALUES (%s, %s, %s, 100, 300, 'Scheduled')
+        """, (route['route_id'], aircraft['aircraft_id'], datetime.now().replace(microsecond=0) + timedelta(days=400)))
+        flight_id = cursor.lastrowid
+        cursor.execute("INSERT IGNORE INTO guests (guest_email) VALUES (%s)", (BENCH_GUEST,))
+        conn.commit()
+        return flight_id
+    finally:
+        cursor.close()
+        conn.close()
+
+def cleanup(db, flight_id):
+    """Removes everything the benchmark created."""
+    db.execute_query("DELETE FROM order_lines WHERE flight_id = %s", (flight_id,))
+    db.execute_query("DELETE FROM orders WHERE flight_id = %s", (flight_id,))
+    db.execute_query("DELETE FROM flights WHERE flight_id = %s", (flight_id,))
+    db.execute_query("DELETE FROM guests WHERE guest_email = %s", (BENCH_GUEST,))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--attempts', type=int, default=100, help="Booking attempts per thread")
+    parser.add_argument('--hot-seats', type=int, default=30)
+    parser.add_argument('--seats-per-order', type=int, default=2)
+    args = parser.parse_args()
+
+    db = PooledDB(min(args.threads + 1, 32))
+    flight_id = create_bench_flight(db)
+    try:
+        seats = FlightDAO(db).get_flight_seats(flight_id)
+        hot = [s['seat_id'] for s in seats[:args.hot_seats]]
+        order_dao = OrderDAO(db)
+
+        results = {'success': 0, 'conflict': 0, 'error': 0}
+        sold = []  # seat lists of successful orders
+        lock = threading.Lock()
+        start_gate = threading.Event()
+
+        def worker():
+            start_gate.wait()
+            for _ in range(args.attempts):
+                wanted = random.sample(hot, args.seats_per_order)
+                res = order_dao.create_order(flight_id, None, BENCH_GUEST, 0, wanted)
+                with lock:
+                    if res['status'] == 'success':
+                        results['success'] += 1
+                        sold.append(wanted)
+                    elif res.get('lost_seats'):
+                        results['conflict'] += 1
+                    else:
+                        results['error'] += 1
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        for t in threads:
+            t.start()
+        clock_start = time.perf_counter()
+        start_gate.set()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - clock_start
+
+        # --- Verification ---
+        duplicates = db.fetch_all("""
+            SELECT `row_number`, `column_number`, COUNT(*) AS n
+            FROM order_lines
+            WHERE flight_id = %s AND is_active = 1
+            GROUP BY `row_number`, `column_number`
+            HAVING COUNT(*) > 1
+        """, (flight_id,))
+        active_lines = db.fetch_one(
+            "SELECT COUNT(*) AS n FROM order_lines WHERE flight_id = %s AND is_active = 1", (flight_id,)
+        )['n']
+        sold_seats = [seat for order in sold for seat in order]
+
+        total = args.threads * args.attempts
+        print(f"{args.threads} threads x {args.attempts} attempts on {len(hot)} hot seats "
+              f"({args.seats_per_order} seats per order)")
+        print(f"Elapsed: {elapsed:.2f}s | {total / elapsed:,.0f} attempts/sec")
+        print(f"Succeeded: {results['success']} | Lost race: {results['conflict']} | Errors: {results['error']}")
+        print(f"Seats sold: {active_lines} (expected {len(sold_seats)})")
+        print(f"Double sales in DB: {len(duplicates)} | Seats reported sold twice: {len(sold_seats) - len(set(sold_seats))}")
+        ok = not duplicates and active_lines == len(sold_seats) == len(set(sold_seats))
+        print(f"Result: {'PASS' if ok else 'FAIL'}")
+    finally:
+        cleanup(db, flight_id)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+File: bench_wsgi.py
+Purpose: Requests per second of the Flask debug server (run.py) vs gunicorn with gunicorn.conf.py.
+
+Both servers are started against the same database and hit with the same closed-loop load:
+--clients keep-alive HTTP clients spread over several load processes (so the load generator
+is not limited by one GIL), each sending the next request as soon as the last one completed.
+The first --warmup seconds are not counted. Run it on an idle machine, with the database
+seeded and reachable, and gunicorn installed (pip install gunicorn).
+
+Usage: python benchmarks/bench_wsgi.py [--path /] [--clients 32] [--duration 15] [--warmup 3]
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../')))
+
+from benchmarks.common import print_comparison
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../'))
+
+SERVERS = {
+    'debug': (5001, [sys.executable, 'run.py']),
+    'gunicorn': (8001, ['gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:8001',
+                        '--access-logfile', '/dev/null', 'wsgi:app'])
+}
+
+def wait_for_port(port, timeout=60):
+    """Blocks until something accepts connections on localhost:port."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+def client_loop(port, path, stop_at, count_after, latencies, errors):
+    """One keep-alive client: requests until stop_at, recording latencies (ms) after count_after."""
+    conn = None
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.will_close:  # The debug server answers HTTP/1.0 and closes the connection
+                conn.close()
+                conn = None
+            ok = response.status < 500
+        except (OSError, http.client.HTTPException):
+            if conn:
+                conn.close()
+            conn = None
+            ok = False
+        if time.time() >= count_after:
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors.append(1)
+
+def load_process(port, path, clients, stop_at, count_after, results):
+    """Runs `clients` client threads in this process and reports (latencies, error count)."""
+    latencies, errors = [], []
+    threads = [threading.Thread(target=client_loop, args=(port, path, stop_at, count_after, latencies, errors))
+               for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put((latencies, len(errors)))
+
+def run_load(port, path, clients, duration, warmup):
+    """Returns (latencies in ms, errors, measured seconds) for a closed-loop load against localhost:port."""
+    processes = max(1, min(clients, multiprocessing.cpu_count() // 2 or 1))
+    count_after = time.time() + warmup
+    stop_at = count_after + duration
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=load_process, args=(
+            port, path, clients // processes + (1 if i < clients % processes else 0), stop_at, count_after, results))
+        for i in range(processes)
+    ]
+    for w in workers:
+        w.start()
+
+    latencies, errors = [], 0
+    for _ in workers:
+        batch, failed = results.get()
+        latencies.extend(batch)
+        errors += failed
+    for w in workers:
+        w.join()
+    return latencies, errors, duration
+
+def bench_server(name, args):
+    """Starts one server, loads it, stops it; returns latencies."""
+    port, command = SERVERS[name]
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+    try:
+        wait_for_port(port)
+        latencies, errors, seconds = run_load(port, args.path, args.clients, args.duration, args.warmup)
+    finally:
+        # The debug server runs a reloader child; stop the whole process group
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=30)
+
+    rps = len(latencies) / seconds
+    p95 = statistics.quantiles(latencies, n=20)[-1] if len(latencies) >= 20 else float('nan')
+    print(f"{name:<12} {rps:9.1f} req/s | {len(latencies)} ok, {errors} errors | p95 {p95:.1f} ms")
+    return latencies, rps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--path', default='/', help="URL path to request (e.g. /search?origin=TLV)")
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0, help="Measured seconds per server")
+    parser.add_argument('--warmup', type=float, default=3.0, help="Unmeasured seconds before measuring")
+    args = parser.parse_args()
+
+    print(f"GET {args.path}, {args.clients} clients, {args.duration:.0f}s per server, {multiprocessing.cpu_count()} cores")
+    debug_latencies, debug_rps = bench_server('debug', args)
+    prod_latencies, prod_rps = bench_server('gunicorn', args)
+
+    if not debug_latencies or not prod_latencies:
+        print("A server answered no requests successfully (check the database and the server logs).")
+        sys.exit(1)
+    print_comparison('debug', debug_latencies, 'gunicorn', prod_latencies)
+    if debug_rps > 0:
+        print(f"Throughput: {prod_rps / debug_rps:.1f}x requests per second")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+File: common.py
+Purpose: Shared helpers for the benchmark scripts (timing, seeding, concurrent DB access).
+"""
+import statistics
+import time
+from mysql.connector import pooling
+from database.db_manager import DB_CONFIG
+
+class CursorDB:
+    """Minimal DB adapter so DAOs run their real SQL on the benchmark's open transaction."""
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.queries = 0  # Statements executed through this adapter
+
+    def fetch_all(self, query, params=None):
+        self.queries += 1
+        self.cursor.execute(query, params or ())
+        return self.cursor.fetchall()
+
+    def fetch_one(self, query, params=None):
+        self.queries += 1
+        self.cursor.execute(query, params or ())
+        rows = self.cursor.fetchall()
+        return rows[0] if rows else None
+
+    def execute_query(self, query, params=None):
+        self.queries += 1
+        self.cursor.execute(query, params or ())
+        return self.cursor.rowcount
+
+class PooledDB:
+    """
+    DBManager-compatible adapter with its own pool, sized for concurrent benchmark threads
+    (the application pool only holds 5 connections). mysql-connector caps a pool at 32.
+    """
+    def __init__(self, pool_size):
+        self.pool = pooling.MySQLConnectionPool(pool_name=f"bench_pool_{pool_size}", pool_size=pool_size, **DB_CONFIG)
+
+    def get_connection(self):
+        return self.pool.get_connection()
+
+    def fetch_all(self, query, params=None):
+        conn = self.get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params or ())
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def fetch_one(self, query, params=None):
+        rows = self.fetch_all(query, params)
+        return rows[0] if rows else None
+
+    def execute_query(self, query, params=None):
+        conn = self.get_connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, params or ())
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            cursor.close()
+            conn.close()
+
+def time_query(cursor, query, params=None, runs=20):
+    """Runs a query repeatedly on the given cursor and returns timings in milliseconds."""
+    timings = []
+    rows = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        cursor.execute(query, params or ())
+        rows = cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, rows
+
+def time_call(fn, runs=20):
+    """Calls fn repeatedly and returns (timings in milliseconds, last result)."""
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, result
+
+def print_comparison(label_a, timings_a, label_b, timings_b):
+    """Prints min/median timings of two variants and the speedup between them."""
+    med_a = statistics.median(timings_a)
+    med_b = statistics.median(timings_b)
+    print(f"{label_a:<12} min {min(timings_a):9.2f} ms | median {med_a:9.2f} ms")
+    print(f"{label_b:<12} min {min(timings_b):9.2f} ms | median {med_b:9.2f} ms")
+    if med_b > 0:
+        print(f"Speedup (median): {med_a / med_b:.1f}x")
@@ -2,15 +2,35 @@
 File: db_manager.py
 Purpose: Singleton class to manage the MySQL connection pool and execute queries.
 """
+import os
+import threading
 import mysql.connector
 from mysql.connector import pooling
 
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "root",
+    "database": "flytau",
+    "charset": "utf8mb4",
+    "collation": "utf8mb4_unicode_ci"
+}
+
+# Connections per process: at least the server threads plus background executors (max 32)
+POOL_SIZE = int(os.environ.get("FLYTAU_DB_POOL_SIZE", 5))
+
 class DBManager:
     """
     Singleton class for handling database connections via a connection pool.
+    The pool belongs to the process that created it: a forked worker builds its own
+    on first use, since pooled sockets must never be shared between processes.
     """
     _instance = None
     _connection_pool = None
+    _pool_pid = None
+    _pool_lock = threading.Lock()
+    # Optional callable(connection) -> connection, set by the request profiler; None costs one check
+    connection_hook = None
 
     def __new__(cls):
         """Ensures only one instance of the DBManager exists."""
@@ -24,32 +44,41 @@ class DBManager:
         """Initializes the connection pool with database configuration."""
         if cls._connection_pool is None:
             try:
-                db_config = {
-                    "host": "localhost",
-                    "user": "root",
-                    "password": "root",
-                    "database": "flytau",
-                    "charset": "utf8mb4",
-                    "collation": "utf8mb4_unicode_ci"
-                }
-
                 cls._connection_pool = pooling.MySQLConnectionPool(
                     pool_name="flytau_pool",
-                    pool_size=5,
+                    pool_size=POOL_SIZE,
                     pool_reset_session=True,
-                    **db_config
+                    **DB_CONFIG
                 )
+                cls._pool_pid = os.getpid()
                 print("Connection Pool Created Successfully")
             except Exception as e:
                 print(f"Error Failed to create connection pool: {e}")
 
+    @classmethod
+    def reset_pool(cls):
+        """
+        Discards the current pool and creates a new one. Called in a freshly forked worker
+        (gunicorn post_fork); the inherited connections are dropped, not closed, as the parent owns them.
+        """
+        with cls._pool_lock:
+            cls._connection_pool = None
+            cls._initialize_pool()
+
     def get_connection(self):
         """Retrieves a connection from the pool."""
+        if self._pool_pid != os.getpid():
+            with self._pool_lock:
+                if self._pool_pid != os.getpid():
+                    type(self)._connection_pool = None
+                    self._initialize_pool()
         try:
-            return self._connection_pool.get_connection()
+            connection = self._connection_pool.get_connection()
         except Exception as e:
             print(f"Error getting connection: {e}")
             return None
+        hook = DBManager.connection_hook
+        return hook(connection) if hook else connection
 
     def execute_query(self, query, params=None):
         """Executes INSERT, UPDATE, or DELETE queries and returns the result/rowcount."""
@@ -121,8 +150,39 @@ class DBManager:
 
         return result
 
-    def execute_sql_script(self, file_path):
-        """Parsed and executes a multi-statement SQL script file."""
+    def stream(self, query, params=None, batch_size=10000):
+        """
+        Executes a SELECT on an unbuffered cursor and yields lists of row tuples (fetchmany batches).
+        Uses a dedicated connection outside the pool: long exports would otherwise hold a pool slot
+        for minutes, and a stream abandoned mid-result cannot be reset and handed back to the pool.
+        """
+        connection = mysql.connector.connect(**DB_CONFIG)
+        if DBManager.connection_hook:
+            connection = DBManager.connection_hook(connection)
+        cursor = None
+        exhausted = False
+        try:
+            cursor = connection.cursor()
+            # A slow reader (e.g. an HTTP download) must not trip the server's write timeout
+            cursor.execute("SET SESSION net_write_timeout = 3600")
+            cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    exhausted = True
+                    break
+                yield rows
+        finally:
+            # With unread rows left, closing the cursor would raise; dropping the connection discards them
+            if cursor and exhausted:
+                cursor.close()
+            connection.close()
+
+    def execute_sql_script(self, file_path, stop_on_error=False):
+        """
+        Parsed and executes a multi-statement SQL script file.
+        stop_on_error: abort at the first failing statement and return False (instead of warning and going on).
+        """
         connection = None
         cursor = None
         try:
@@ -145,6 +205,10 @@ class DBManager:
                         cursor.execute(statement)
                         count += 1
                     except mysql.connector.Error as err:
+                        if stop_on_error:
+                            print(f"❌ Statement {count + 1} of {file_path} failed: {err}")
+                            connection.rollback()
+                            return False
                         print(f"⚠️ Warning executing statement: {err}")
             
             connection.commit()
@@ -0,0 +1,31 @@
+-- Crew duty timeline: one row per (employee, flight) with the busy window precomputed,
+-- so availability checks become index range probes instead of flights x routes joins.
+CREATE TABLE IF NOT EXISTS crew_duty_timeline (
+    employee_id INT NOT NULL,
+    flight_id INT NOT NULL,
+    busy_start DATETIME NOT NULL,
+    busy_end DATETIME NOT NULL,
+    start_location VARCHAR(50) NOT NULL,
+    end_location VARCHAR(50) NOT NULL,
+    PRIMARY KEY (employee_id, busy_start, flight_id),
+    KEY idx_timeline_flight (flight_id),
+    KEY idx_timeline_employee_end (employee_id, busy_end)
+);
+
+-- Backfill from existing assignments (cancelled flights never occupy crew)
+INSERT IGNORE INTO crew_duty_timeline
+    (employee_id, flight_id, busy_start, busy_end, start_location, end_location)
+SELECT
+    ca.employee_id,
+    f.flight_id,
+    f.departure_time,
+    ADDTIME(f.departure_time, r.flight_duration),
+    r.origin_airport,
+    r.destination_airport
+FROM crew_assignments ca
+JOIN flights f ON ca.flight_id = f.flight_id
+JOIN routes r ON f.route_id = r.route_id
+WHERE f.flight_status NOT IN ('Cancelled', 'System Cancelled');
+
+-- Candidate search filters staff by role before probing the timeline
+CREATE INDEX idx_staff_role ON staff (role);
@@ -0,0 +1,28 @@
+-- Seat-level uniqueness for sold tickets.
+-- is_active is 1 while the order holds the seat and NULL once the order is cancelled.
+-- NULLs never collide in a UNIQUE index, so a cancelled seat can be sold again
+-- while two active tickets for the same (flight, row, column) are rejected by InnoDB.
+
+ALTER TABLE order_lines ADD COLUMN is_active TINYINT NULL DEFAULT 1;
+
+UPDATE order_lines ol
+JOIN orders o ON ol.unique_order_code = o.unique_order_code
+SET ol.is_active = NULL
+WHERE o.order_status IN ('customer_cancelled', 'system_cancelled');
+
+-- Historic double sales (if any) keep the oldest order and release the others
+UPDATE order_lines ol
+JOIN (
+    SELECT flight_id, `row_number`, `column_number`, MIN(unique_order_code) AS keep_code
+    FROM order_lines
+    WHERE is_active = 1
+    GROUP BY flight_id, `row_number`, `column_number`
+    HAVING COUNT(*) > 1
+) dup ON dup.flight_id = ol.flight_id
+    AND dup.`row_number` = ol.`row_number`
+    AND dup.`column_number` = ol.`column_number`
+SET ol.is_active = NULL
+WHERE ol.is_active = 1 AND ol.unique_order_code <> dup.keep_code;
+
+CREATE UNIQUE INDEX uq_order_lines_active_seat
+    ON order_lines (flight_id, `row_number`, `column_number`, is_active);
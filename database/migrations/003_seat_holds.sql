@@ -0,0 +1,13 @@
+-- Short-lived seat holds between the order summary and payment.
+-- One row per held seat (so two holders can never share a seat), an expiry index for
+-- cheap ordered sweeping and a token index to convert or release a whole hold.
+CREATE TABLE IF NOT EXISTS seat_holds (
+    flight_id INT NOT NULL,
+    `row_number` INT NOT NULL,
+    `column_number` VARCHAR(5) NOT NULL,
+    hold_token CHAR(32) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (flight_id, `row_number`, `column_number`),
+    KEY idx_seat_holds_expires (expires_at),
+    KEY idx_seat_holds_token (hold_token)
+)
@@ -0,0 +1,18 @@
+-- Wider order codes allocated from a shared sequence.
+-- Codes stay numeric: legacy codes are 6 digits, new codes are 10 digits (1e9 and up),
+-- so the two ranges never overlap. FK checks are paused while both sides change type.
+SET FOREIGN_KEY_CHECKS = 0;
+
+ALTER TABLE orders MODIFY unique_order_code BIGINT NOT NULL;
+
+ALTER TABLE order_lines MODIFY unique_order_code BIGINT NOT NULL;
+
+SET FOREIGN_KEY_CHECKS = 1;
+
+-- One row per sequence. Workers reserve blocks with an atomic UPDATE (no per-order round-trip).
+CREATE TABLE IF NOT EXISTS code_sequences (
+    name VARCHAR(32) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO code_sequences (name, next_value) VALUES ('orders', 0)
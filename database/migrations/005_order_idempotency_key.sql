@@ -0,0 +1,5 @@
+-- Idempotency key per booking draft. The unique index makes a replayed confirm
+-- find the original order with one index probe, and makes a concurrent duplicate fail fast.
+ALTER TABLE orders ADD COLUMN idempotency_key CHAR(32) NULL;
+
+CREATE UNIQUE INDEX uq_orders_idempotency_key ON orders (idempotency_key)
@@ -0,0 +1,4 @@
+-- Customer order history: equality on customer_email, keyset pagination on (order_date, code).
+CREATE INDEX idx_orders_customer_date ON orders (customer_email, order_date, unique_order_code);
+
+CREATE INDEX idx_order_lines_order ON order_lines (unique_order_code)
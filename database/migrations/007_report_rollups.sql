@@ -0,0 +1,71 @@
+-- Incremental report rollups.
+-- updated_at on the source tables lets the refresh job find the partitions (flight days,
+-- order months) touched since its last watermark instead of re-aggregating the full history.
+ALTER TABLE flights
+    ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD KEY idx_flights_updated (updated_at);
+
+ALTER TABLE orders
+    ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD KEY idx_orders_updated (updated_at);
+
+ALTER TABLE crew_assignments
+    ADD COLUMN updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    ADD KEY idx_crew_assignments_updated (updated_at);
+
+-- Per flight: status, capacity, seats sold and revenue by class (partitioned by flight_date)
+CREATE TABLE IF NOT EXISTS rollup_flights (
+    flight_id INT NOT NULL PRIMARY KEY,
+    flight_date DATE NOT NULL,
+    departure_time DATETIME NOT NULL,
+    aircraft_id INT NULL,
+    route_id INT NOT NULL,
+    flight_status VARCHAR(20) NOT NULL,
+    flight_hours DECIMAL(10,4) NOT NULL,
+    capacity INT NULL,
+    seats_sold INT NOT NULL,
+    economy_sold INT NOT NULL,
+    business_sold INT NOT NULL,
+    economy_revenue DECIMAL(14,2) NOT NULL,
+    business_revenue DECIMAL(14,2) NOT NULL,
+    KEY idx_rollup_flights_date (flight_date),
+    KEY idx_rollup_flights_status_departure (flight_status, departure_time)
+);
+
+-- Per day and aircraft (and route, for the dominant route): landed flights and hours flown
+CREATE TABLE IF NOT EXISTS rollup_aircraft_daily (
+    stat_date DATE NOT NULL,
+    aircraft_id INT NOT NULL,
+    route_id INT NOT NULL,
+    landed_flights INT NOT NULL,
+    flight_hours DECIMAL(12,4) NOT NULL,
+    PRIMARY KEY (stat_date, aircraft_id, route_id),
+    KEY idx_rollup_aircraft_daily_aircraft (aircraft_id, stat_date)
+);
+
+-- Per day and employee: landed short/long haul hours
+CREATE TABLE IF NOT EXISTS rollup_employee_daily (
+    stat_date DATE NOT NULL,
+    employee_id INT NOT NULL,
+    short_hours DECIMAL(12,4) NOT NULL,
+    long_hours DECIMAL(12,4) NOT NULL,
+    PRIMARY KEY (stat_date, employee_id),
+    KEY idx_rollup_employee_daily_employee (employee_id)
+);
+
+-- Per order month: orders placed and customer cancellations
+CREATE TABLE IF NOT EXISTS rollup_order_months (
+    month CHAR(7) NOT NULL PRIMARY KEY,
+    orders_count INT NOT NULL,
+    cancelled_count INT NOT NULL
+);
+
+-- Refresh state. live_date is the one day left out of the rollups (served by live queries)
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+    name VARCHAR(50) NOT NULL PRIMARY KEY,
+    watermark DATETIME NULL,
+    live_date DATE NULL,
+    refreshed_at DATETIME NULL
+);
+
+INSERT IGNORE INTO rollup_watermarks (name) VALUES ('reports')
@@ -0,0 +1,22 @@
+-- Stored seat capacity per aircraft, maintained by SeatService whenever a cabin is (re)defined.
+-- Replaces the per-query SUM((row_end - row_start + 1) * CHAR_LENGTH(columns)) over aircraft_classes.
+-- economy_seats counts every non-Business class (same convention as the pricing queries).
+CREATE TABLE IF NOT EXISTS aircraft_capacity (
+    aircraft_id INT NOT NULL PRIMARY KEY,
+    total_seats INT NOT NULL,
+    economy_seats INT NOT NULL,
+    business_seats INT NOT NULL
+);
+
+INSERT INTO aircraft_capacity (aircraft_id, total_seats, economy_seats, business_seats)
+SELECT
+    aircraft_id,
+    SUM((row_end - row_start + 1) * CHAR_LENGTH(columns)),
+    SUM(CASE WHEN class_name = 'Business' THEN 0 ELSE (row_end - row_start + 1) * CHAR_LENGTH(columns) END),
+    SUM(CASE WHEN class_name = 'Business' THEN (row_end - row_start + 1) * CHAR_LENGTH(columns) ELSE 0 END)
+FROM aircraft_classes
+GROUP BY aircraft_id
+ON DUPLICATE KEY UPDATE
+    total_seats = VALUES(total_seats),
+    economy_seats = VALUES(economy_seats),
+    business_seats = VALUES(business_seats)
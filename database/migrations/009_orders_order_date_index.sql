@@ -0,0 +1,3 @@
+-- Date-range exports and the monthly order rollup filter orders by order_date alone.
+-- The customer history index leads with customer_email, so it cannot serve these ranges.
+CREATE INDEX idx_orders_order_date ON orders (order_date)
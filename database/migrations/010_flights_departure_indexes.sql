@@ -0,0 +1,6 @@
+-- Report date ranges are half-open ranges on departure_time.
+-- Landed-flight reports combine an equality on flight_status with the range (status first).
+-- Revenue and exports range over departure_time alone.
+CREATE INDEX idx_flights_status_departure ON flights (flight_status, departure_time);
+
+CREATE INDEX idx_flights_departure ON flights (departure_time)
@@ -0,0 +1,20 @@
+-- Daily time-series buckets per flight day, route, aircraft and cabin class (bookings, seats, capacity, revenue).
+-- Coarser resolutions (week, month, quarter, year) are downsampled from these rows at query time.
+-- aircraft_id 0 marks flights without an assigned aircraft. Cancelled flights are left out.
+CREATE TABLE IF NOT EXISTS rollup_series_daily (
+    stat_date DATE NOT NULL,
+    route_id INT NOT NULL,
+    aircraft_id INT NOT NULL,
+    class VARCHAR(20) NOT NULL,
+    flights INT NOT NULL,
+    bookings INT NOT NULL,
+    seats_sold INT NOT NULL,
+    capacity INT NOT NULL,
+    revenue DECIMAL(14,2) NOT NULL,
+    PRIMARY KEY (stat_date, route_id, aircraft_id, class),
+    KEY idx_rollup_series_route (route_id, stat_date),
+    KEY idx_rollup_series_aircraft (aircraft_id, stat_date)
+);
+
+-- History has to be bucketed once: the next rollup refresh runs as a full rebuild
+UPDATE rollup_watermarks SET watermark = NULL WHERE name = 'reports'
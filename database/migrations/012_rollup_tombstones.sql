@@ -0,0 +1,32 @@
+-- Deletes leave no updated_at behind, so the rollup refresh could not see them.
+-- These triggers record the flight day (and order month) a deleted row belonged to.
+-- The refresh reads tombstones newer than its watermark and prunes the ones it has processed.
+CREATE TABLE IF NOT EXISTS rollup_tombstones (
+    tombstone_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    stat_date DATE NULL,
+    order_month CHAR(7) NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_rollup_tombstones_deleted (deleted_at)
+);
+
+DROP TRIGGER IF EXISTS trg_crew_assignments_rollup_delete;
+
+CREATE TRIGGER trg_crew_assignments_rollup_delete AFTER DELETE ON crew_assignments
+FOR EACH ROW
+    INSERT INTO rollup_tombstones (stat_date)
+    SELECT DATE(departure_time) FROM flights WHERE flight_id = OLD.flight_id;
+
+DROP TRIGGER IF EXISTS trg_orders_rollup_delete;
+
+CREATE TRIGGER trg_orders_rollup_delete AFTER DELETE ON orders
+FOR EACH ROW
+    INSERT INTO rollup_tombstones (stat_date, order_month)
+    SELECT DATE(f.departure_time), DATE_FORMAT(OLD.order_date, '%Y-%m')
+    FROM (SELECT 1) one
+    LEFT JOIN flights f ON f.flight_id = OLD.flight_id;
+
+DROP TRIGGER IF EXISTS trg_flights_rollup_delete;
+
+CREATE TRIGGER trg_flights_rollup_delete AFTER DELETE ON flights
+FOR EACH ROW
+    INSERT INTO rollup_tombstones (stat_date) VALUES (DATE(OLD.departure_time))
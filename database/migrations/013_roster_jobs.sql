@@ -0,0 +1,17 @@
+-- Roster job state, shared by every app worker (a status poll may land on any process).
+-- The job runs in its own process and refreshes heartbeat_at while it works, so a job whose
+-- process died shows up as stalled instead of running forever.
+CREATE TABLE IF NOT EXISTS roster_jobs (
+    job_id CHAR(12) NOT NULL PRIMARY KEY,
+    status VARCHAR(20) NOT NULL,
+    date_from DATETIME NOT NULL,
+    date_to DATETIME NOT NULL,
+    processed INT NOT NULL DEFAULT 0,
+    total INT NOT NULL DEFAULT 0,
+    result TEXT NULL,
+    error TEXT NULL,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL,
+    heartbeat_at DATETIME NOT NULL,
+    KEY idx_roster_jobs_started (started_at)
+)
@@ -0,0 +1,5 @@
+-- Earlier timeline backfills and rebuilds only skipped 'Cancelled' flights, so crew of
+-- 'System Cancelled' flights still showed as busy. No cancelled flight occupies crew.
+DELETE t FROM crew_duty_timeline t
+JOIN flights f ON t.flight_id = f.flight_id
+WHERE f.flight_status IN ('Cancelled', 'System Cancelled')
@@ -0,0 +1,9 @@
+-- Cache invalidations shared by every app process (see CacheInvalidations).
+-- Workers replay rows newer than the last id they saw; rows are pruned after an hour.
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    cache_name VARCHAR(50) NOT NULL,
+    cache_key VARCHAR(255) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_cache_invalidations_created (created_at)
+)
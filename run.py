@@ -2,6 +2,7 @@
 File: run.py
 Purpose: Application Entry Point. Configures Flask app and registers blueprints.
 """
+import os
 from flask import Flask
 from database.db_manager import DBManager
 # Routes
@@ -9,10 +10,21 @@ from app.routes.auth_routes import routes
 from app.routes.admin_routes import admin_bp
 from app.routes.booking_routes import booking_bp
 from app.models.daos.employee_dao import EmployeeDAO
+from app.utils.profiling import RequestProfiler
 
 app = Flask(__name__)
 app.secret_key = 'flytau_secret_key' 
 
+# Request profiling (off unless FLYTAU_PROFILING=1)
+app.config.update(
+    PROFILING=os.environ.get('FLYTAU_PROFILING') == '1',
+    PROFILE_SLOW_MS=float(os.environ.get('FLYTAU_PROFILE_SLOW_MS', 500)),
+    PROFILE_DIR=os.environ.get('FLYTAU_PROFILE_DIR', 'profiles'),
+    PROFILE_CPROFILE_RATE=float(os.environ.get('FLYTAU_PROFILE_CPROFILE_RATE', 0.05)),
+    PROFILE_MEMORY=os.environ.get('FLYTAU_PROFILE_MEMORY') == '1'
+)
+profiler = RequestProfiler(app)
+
 # Initialize Core Dependencies
 db = DBManager()
 app.employee_dao = EmployeeDAO(db)
@@ -0,0 +1,10 @@
+"""
+File: wsgi.py
+Purpose: Production WSGI entry point.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from run import app
+
+__all__ = ['app']